@@ -1,5 +1,11 @@
 """PDF Writer package."""
 
+import os
+
+# PyMuPDF prints its messages to stdout by default, which may be carrying a
+# PDF (``--output -``); it reads this variable once, on import.
+os.environ.setdefault("PYMUPDF_MESSAGE", "fd:2")
+
 from .editor import (
     write_text,
     add_image,
@@ -8,13 +14,40 @@ from .editor import (
     split_pdf,
     rotate_pages,
     extract_text,
+    extract_text_pages,
     fill_form,
     flatten_form,
     edit_text,
     delete_pages,
     reorder_pages,
     insert_blank_page,
+    impose_pdf,
+    render_pages,
+    extract_images,
+    prune_resources,
+    stamp_pdf,
+    number_pages,
+    bates_number,
+    extract_words,
+    extract_word_columns,
+    linearize_pdf,
+    check_linearization,
+    first_page_bytes,
+    ResourceReport,
+    ImageReport,
+    MergeReport,
+    redact_pdf,
+    RedactionMatch,
+    RedactionReport,
+    ExtractedImage,
+    ImageExtractReport,
+    images_to_pdf,
+    ImagesToPdfReport,
 )
+from .cache import CacheStats, DocumentCache, document_cache
+from .pages import PageSet
+from .progress import CancelToken, OperationCancelled
+from .windowed import WindowReport
 
 __all__ = [
     "write_text",
@@ -24,11 +57,41 @@ __all__ = [
     "split_pdf",
     "rotate_pages",
     "extract_text",
+    "extract_text_pages",
     "fill_form",
     "flatten_form",
     "edit_text",
     "delete_pages",
     "reorder_pages",
     "insert_blank_page",
+    "impose_pdf",
+    "render_pages",
+    "extract_images",
+    "prune_resources",
+    "stamp_pdf",
+    "number_pages",
+    "bates_number",
+    "extract_words",
+    "extract_word_columns",
+    "linearize_pdf",
+    "check_linearization",
+    "first_page_bytes",
+    "ResourceReport",
+    "ImageReport",
+    "MergeReport",
+    "redact_pdf",
+    "RedactionMatch",
+    "RedactionReport",
+    "ExtractedImage",
+    "ImageExtractReport",
+    "images_to_pdf",
+    "ImagesToPdfReport",
+    "PageSet",
+    "WindowReport",
+    "CancelToken",
+    "OperationCancelled",
+    "DocumentCache",
+    "CacheStats",
+    "document_cache",
 ]
 
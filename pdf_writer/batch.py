@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import click
+import fitz  # PyMuPDF
+import typer
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeRemainingColumn
+
+# Extensão do arquivo gerado por comandos com --output que não produzem PDF.
+_OUTPUT_EXT = {"extract-text": ".txt"}
+
+_click_group: Optional[click.Group] = None
+
+
+@dataclass
+class BatchResult:
+    ok: int = 0
+    failed: int = 0
+    skipped: int = 0
+    pages: int = 0
+    seconds: float = 0.0
+
+
+def expand_inputs(patterns: Sequence[str] = (), file_list: Optional[str] = None) -> List[str]:
+    # Globs (com ** recursivo) e/ou um arquivo com um caminho por linha; sem repetições.
+    found: Dict[str, None] = {}
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True) or ([pattern] if os.path.isfile(pattern) else [])
+        for p in sorted(matches):
+            found.setdefault(os.path.abspath(p))
+    if file_list:
+        # "-": lista vinda da entrada padrão (ex.: find ... | pdf_writer ...)
+        f = sys.stdin if file_list == "-" else open(file_list, encoding="utf-8")
+        try:
+            for line in f:
+                if line.strip():
+                    found.setdefault(os.path.abspath(line.strip()))
+        finally:
+            if f is not sys.stdin:
+                f.close()
+    return list(found)
+
+
+def command_args(
+    command: click.Command, name: str, src: str, output_dir: str, root: str, extra: Sequence[str]
+) -> List[str]:
+    params = {p.name for p in command.params}
+    if "input" not in params:
+        raise ValueError(f"O comando '{name}' não processa um arquivo de entrada por vez")
+    rel = os.path.relpath(src, root)
+    stem, ext = os.path.splitext(rel)
+    args = ["--input", src]
+    if "output" in params:
+        target = os.path.join(output_dir, stem + _OUTPUT_EXT.get(name, ext))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        args += ["--output", target]
+    elif "output_dir" in params:
+        args += ["--output-dir", os.path.join(output_dir, stem)]
+    return args + list(extra)
+
+
+def _cli_group() -> click.Group:
+    from .cli import app  # importado aqui: cli.py também importa este módulo
+
+    return typer.main.get_command(app)
+
+
+def _init_worker():
+    # Processos ficam vivos durante todo o lote: monta o grupo click uma vez
+    # e descarta as mensagens de cada comando (o progresso fica no pai).
+    global _click_group
+    _click_group = _cli_group()
+    sys.stdout = open(os.devnull, "w")
+
+
+def _run_one(name: str, args: List[str], src: str) -> int:
+    try:
+        _click_group.main(args=[name, *args], standalone_mode=False)
+        with fitz.open(src) as doc:
+            return doc.page_count
+    except Exception as e:
+        # exceções do click carregam o contexto, que não volta ao processo pai
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+def _load_journal(path: str, key: str) -> set:
+    done = set()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # linha truncada por uma interrupção
+                if entry.get("status") == "ok" and entry.get("key") == key:
+                    done.add(entry["input"])
+    return done
+
+
+def run_batch(
+    name: str,
+    inputs: Iterable[str],
+    output_dir: str,
+    extra: Sequence[str] = (),
+    jobs: Optional[int] = None,
+    journal: Optional[str] = None,
+    show_progress: bool = True,
+) -> BatchResult:
+    group = _cli_group()
+    if name not in group.commands:
+        raise ValueError(f"Comando desconhecido: {name}")
+    command = group.commands[name]
+    inputs = list(inputs)
+    os.makedirs(output_dir, exist_ok=True)
+    root = os.path.commonpath([os.path.dirname(p) for p in inputs]) if inputs else output_dir
+
+    # O diário registra cada arquivo concluído; reexecutar o mesmo lote
+    # (mesmo comando e opções) pula o que já terminou com sucesso.
+    journal = journal or os.path.join(output_dir, ".pdf_writer_batch.jsonl")
+    key = json.dumps([name, list(extra)])
+    done = _load_journal(journal, key)
+    pending = [p for p in inputs if p not in done]
+    result = BatchResult(skipped=len(inputs) - len(pending))
+
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    start = time.monotonic()
+    progress = Progress(
+        TextColumn("[bold]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TextColumn("{task.fields[pps]:.1f} pág/s"),
+        TimeRemainingColumn(),
+        disable=not show_progress,
+    )
+    with progress, open(journal, "a", encoding="utf-8") as log, ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker
+    ) as pool:
+        task = progress.add_task(name, total=len(inputs), completed=result.skipped, pps=0.0)
+        todo = iter(pending)
+        running = {}
+
+        def refill():
+            # Limita os arquivos em voo para não criar 100k futures de uma vez.
+            while len(running) < jobs * 2:
+                src = next(todo, None)
+                if src is None:
+                    return
+                args = command_args(command, name, src, output_dir, root, extra)
+                running[pool.submit(_run_one, name, args, src)] = src
+
+        refill()
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                src = running.pop(fut)
+                entry = {"input": src, "key": key}
+                error = fut.exception()
+                if error is None:
+                    pages = fut.result()
+                    result.ok += 1
+                    result.pages += pages
+                    entry.update(status="ok", pages=pages)
+                else:
+                    result.failed += 1
+                    entry.update(status="error", error=str(error))
+                log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                log.flush()
+                elapsed = time.monotonic() - start
+                progress.update(task, advance=1, pps=result.pages / elapsed if elapsed else 0.0)
+            refill()
+    result.seconds = time.monotonic() - start
+    return result
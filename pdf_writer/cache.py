@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import functools
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Tuple
+
+import fitz  # PyMuPDF
+from pypdf import PdfReader
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+
+def _open_fitz(source) -> fitz.Document:
+    if isinstance(source, (str, os.PathLike)):
+        return fitz.open(source)
+    source.seek(0)  # o mesmo stream pode já ter sido lido pelo pypdf
+    return fitz.open(stream=source.read(), filetype="pdf")
+
+
+def _after_fork(ref):
+    cache = ref()
+    if cache is not None:
+        cache._forget_after_fork()
+
+
+class DocumentCache:
+    """Cache LRU de documentos já interpretados (``PdfReader`` e ``fitz.Document``).
+
+    A chave é o caminho absoluto; mtime e tamanho são conferidos a cada acesso,
+    então um arquivo alterado é reaberto. O peso de cada entrada é o tamanho do
+    arquivo, e arquivos maiores que o limite de memória não ficam no cache.
+
+    Os handles devolvidos são compartilhados e só podem ser lidos; quem altera
+    o documento usa ``take_document``, que abre um handle próprio.
+    """
+
+    def __init__(self, max_entries: int = 8, max_mb: float = 256):
+        self.max_entries = max_entries
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        # (tipo, caminho) -> ((mtime_ns, tamanho), handle, peso)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Tuple[int, int], Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+        if hasattr(os, "register_at_fork"):
+            # Um processo filho (ProcessPoolExecutor com fork) herdaria os
+            # handles do pai, que compartilham a posição no arquivo.
+            os.register_at_fork(after_in_child=functools.partial(_after_fork, weakref.ref(self)))
+
+    def reader(self, path) -> PdfReader:
+        return self._get("pypdf", path, PdfReader)
+
+    def document(self, path) -> fitz.Document:
+        return self._get("fitz", path, _open_fitz)
+
+    def take_document(self, path) -> fitz.Document:
+        # Sempre um handle novo, que o chamador pode alterar e deve fechar: o
+        # do cache pode estar em uso (ex.: um gerador de extract_words).
+        return _open_fitz(path)
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            path = os.path.abspath(path)
+            for key in [k for k in self._entries if k[1] == path]:
+                self._drop(key)
+
+    def configure(self, max_entries: Optional[int] = None, max_mb: Optional[float] = None):
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_mb is not None:
+                self.max_bytes = int(max_mb * 1024 * 1024)
+            self._trim()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            s = self._stats
+            return CacheStats(s.hits, s.misses, s.evictions, len(self._entries), self._bytes)
+
+    def _get(self, kind: str, path, opener: Callable[[Any], Any]):
+        if not isinstance(path, (str, os.PathLike)):
+            return opener(path)  # streams não têm como ser validados; nunca entram no cache
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        key = (kind, path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._stats.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+            self._stats.misses += 1
+            if entry is not None:
+                self._drop(key)  # o arquivo mudou desde que foi aberto
+
+        handle = opener(path)
+        if st.st_size <= self.max_bytes and self.max_entries > 0:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = (stamp, handle, st.st_size)
+                    self._bytes += st.st_size
+                    self._trim()
+        return handle
+
+    def _forget_after_fork(self):
+        # Sem fechar os handles (são do pai) e sem usar o lock, que pode ter
+        # sido copiado travado por outra thread.
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+    def _drop(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _trim(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._entries)))
+            self._stats.evictions += 1
+
+
+# Cache do processo, usado pelos caminhos de leitura do editor e da GUI.
+document_cache = DocumentCache()
@@ -1,36 +1,140 @@
 from __future__ import annotations
 
 import json
+import os
+import sys
+from array import array
+from contextlib import contextmanager
+from io import BytesIO
 from typing import List, Optional
 
+import rich
 import typer
-from rich import print
+from rich.console import Console
 
 from . import (
     write_text,
     add_image,
     sign_pdf,
     merge_pdfs,
+    redact_pdf,
     split_pdf,
     rotate_pages,
-    extract_text,
+    extract_text_pages,
     fill_form,
     flatten_form,
     edit_text,
     delete_pages,
     reorder_pages,
     insert_blank_page,
+    impose_pdf,
+    render_pages,
+    extract_images,
+    images_to_pdf,
+    prune_resources,
+    stamp_pdf,
+    number_pages,
+    bates_number,
+    extract_words,
+    extract_word_columns,
+    linearize_pdf,
+    check_linearization,
+    first_page_bytes,
+    PageSet,
+    ResourceReport,
 )
 from .gui import run_gui
+from .watch import HotFolder, load_steps
+from .batch import expand_inputs, run_batch
+from .progress import atomic_output
+from .windowed import WindowReport
 from reportlab.lib.pagesizes import letter
 
 app = typer.Typer(help="Editor de PDFs: escrever, assinar, mesclar, dividir, girar, extrair texto e preencher formulários.")
 
+STDIO = "-"  # --input - lê da entrada padrão; --output - grava na saída padrão
+
+_stderr = Console(stderr=True)
+_data_on_stdout = False
+_stdin_pdf: Optional[BytesIO] = None
+
+
+@app.callback()
+def _reset_stdio():
+    global _data_on_stdout, _stdin_pdf
+    _data_on_stdout = False
+    _stdin_pdf = None
+
+
+def print(*objects, **kwargs):
+    # Com --output -, a saída padrão leva o PDF: as mensagens vão para stderr.
+    (_stderr if _data_on_stdout else rich.get_console()).print(*objects, **kwargs)
+
+
+def _input(path: str):
+    # O PDF precisa de acesso aleatório: a entrada padrão é lida uma vez para a memória.
+    global _stdin_pdf
+    if path != STDIO:
+        return path
+    if _stdin_pdf is None:
+        _stdin_pdf = BytesIO(sys.stdin.buffer.read())
+    return _stdin_pdf
+
+
+def _output(path: str):
+    global _data_on_stdout
+    if path != STDIO:
+        return path
+    _data_on_stdout = True
+    return sys.stdout.buffer
+
+
+@contextmanager
+def _text_output(path: Optional[str]):
+    # Saída padrão, ou um arquivo que só aparece completo (atomic_output).
+    if not path or path == STDIO:
+        yield sys.stdout
+        return
+    with atomic_output(path) as tmp, open(tmp, "w", encoding="utf-8") as f:
+        yield f
+
+
+def _page_set(pages: Optional[List[str]]) -> Optional[PageSet]:
+    # Cada argumento pode ser uma página ou um intervalo: "3", "1-5", "10-", "-1", "1-9:2"
+    if not pages:
+        return None
+    return PageSet.parse(",".join(pages))
+
+
+def _print_resource_reports(reports: List[ResourceReport]):
+    removed = sum(r.resources_removed for r in reports)
+    saved = sum(r.bytes_removed for r in reports)
+    total = sum(r.output_bytes for r in reports)
+    print(
+        f"Recursos removidos: {removed} | ~{saved / 1024:.1f} KiB de streams descartados"
+        f" | saída: {total / 1024:.1f} KiB em {len(reports)} arquivo(s)"
+    )
+
+
+def _print_window_report(report):
+    # Só no modo com limite de memória (--memory-limit) há relatório.
+    if isinstance(report, WindowReport):
+        print(f"{report.pages} página(s) em {report.windows} janela(s) | pico de memória (RSS): {report.peak_rss_mb:.0f} MB")
+
+
+def _print_image_report(report):
+    mode = "JPEG original (sem recodificar)" if report.passthrough else "recodificada"
+    print(
+        f"Imagem {report.source_size[0]}x{report.source_size[1]} → {report.embedded_size[0]}x{report.embedded_size[1]}"
+        f", {mode}: {report.embedded_bytes / 1024:.1f} KiB embutidos"
+        f" ({report.bytes_saved / 1024:+.1f} KiB economizados)"
+    )
+
 
 @app.command()
 def write_text_cmd(
-    input: str = typer.Option(..., help="PDF de entrada"),
-    output: str = typer.Option(..., help="PDF de saída"),
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    output: str = typer.Option(..., help="PDF de saída (- para stdout)"),
     text: str = typer.Option(..., help="Texto a escrever"),
     x: float = typer.Option(..., help="Posição X (pt)"),
     y: float = typer.Option(..., help="Posição Y (pt)"),
@@ -38,151 +142,517 @@ def write_text_cmd(
     font_name: str = typer.Option("Helvetica", help="Nome da fonte ou caminho .ttf"),
     size: int = typer.Option(12, help="Tamanho da fonte"),
     color: str = typer.Option("black", help="Cor do texto (ex: black, red)"),
+    engine: str = typer.Option("overlay", help="overlay (pypdf/reportlab) ou direct (PyMuPDF, sem reprocessar o PDF)"),
+    linearize: bool = typer.Option(False, "--linearize", is_flag=True, help="Salvar linearizado (fast web view)"),
 ):
-    write_text(input, output, text, x, y, page, font_name, size, color)
+    write_text(_input(input), _output(output), text, x, y, page, font_name, size, color, engine=engine, linearize=linearize)
     print(f"[green]Texto inserido em[/green] {output}")
 
 
 @app.command()
 def edit_text_cmd(
-    input: str = typer.Option(..., help="PDF de entrada"),
-    output: str = typer.Option(..., help="PDF de saída"),
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    output: str = typer.Option(..., help="PDF de saída (- para stdout)"),
     page_num: int = typer.Option(..., help="Número da página (1-based)"),
     old_text: str = typer.Option(..., help="Texto existente a ser substituído"),
     new_text: str = typer.Option(..., help="Novo texto"),
     font_name: Optional[str] = typer.Option(None, help="Nome da fonte (opcional)"),
     font_size: Optional[float] = typer.Option(None, help="Tamanho da fonte (opcional)"),
     color: Optional[str] = typer.Option(None, help="Cor do texto (opcional)"),
+    linearize: bool = typer.Option(False, "--linearize", is_flag=True, help="Salvar linearizado (fast web view)"),
 ):
-    edit_text(input, output, page_num, old_text, new_text, font_name, font_size, color)
+    edit_text(_input(input), _output(output), page_num, old_text, new_text, font_name, font_size, color, linearize)
     print(f"[green]Texto editado em[/green] {output}")
 
 
 @app.command()
 def add_image_cmd(
-    input: str = typer.Option(..., help="PDF de entrada"),
-    output: str = typer.Option(..., help="PDF de saída"),
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    output: str = typer.Option(..., help="PDF de saída (- para stdout)"),
     image: str = typer.Option(..., help="Caminho da imagem"),
     x: float = typer.Option(..., help="Posição X"),
     y: float = typer.Option(..., help="Posição Y"),
     width: Optional[float] = typer.Option(None, help="Largura"),
     height: Optional[float] = typer.Option(None, help="Altura"),
     page: int = typer.Option(1, help="Página (1-based)"),
+    dpi: Optional[float] = typer.Option(None, help="Reamostrar para esta resolução no tamanho impresso (ex: 150)"),
+    quality: int = typer.Option(85, help="Qualidade JPEG ao reamostrar"),
+    engine: str = typer.Option("overlay", help="overlay (pypdf/reportlab) ou direct (PyMuPDF, sem reprocessar o PDF)"),
+    linearize: bool = typer.Option(False, "--linearize", is_flag=True, help="Salvar linearizado (fast web view)"),
 ):
-    add_image(input, output, image, x, y, width, height, page)
+    report = add_image(
+        _input(input), _output(output), image, x, y, width, height, page, dpi=dpi, jpeg_quality=quality, engine=engine, linearize=linearize
+    )
     print(f"[green]Imagem inserida em[/green] {output}")
+    _print_image_report(report)
 
 
 @app.command()
 def sign(
-    input: str = typer.Option(..., help="PDF de entrada"),
-    output: str = typer.Option(..., help="PDF de saída"),
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    output: str = typer.Option(..., help="PDF de saída (- para stdout)"),
     image: str = typer.Option(..., help="Imagem de assinatura"),
     page: int = typer.Option(-1, help="Página (1-based), -1 = última"),
     margin_x: float = typer.Option(36, help="Margem X"),
     margin_y: float = typer.Option(36, help="Margem Y"),
     width: float = typer.Option(180, help="Largura da assinatura (pt)"),
+    dpi: Optional[float] = typer.Option(None, help="Reamostrar para esta resolução no tamanho impresso (ex: 150)"),
+    quality: int = typer.Option(85, help="Qualidade JPEG ao reamostrar"),
+    engine: str = typer.Option("overlay", help="overlay (pypdf/reportlab) ou direct (PyMuPDF, sem reprocessar o PDF)"),
+    linearize: bool = typer.Option(False, "--linearize", is_flag=True, help="Salvar linearizado (fast web view)"),
 ):
-    sign_pdf(input, output, image, page, margin_x, margin_y, width)
+    report = sign_pdf(
+        _input(input), _output(output), image, page, margin_x, margin_y, width, dpi=dpi, jpeg_quality=quality, engine=engine, linearize=linearize
+    )
     print(f"[green]Assinatura aplicada em[/green] {output}")
+    _print_image_report(report)
+
+
+@app.command()
+def stamp(
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    output: str = typer.Option(..., help="PDF de saída (- para stdout)"),
+    text: Optional[str] = typer.Option(None, help="Texto do carimbo/marca d'água"),
+    image: Optional[str] = typer.Option(None, help="Imagem do carimbo (em vez de texto)"),
+    ranges: Optional[str] = typer.Option(None, help="Páginas, ex: \"1-3,5\". Se omitido, todas."),
+    position: str = typer.Option("center", help="center, top, bottom, top-left, top-right, bottom-left, bottom-right"),
+    x: Optional[float] = typer.Option(None, help="Posição X explícita (pt), com --y"),
+    y: Optional[float] = typer.Option(None, help="Posição Y explícita (pt), com --x"),
+    margin: float = typer.Option(36, help="Margem para posições nas bordas (pt)"),
+    font_name: str = typer.Option("Helvetica", help="Nome da fonte ou caminho .ttf"),
+    size: int = typer.Option(48, help="Tamanho da fonte"),
+    color: str = typer.Option("gray", help="Cor do texto (ex: gray, red)"),
+    width: Optional[float] = typer.Option(None, help="Largura da imagem (pt)"),
+    opacity: float = typer.Option(0.3, help="Opacidade (0-1)"),
+    rotation: float = typer.Option(0, help="Rotação em graus (anti-horário)"),
+    under: bool = typer.Option(False, "--under", is_flag=True, help="Desenhar sob o conteúdo da página"),
+    linearize: bool = typer.Option(False, "--linearize", is_flag=True, help="Salvar linearizado (fast web view)"),
+):
+    forms = stamp_pdf(
+        _input(input), _output(output), text, image, ranges, position, x, y, margin,
+        font_name, size, color, width, opacity, rotation, under, linearize,
+    )
+    print(f"[green]Carimbo aplicado em[/green] {output} ({forms} objeto(s) de carimbo)")
+
+
+@app.command("number-pages")
+def number_pages_cmd(
+    inputs: List[str] = typer.Argument(..., help="PDF(s) de entrada; a numeração continua entre arquivos"),
+    output: Optional[str] = typer.Option(None, help="PDF de saída (apenas com um arquivo de entrada; - para stdout)"),
+    output_dir: str = typer.Option("output", help="Diretório de saída (vários arquivos)"),
+    template: str = typer.Option("{n}", help="Modelo do rótulo: {n}, {page}, {total}. Ex: \"Página {page} de {total}\""),
+    prefix: str = typer.Option("", help="Prefixo do número (ex: ABC para Bates)"),
+    digits: int = typer.Option(0, help="Dígitos com zeros à esquerda (ex: 6 -> 000001)"),
+    start: int = typer.Option(1, help="Número inicial"),
+    ranges: Optional[str] = typer.Option(None, help="Páginas numeradas, ex: \"2-\". Se omitido, todas."),
+    position: str = typer.Option("bottom-right", help="center, top, bottom, top-left, top-right, bottom-left, bottom-right"),
+    margin: float = typer.Option(36, help="Margem (pt)"),
+    font_name: str = typer.Option("Helvetica", help="Nome da fonte ou caminho .ttf"),
+    size: int = typer.Option(10, help="Tamanho da fonte"),
+    color: str = typer.Option("black", help="Cor do texto"),
+    linearize: bool = typer.Option(False, "--linearize", is_flag=True, help="Salvar linearizado (fast web view)"),
+):
+    options = dict(
+        template=template, pages=ranges, position=position, margin=margin,
+        font_name=font_name, font_size=size, color=color, linearize=linearize,
+    )
+    if output and len(inputs) == 1:
+        last = number_pages(_input(inputs[0]), _output(output), start=start, prefix=prefix, digits=digits, **options)
+        target = output
+    else:
+        last = bates_number(inputs, output_dir, prefix=prefix, start=start, digits=digits, **options)
+        target = output_dir
+    print(f"[green]Páginas numeradas em[/green] {target} (próximo número: {last})")
 
 
 @app.command()
 def merge(
-    inputs: List[str] = typer.Argument(..., help="Lista de PDFs a mesclar"),
-    output: str = typer.Option(..., help="PDF de saída"),
+    inputs: List[str] = typer.Argument(..., help="Lista de PDFs a mesclar (- para stdin)"),
+    output: str = typer.Option(..., help="PDF de saída (- para stdout)"),
+    dedupe: bool = typer.Option(False, "--dedupe", is_flag=True, help="Compartilhar fontes, imagens e conteúdos idênticos entre os PDFs"),
+    drop_duplicate_pages: bool = typer.Option(
+        False, "--drop-duplicate-pages", is_flag=True, help="Descartar páginas idênticas repetidas (implica --dedupe)"
+    ),
+    linearize: bool = typer.Option(False, "--linearize", is_flag=True, help="Salvar linearizado (fast web view)"),
 ):
-    merge_pdfs(inputs, output)
+    report = merge_pdfs([_input(p) for p in inputs], _output(output), dedupe=dedupe, drop_duplicate_pages=drop_duplicate_pages, linearize=linearize)
     print(f"[green]PDFs mesclados em[/green] {output}")
+    if dedupe or drop_duplicate_pages:
+        print(
+            f"Objetos compartilhados: {report.objects_shared} ({report.bytes_shared / 1024:.1f} KiB)"
+            f" | páginas repetidas descartadas: {report.pages_dropped}"
+            f" | saída: {report.output_bytes / 1024:.1f} KiB, {report.pages} página(s)"
+        )
 
 
 @app.command()
 def split(
-    input: str = typer.Option(..., help="PDF de entrada"),
-    ranges: str = typer.Option(..., help="Intervalos, ex: \"1-3,5\""),
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    ranges: str = typer.Option(..., help="Intervalos, ex: \"1-3,5,10-,-1,1-9:2\""),
     output_dir: str = typer.Option("output", help="Diretório de saída"),
+    prune: bool = typer.Option(True, "--prune/--no-prune", help="Remover recursos não usados pelas páginas"),
+    linearize: bool = typer.Option(False, "--linearize", is_flag=True, help="Salvar linearizado (fast web view)"),
 ):
-    split_pdf(input, ranges, output_dir)
+    reports = split_pdf(_input(input), ranges, output_dir, prune, linearize)
     print(f"[green]Páginas salvas em[/green] {output_dir}")
+    _print_resource_reports(reports)
 
 
 @app.command()
 def rotate(
-    input: str = typer.Option(..., help="PDF de entrada"),
-    output: str = typer.Option(..., help="PDF de saída"),
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    output: str = typer.Option(..., help="PDF de saída (- para stdout)"),
     degrees: int = typer.Option(..., help="Rotação em graus (90, 180, 270)"),
-    pages: Optional[List[int]] = typer.Argument(None, help="Páginas (1-based). Se omitido, todas."),
+    pages: Optional[List[str]] = typer.Argument(None, help="Páginas (1-based), ex: 1 3-5 10- (use -- -1 para a última). Se omitido, todas."),
+    memory_limit: Optional[float] = typer.Option(
+        None, help="Processar em janelas com este limite de memória (MB); para documentos enormes"
+    ),
+    linearize: bool = typer.Option(False, "--linearize", is_flag=True, help="Salvar linearizado (fast web view)"),
 ):
-    rotate_pages(input, output, degrees, pages)
+    report = rotate_pages(_input(input), _output(output), degrees, _page_set(pages), memory_limit_mb=memory_limit, linearize=linearize)
     print(f"[green]PDF salvo em[/green] {output}")
+    _print_window_report(report)
 
 
 @app.command("extract-text")
 def extract_text_cmd(
-    input: str = typer.Option(..., help="PDF de entrada"),
-    output: Optional[str] = typer.Option(None, help="Arquivo .txt opcional"),
-    pages: Optional[List[int]] = typer.Argument(None, help="Páginas (1-based). Se omitido, todas."),
-):
-    text = extract_text(input, pages)
-    if output:
-        with open(output, "w", encoding="utf-8") as f:
-            f.write(text)
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    output: Optional[str] = typer.Option(None, help="Arquivo .txt opcional (padrão: saída padrão)"),
+    pages: Optional[List[str]] = typer.Argument(None, help="Páginas (1-based), ex: 1 3-5 10- (use -- -1 para a última). Se omitido, todas."),
+):
+    # Cada página é gravada assim que extraída, sem montar o texto inteiro.
+    to_file = output and output != STDIO
+    with _text_output(output) as out:
+        for n, text in enumerate(extract_text_pages(_input(input), _page_set(pages))):
+            if n:
+                out.write("\n")
+            out.write(text)
+        if not to_file:
+            out.write("\n")
+    if to_file:
         print(f"[green]Texto extraído para[/green] {output}")
+
+
+@app.command("extract-words")
+def extract_words_cmd(
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    output: Optional[str] = typer.Option(None, help="Arquivo .jsonl (padrão: saída padrão) ou diretório para --format npz"),
+    format: str = typer.Option("jsonl", help="jsonl (uma página por linha) ou npz (lotes colunares, requer numpy)"),
+    batch_size: int = typer.Option(65536, help="Palavras por lote no formato npz"),
+    pages: Optional[List[str]] = typer.Argument(None, help="Páginas (1-based), ex: 1 3-5 10-. Se omitido, todas."),
+):
+    if format == "jsonl":
+        to_file = output and output != STDIO
+        with _text_output(output) as out:
+            for layout in extract_words(_input(input), _page_set(pages)):
+                out.write(json.dumps(layout, ensure_ascii=False) + "\n")
+        if to_file:
+            print(f"[green]Palavras extraídas para[/green] {output}")
+    elif format == "npz":
+        try:
+            import numpy as np
+        except ImportError:
+            print("[red]O formato npz requer numpy (pip install numpy).[/red]")
+            raise typer.Exit(1)
+        out_dir = output or "words"
+        os.makedirs(out_dir, exist_ok=True)
+        n = 0
+        for n, batch in enumerate(extract_word_columns(_input(input), _page_set(pages), batch_size), 1):
+            columns = {k: np.frombuffer(v, dtype=v.typecode) if isinstance(v, array) else np.asarray(v) for k, v in batch.items()}
+            with atomic_output(os.path.join(out_dir, f"words-{n:05d}.npz")) as tmp:
+                np.savez(tmp, **columns)
+        print(f"[green]{n} lote(s) de palavras salvos em[/green] {out_dir}")
     else:
-        print(text)
+        print(f"[red]Formato desconhecido: {format}[/red]")
+        raise typer.Exit(1)
 
 
 @app.command("fill-form")
 def fill_form_cmd(
-    input: str = typer.Option(..., help="PDF com formulário"),
-    output: str = typer.Option(..., help="PDF preenchido"),
+    input: str = typer.Option(..., help="PDF com formulário (- para stdin)"),
+    output: str = typer.Option(..., help="PDF preenchido (- para stdout)"),
     data: str = typer.Option(..., help="JSON com campos e valores"),
     flatten: bool = typer.Option(False, "--flatten", is_flag=True, help="Achatar após preencher"),
+    linearize: bool = typer.Option(False, "--linearize", is_flag=True, help="Salvar linearizado (fast web view)"),
 ):
     payload = json.loads(data)
-    fill_form(input, output, payload, flatten)
+    fill_form(_input(input), _output(output), payload, flatten, linearize)
     print(f"[green]Formulário preenchido em[/green] {output}")
 
 
 @app.command()
 def flatten(
-    input: str = typer.Option(..., help="PDF de entrada"),
-    output: str = typer.Option(..., help="PDF de saída"),
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    output: str = typer.Option(..., help="PDF de saída (- para stdout)"),
+    memory_limit: Optional[float] = typer.Option(
+        None, help="Processar em janelas com este limite de memória (MB); para documentos enormes"
+    ),
+    linearize: bool = typer.Option(False, "--linearize", is_flag=True, help="Salvar linearizado (fast web view)"),
 ):
-    flatten_form(input, output)
+    report = flatten_form(_input(input), _output(output), memory_limit_mb=memory_limit, linearize=linearize)
     print(f"[green]Formulário achatado em[/green] {output}")
+    _print_window_report(report)
+
+
+@app.command()
+def redact(
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    output: str = typer.Option(..., help="PDF de saída (- para stdout)"),
+    text: Optional[List[str]] = typer.Option(None, "--text", help="Texto literal a remover (pode repetir)"),
+    regex: Optional[List[str]] = typer.Option(None, "--regex", help="Expressão regular a remover (pode repetir)"),
+    ignore_case: bool = typer.Option(False, "--ignore-case", is_flag=True, help="Ignorar maiúsculas/minúsculas"),
+    workers: Optional[int] = typer.Option(None, help="Processos para a busca (padrão: nº de CPUs)"),
+    report: Optional[str] = typer.Option(None, help="Relatório JSONL com uma linha por ocorrência"),
+    include_text: bool = typer.Option(False, "--include-text", is_flag=True, help="Incluir o texto removido no relatório"),
+    pages: Optional[List[str]] = typer.Argument(None, help="Páginas (1-based), ex: 1 3-5 10-. Se omitido, todas."),
+    linearize: bool = typer.Option(False, "--linearize", is_flag=True, help="Salvar linearizado (fast web view)"),
+):
+    """Remover de fato (texto e pixels de imagem) tudo o que casar com os padrões."""
+    result = redact_pdf(
+        _input(input), _output(output), text or (), regex or (), _page_set(pages), ignore_case, workers=workers, linearize=linearize
+    )
+    if report:
+        with open(report, "w", encoding="utf-8") as f:
+            for m in result.matches:
+                entry = {"page": m.page, "pattern": m.pattern, "rects": [[round(v, 2) for v in r] for r in m.rects]}
+                if include_text:
+                    entry["text"] = m.text
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    print(f"[green]PDF tarjado salvo em[/green] {output}")
+    for pattern, count in result.counts().items():
+        print(f"  {pattern}: {count} ocorrência(s)")
+    print(f"{len(result.matches)} ocorrência(s) em {result.pages_redacted} de {result.pages_scanned} página(s)")
 
 
 @app.command()
 def delete_pages_cmd(
-    input: str = typer.Option(..., help="PDF de entrada"),
-    output: str = typer.Option(..., help="PDF de saída"),
-    pages: List[int] = typer.Argument(..., help="Números das páginas a serem excluídas (1-based)"),
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    output: str = typer.Option(..., help="PDF de saída (- para stdout)"),
+    pages: List[str] = typer.Argument(..., help="Páginas a serem excluídas (1-based), ex: 2 5-7 (use -- -1 para a última)"),
+    prune: bool = typer.Option(True, "--prune/--no-prune", help="Remover recursos não usados pelas páginas"),
+    memory_limit: Optional[float] = typer.Option(
+        None, help="Processar em janelas com este limite de memória (MB); para documentos enormes"
+    ),
+    linearize: bool = typer.Option(False, "--linearize", is_flag=True, help="Salvar linearizado (fast web view)"),
 ):
-    delete_pages(input, output, pages)
+    report = delete_pages(_input(input), _output(output), _page_set(pages), prune, memory_limit_mb=memory_limit, linearize=linearize)
     print(f"[green]Páginas excluídas em[/green] {output}")
+    if isinstance(report, WindowReport):
+        _print_window_report(report)
+    else:
+        _print_resource_reports([report])
+
+
+@app.command()
+def prune(
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    output: str = typer.Option(..., help="PDF de saída (- para stdout)"),
+    linearize: bool = typer.Option(False, "--linearize", is_flag=True, help="Salvar linearizado (fast web view)"),
+):
+    """Remover de cada página fontes, imagens e outros recursos que ela não usa."""
+    report = prune_resources(_input(input), _output(output), linearize)
+    print(f"[green]Recursos não usados removidos em[/green] {output}")
+    _print_resource_reports([report])
 
 
 @app.command()
 def reorder_pages_cmd(
-    input: str = typer.Option(..., help="PDF de entrada"),
-    output: str = typer.Option(..., help="PDF de saída"),
-    order: List[int] = typer.Argument(..., help="Nova ordem das páginas (1-based), ex: 3 1 2"),
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    output: str = typer.Option(..., help="PDF de saída (- para stdout)"),
+    order: List[str] = typer.Argument(..., help="Nova ordem das páginas (1-based), ex: 3 1 2 ou 10-1"),
+    memory_limit: Optional[float] = typer.Option(
+        None, help="Processar em janelas com este limite de memória (MB); para documentos enormes"
+    ),
+    linearize: bool = typer.Option(False, "--linearize", is_flag=True, help="Salvar linearizado (fast web view)"),
 ):
-    reorder_pages(input, output, order)
+    report = reorder_pages(_input(input), _output(output), _page_set(order), memory_limit_mb=memory_limit, linearize=linearize)
     print(f"[green]Páginas reordenadas em[/green] {output}")
+    _print_window_report(report)
 
 
 @app.command()
 def insert_blank_page_cmd(
-    input: str = typer.Option(..., help="PDF de entrada"),
-    output: str = typer.Option(..., help="PDF de saída"),
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    output: str = typer.Option(..., help="PDF de saída (- para stdout)"),
     page_num: int = typer.Option(..., help="Número da página antes da qual a página em branco será inserida (1-based)"),
     width: float = typer.Option(letter[0], help="Largura da página em branco (pt)"),
     height: float = typer.Option(letter[1], help="Altura da página em branco (pt)"),
+    memory_limit: Optional[float] = typer.Option(
+        None, help="Processar em janelas com este limite de memória (MB); para documentos enormes"
+    ),
+    linearize: bool = typer.Option(False, "--linearize", is_flag=True, help="Salvar linearizado (fast web view)"),
 ):
-    insert_blank_page(input, output, page_num, width, height)
+    report = insert_blank_page(_input(input), _output(output), page_num, width, height, memory_limit_mb=memory_limit, linearize=linearize)
     print(f"[green]Página em branco inserida em[/green] {output}")
+    _print_window_report(report)
+
+
+@app.command()
+def impose(
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    output: str = typer.Option(..., help="PDF de saída (- para stdout)"),
+    layout: str = typer.Option("2up", help="Imposição: 2up, 4up ou booklet (livreto dobrado ao meio)"),
+    columns: Optional[int] = typer.Option(None, help="Colunas por folha (substitui as do layout)"),
+    rows: Optional[int] = typer.Option(None, help="Linhas por folha (substitui as do layout)"),
+    sheet_width: Optional[float] = typer.Option(None, help="Largura da folha (pt); padrão: a grade de páginas"),
+    sheet_height: Optional[float] = typer.Option(None, help="Altura da folha (pt); padrão: a grade de páginas"),
+    margin: float = typer.Option(0, help="Margem da folha (pt)"),
+    pages: Optional[List[str]] = typer.Argument(None, help="Páginas (1-based), ex: 1 3-5 10-. Se omitido, todas."),
+    linearize: bool = typer.Option(False, "--linearize", is_flag=True, help="Salvar linearizado (fast web view)"),
+):
+    """Montar várias páginas por folha (n-up) ou um livreto, sem rasterizar o conteúdo."""
+    if (sheet_width is None) != (sheet_height is None):
+        print("[red]Informe --sheet-width e --sheet-height juntos[/red]")
+        raise typer.Exit(1)
+    sheet_size = (sheet_width, sheet_height) if sheet_width is not None else None
+    sheets = impose_pdf(_input(input), _output(output), layout, _page_set(pages), columns, rows, sheet_size, margin, linearize=linearize)
+    print(f"[green]{sheets} folha(s) montada(s) em[/green] {output}")
+
+
+@app.command()
+def linearize(
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    output: str = typer.Option(..., help="PDF linearizado de saída (- para stdout)"),
+):
+    """Linearizar (fast web view) e comparar os bytes necessários para exibir a 1ª página."""
+    source = _input(input)
+    # Para stdout, o resultado fica em memória até ser validado.
+    target = BytesIO() if output == STDIO else output
+    linearize_pdf(source, target)
+    if not check_linearization(target):
+        print(f"[red]Falha na validação da linearização de[/red] {output}")
+        raise typer.Exit(1)
+    before = first_page_bytes(source)
+    after = first_page_bytes(target)
+    if output == STDIO:
+        size = len(target.getvalue())
+        _output(output).write(target.getvalue())
+        sys.stdout.buffer.flush()
+    else:
+        size = os.path.getsize(output)
+    print(f"[green]PDF linearizado e validado em[/green] {output}")
+    print(
+        f"Bytes até a 1ª página: original {before / 1024:.1f} KiB -> linearizado {after / 1024:.1f} KiB"
+        f" ({size / 1024:.1f} KiB no total)"
+    )
+
+
+@app.command()
+def render(
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    output_dir: str = typer.Option("output", help="Diretório de saída"),
+    ranges: Optional[str] = typer.Option(None, help="Intervalos, ex: \"1-3,5\". Se omitido, todas."),
+    dpi: int = typer.Option(150, help="Resolução (DPI)"),
+    format: str = typer.Option("png", help="Formato da imagem: png, jpeg ou webp"),
+    colorspace: str = typer.Option("rgb", help="Espaço de cor: rgb, gray ou cmyk (cmyk apenas JPEG)"),
+    alpha: bool = typer.Option(False, "--alpha", is_flag=True, help="Incluir canal alfa (png/webp)"),
+    quality: int = typer.Option(85, help="Qualidade JPEG/WebP (1-100)"),
+    workers: Optional[int] = typer.Option(None, help="Número de processos (padrão: núcleos da CPU)"),
+):
+    written = render_pages(_input(input), output_dir, ranges, dpi, format, colorspace, alpha, quality, workers)
+    print(f"[green]{len(written)} página(s) renderizada(s) em[/green] {output_dir}")
+
+
+@app.command()
+def extract_images_cmd(
+    input: str = typer.Option(..., help="PDF de entrada (- para stdin)"),
+    output_dir: str = typer.Option("images", help="Diretório de saída"),
+    pages: Optional[List[str]] = typer.Argument(None, help="Páginas (1-based), ex: 1 3-5 10-. Se omitido, todas."),
+    workers: Optional[int] = typer.Option(None, help="Número de processos (padrão: núcleos da CPU)"),
+    manifest: Optional[str] = typer.Option(None, help="Manifesto JSONL (imagem, páginas, formato), gravado à medida que avança"),
+):
+    """Extrair as imagens embutidas no formato original (JPEG, JPEG 2000, JBIG2, CCITT), sem recodificar."""
+    report = extract_images(_input(input), output_dir, _page_set(pages), workers, manifest)
+    native = sum(img.passthrough for img in report.images)
+    print(f"[green]{report.files_written} imagem(ns) extraída(s) em[/green] {output_dir}")
+    print(
+        f"{report.references} uso(s) em {report.pages_scanned} página(s), {len(report.images)} objeto(s) distinto(s), "
+        f"{report.duplicates} com conteúdo repetido; {native} no formato original, "
+        f"{len(report.images) - native} convertido(s) para PNG ({report.bytes_written / 1024:.1f} KiB)"
+    )
+
+
+@app.command("images-to-pdf")
+def images_to_pdf_cmd(
+    images: Optional[List[str]] = typer.Argument(None, help="Imagens ou padrões, ex: \"scans/**/*.jpg\" (uma página por imagem, nesta ordem)"),
+    file_list: Optional[str] = typer.Option(None, help="Arquivo com um caminho de imagem por linha (- para stdin)"),
+    output: str = typer.Option(..., help="PDF de saída (- para stdout; com --pages-per-file, vira nome-0001.pdf, ...)"),
+    dpi: Optional[float] = typer.Option(None, help="Resolução para o tamanho da página (padrão: a da imagem, ou 72)"),
+    pages_per_file: Optional[int] = typer.Option(None, help="Dividir a saída em arquivos com até N páginas"),
+    workers: Optional[int] = typer.Option(None, help="Número de processos (padrão: núcleos da CPU)"),
+    linearize: bool = typer.Option(False, "--linearize", is_flag=True, help="Salvar linearizado (fast web view)"),
+):
+    """Converter imagens em PDF, uma por página; JPEGs são embutidos sem recodificar."""
+    inputs = expand_inputs(images or [], file_list)
+    if not inputs:
+        print("[yellow]Nenhuma imagem encontrada.[/yellow]")
+        raise typer.Exit(1)
+    report = images_to_pdf(inputs, _output(output), dpi, pages_per_file, workers, linearize)
+    print(f"[green]{report.pages} página(s) em {len(report.outputs)} arquivo(s):[/green] {', '.join(report.outputs)}")
+    print(
+        f"{report.passthrough} imagem(ns) no formato original, {report.pages - report.passthrough} convertida(s)"
+        f" | {report.bytes_written / 1024:.1f} KiB gravados"
+    )
+
+
+@app.command()
+def watch(
+    input_dir: str = typer.Option(..., help="Pasta monitorada (entrada)"),
+    output_dir: str = typer.Option(..., help="Pasta para os PDFs processados"),
+    error_dir: str = typer.Option(..., help="Pasta para os PDFs com falha"),
+    config: Optional[str] = typer.Option(None, help="JSON com os passos, ex: [{\"op\": \"rotate_pages\", \"degrees\": 90}]"),
+    workers: int = typer.Option(2, help="Processos de trabalho"),
+    interval: float = typer.Option(2.0, help="Intervalo de varredura (s)"),
+    archive_dir: Optional[str] = typer.Option(None, help="Mover originais processados para cá (padrão: apagar)"),
+    stats_file: Optional[str] = typer.Option(None, help="Arquivo JSON com contadores (fila, latência)"),
+    once: bool = typer.Option(False, "--once", is_flag=True, help="Processar o que já existe e sair"),
+):
+    """Monitorar uma pasta e processar os PDFs que chegarem."""
+    folder = HotFolder(input_dir, output_dir, error_dir, load_steps(config), workers, interval, archive_dir, stats_file)
+    last = {}
+
+    def report(stats):
+        current = stats.as_dict()
+        if current != last:
+            last.update(current)
+            print(
+                f"fila={current['queue_depth']} em_andamento={current['in_flight']} "
+                f"ok={current['processed']} falhas={current['failed']} duplicados={current['duplicates']} "
+                f"sumiram={current['vanished']} latência média={current['avg_latency']:.2f}s"
+            )
+
+    print(f"[green]Monitorando[/green] {input_dir}")
+    try:
+        folder.run(once=once, on_poll=report)
+    except KeyboardInterrupt:
+        print("[yellow]Encerrado.[/yellow]")
+
+
+@app.command(context_settings={"allow_extra_args": True, "ignore_unknown_options": True})
+def batch(
+    ctx: typer.Context,
+    command: str = typer.Argument(..., help="Comando a executar em cada arquivo (ex: rotate, flatten, extract-text)"),
+    glob: Optional[List[str]] = typer.Option(None, "--glob", help="Padrão de arquivos, ex: \"scans/**/*.pdf\" (repetível)"),
+    file_list: Optional[str] = typer.Option(None, help="Arquivo com um caminho de PDF por linha (- para stdin)"),
+    output_dir: str = typer.Option(..., help="Diretório de saída (espelha a estrutura das entradas)"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", help="Processos paralelos (padrão: núcleos da CPU)"),
+    journal: Optional[str] = typer.Option(None, help="Diário de checkpoint (padrão: <output-dir>/.pdf_writer_batch.jsonl)"),
+):
+    """Executar um comando em muitos PDFs, com retomada. Opções extras vão para o comando.
+
+    Ex: batch rotate --glob "in/*.pdf" --output-dir out -j 8 --degrees 90
+    """
+    inputs = expand_inputs(glob or [], file_list)
+    if not inputs:
+        print("[yellow]Nenhum arquivo de entrada encontrado.[/yellow]")
+        raise typer.Exit(1)
+    result = run_batch(command, inputs, output_dir, ctx.args, jobs, journal)
+    print(
+        f"[green]Lote concluído:[/green] {result.ok} ok, {result.failed} falha(s), "
+        f"{result.skipped} já concluído(s) | {result.pages} páginas em {result.seconds:.1f}s"
+    )
+    if result.failed:
+        raise typer.Exit(1)
 
 
 @app.command()
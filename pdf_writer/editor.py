@@ -1,7 +1,20 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
 from io import BytesIO
-from typing import Iterable, List, Optional, Sequence
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
@@ -11,8 +24,25 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from PIL import Image
 from pypdf import PdfReader, PdfWriter
+from pypdf.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    FloatObject,
+    IndirectObject,
+    NameObject,
+    NumberObject,
+    StreamObject,
+)
 import fitz  # PyMuPDF
 
+from .cache import _open_fitz, document_cache
+from .pages import PageSet
+from .progress import CancelToken, OperationCancelled, Output, ProgressCallback, Tracker, atomic_output, is_stream, output_file
+from .windowed import BLANK, WindowReport, _StreamingWriter, write_windowed
+
+PageSpec = Union[PageSet, str, Iterable[int], None]
+
 
 def _make_overlay_for_page(page_width: float, page_height: float, draw_fn) -> BytesIO:
     buf = BytesIO()
@@ -23,14 +53,100 @@ def _make_overlay_for_page(page_width: float, page_height: float, draw_fn) -> By
     return buf
 
 
+def _save_linearized(buf: BytesIO, output_pdf):
+    import pikepdf  # qpdf does the linearization; only loaded when asked for
+
+    buf.seek(0)
+    with pikepdf.open(buf) as pdf:
+        pdf.save(output_pdf, linearize=True)
+
+
+def _write_pdf(writer: PdfWriter, output_pdf: Output, linearize: bool = False, task: Optional[Tracker] = None) -> int:
+    # Every file output goes through a temp file in the target directory and
+    # is renamed into place, so a failed or cancelled job leaves nothing
+    # behind. Streams (stdout) are written directly. Returns the output size.
+    task = task or Tracker()
+    task.check()
+    with output_file(output_pdf) as f:
+        if not linearize:
+            writer.write(task.file(f))
+        else:
+            buf = BytesIO()
+            writer.write(task.file(buf))
+            _save_linearized(buf, f)
+        size = f.tell()
+    task.finish()
+    return size
+
+
+def _save_doc(doc, output_pdf: Output, linearize: bool = False, task: Optional[Tracker] = None, **options):
+    task = task or Tracker()
+    task.check()
+    if is_stream(output_pdf):
+        # PyMuPDF only saves to real files; serialize in memory instead.
+        with output_file(output_pdf) as f:
+            if not linearize:
+                f.write(doc.tobytes(**options))
+            else:
+                _save_linearized(BytesIO(doc.tobytes(**options)), f)
+            task.wrote(f.tell())
+        task.finish()
+        return
+    with atomic_output(output_pdf) as tmp:
+        if not linearize:
+            doc.save(tmp, **options)
+        else:
+            _save_linearized(BytesIO(doc.tobytes(**options)), tmp)
+    task.wrote(os.path.getsize(output_pdf))
+    task.finish()
+
+
+def _register_font(font_name: str) -> str:
+    # Optionally register custom TTF font if font_name points to a .ttf file
+    if font_name.lower().endswith(".ttf"):
+        reg_name = "CustomFont"
+        pdfmetrics.registerFont(TTFont(reg_name, font_name))
+        return reg_name
+    return font_name
+
+
 def _merge_overlay(reader: PdfReader, writer: PdfWriter, overlays_per_page: dict[int, BytesIO]):
+    # Merge into the writer's copy: the reader may be shared through the document cache.
     for i, page in enumerate(reader.pages):
-        page = page
+        page = writer.add_page(page)
         if i in overlays_per_page:
             overlay_reader = PdfReader(overlays_per_page[i])
             overlay_page = overlay_reader.pages[0]
             page.merge_page(overlay_page)
-        writer.add_page(page)
+
+
+# "overlay": pypdf path (text is drawn by reportlab on an overlay page and
+# merged; images are appended as XObjects). "direct": PyMuPDF draws straight
+# into the page content stream, with no serialize/parse round-trip.
+_OVERLAY_ENGINES = ("overlay", "direct")
+
+
+def _check_engine(engine: str):
+    if engine not in _OVERLAY_ENGINES:
+        raise ValueError(f"Engine inválida: {engine}")
+
+
+def _draw_direct(page, draw):
+    # PyMuPDF's placement on rotated pages ignores the mediabox origin, so
+    # draw with /Rotate cleared: the transformation matrix then maps user
+    # space exactly like the overlay engine does.
+    rotation = page.rotation
+    page.set_rotation(0)
+    try:
+        return draw(page, page.transformation_matrix)
+    finally:
+        page.set_rotation(rotation)
+
+
+def _fitz_font(font_name: str) -> dict:
+    if font_name.lower().endswith(".ttf"):
+        return {"fontname": "PdfWriterFont", "fontfile": font_name}
+    return {"fontname": font_name}  # base-14 names are the same as reportlab's
 
 
 def write_text(
@@ -43,21 +159,32 @@ def write_text(
     font_name: str = "Helvetica",
     font_size: int = 12,
     color: str = "black",
+    engine: str = "overlay",
+    linearize: bool = False,
 ):
-    reader = PdfReader(input_pdf)
+    _check_engine(engine)
     page_index = max(0, page - 1)
+    if engine == "direct":
+        doc = document_cache.take_document(input_pdf)
+
+        def draw(page_obj, m):
+            page_obj.insert_text(
+                fitz.Point(x, y) * m, text, fontsize=font_size,
+                color=getattr(colors, color, colors.black).rgb(), **_fitz_font(font_name),
+            )
+
+        _draw_direct(doc[page_index], draw)
+        _save_doc(doc, output_pdf, linearize, deflate=True)
+        doc.close()
+        return
+
+    reader = document_cache.reader(input_pdf)
     page_obj = reader.pages[page_index]
     w = float(page_obj.mediabox.width)
     h = float(page_obj.mediabox.height)
 
     def draw(c: canvas.Canvas, pw, ph):
-        # Optionally register custom TTF font if font_name points to a .ttf file
-        if font_name.lower().endswith(".ttf"):
-            reg_name = "CustomFont"
-            pdfmetrics.registerFont(TTFont(reg_name, font_name))
-            use_font = reg_name
-        else:
-            use_font = font_name
+        use_font = _register_font(font_name)
         c.setFillColor(getattr(colors, color, colors.black))
         c.setFont(use_font, font_size)
         c.drawString(x, y, text)
@@ -65,45 +192,219 @@ def write_text(
     overlay = _make_overlay_for_page(w, h, draw)
     writer = PdfWriter()
     _merge_overlay(reader, writer, {page_index: overlay})
-    with open(output_pdf, "wb") as f:
-        writer.write(f)
+    _write_pdf(writer, output_pdf, linearize)
 
 
-def add_image(
-    input_pdf: str,
-    output_pdf: str,
-    image_path: str,
-    x: float,
-    y: float,
-    width: Optional[float] = None,
-    height: Optional[float] = None,
-    page: int = 1,
-):
-    reader = PdfReader(input_pdf)
-    page_index = max(0, page - 1)
-    page_obj = reader.pages[page_index]
-    w = float(page_obj.mediabox.width)
-    h = float(page_obj.mediabox.height)
+@dataclass
+class ImageReport:
+    source_bytes: int
+    embedded_bytes: int
+    passthrough: bool
+    source_size: Tuple[int, int]
+    embedded_size: Tuple[int, int]
 
-    img = Image.open(image_path)
-    iw, ih = img.size
+    @property
+    def bytes_saved(self) -> int:
+        return self.source_bytes - self.embedded_bytes
+
+
+_IMAGE_COLORSPACES = {"L": "/DeviceGray", "RGB": "/DeviceRGB", "CMYK": "/DeviceCMYK"}
+_PASSTHROUGH_FILTERS = {"JPEG": "/DCTDecode", "JPEG2000": "/JPXDecode"}
+
+
+def _image_stream(data: bytes, filter_name: str, size: Tuple[int, int], mode: str, invert: bool = False) -> StreamObject:
+    stream = StreamObject()
+    stream.set_data(data)
+    stream.update({
+        NameObject("/Type"): NameObject("/XObject"),
+        NameObject("/Subtype"): NameObject("/Image"),
+        NameObject("/Width"): NumberObject(size[0]),
+        NameObject("/Height"): NumberObject(size[1]),
+        NameObject("/ColorSpace"): NameObject(_IMAGE_COLORSPACES[mode]),
+        NameObject("/BitsPerComponent"): NumberObject(8),
+        NameObject("/Filter"): NameObject(filter_name),
+    })
+    if invert:
+        # Adobe CMYK JPEGs are stored inverted
+        stream[NameObject("/Decode")] = ArrayObject([NumberObject(1), NumberObject(0)] * 4)
+    return stream
+
+
+def _placed_size(iw: int, ih: int, width: Optional[float], height: Optional[float]) -> Tuple[float, float]:
     if width is None and height is None:
         # default: scale to 2 inches width
         width = 2 * inch
+    if height is None:
         height = (width / iw) * ih
-    elif width is not None and height is None:
-        height = (width / iw) * ih
-    elif height is not None and width is None:
+    elif width is None:
         width = (height / ih) * iw
+    return width, height
 
-    def draw(c: canvas.Canvas, pw, ph):
-        c.drawImage(image_path, x, y, width=width, height=height, mask='auto')
 
-    overlay = _make_overlay_for_page(w, h, draw)
+def _target_pixels(iw: int, ih: int, width: float, height: float, dpi: Optional[float]) -> Optional[Tuple[int, int]]:
+    # Only resample when the image has more pixels than the placed size
+    # needs at the target resolution.
+    if dpi:
+        tw = max(1, round(width / 72 * dpi))
+        th = max(1, round(height / 72 * dpi))
+        if tw < iw and th < ih:
+            return tw, th
+    return None
+
+
+def _image_payload(
+    img: Image.Image, image_path: str, target: Optional[Tuple[int, int]], jpeg_quality: int
+) -> Tuple[StreamObject, Optional[StreamObject], bool]:
+    # Image XObject (plus its soft mask, not yet attached) for an open image.
+    if img.format in _PASSTHROUGH_FILTERS and target is None and img.mode in _IMAGE_COLORSPACES:
+        # DCT/JPX passthrough: embed the file bytes untouched
+        with open(image_path, "rb") as f:
+            data = f.read()
+        invert = img.mode == "CMYK" and "adobe" in img.info
+        return _image_stream(data, _PASSTHROUGH_FILTERS[img.format], img.size, img.mode, invert), None, True
+
+    is_jpeg = img.format in _PASSTHROUGH_FILTERS
+    if img.format == "JPEG" and target:
+        img.draft(img.mode, target)  # let libjpeg decode at a reduced scale
+    if img.mode == "P":
+        img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+    elif img.mode not in ("L", "LA", "RGB", "RGBA", "CMYK"):
+        img = img.convert("RGBA" if "A" in img.getbands() else "L" if img.mode in ("1", "I", "I;16", "F") else "RGB")
+    alpha = None
+    if img.mode in ("RGBA", "LA"):
+        alpha = img.getchannel("A")
+        img = img.convert("RGB" if img.mode == "RGBA" else "L")
+        if alpha.getextrema() == (255, 255):
+            alpha = None
+    if target:
+        img = img.resize(target, Image.LANCZOS)
+        if alpha is not None:
+            alpha = alpha.resize(target, Image.LANCZOS)
+    if is_jpeg:
+        buf = BytesIO()
+        img.save(buf, "JPEG", quality=jpeg_quality)
+        stream = _image_stream(buf.getvalue(), "/DCTDecode", img.size, img.mode)
+    else:
+        stream = _image_stream(zlib.compress(img.tobytes()), "/FlateDecode", img.size, img.mode)
+    smask = None
+    if alpha is not None:
+        smask = _image_stream(zlib.compress(alpha.tobytes()), "/FlateDecode", alpha.size, "L")
+    return stream, smask, False
+
+
+def _draw_image(
+    writer: PdfWriter,
+    page,
+    image_path: str,
+    x: float,
+    y: float,
+    width: Optional[float],
+    height: Optional[float],
+    dpi: Optional[float] = None,
+    jpeg_quality: int = 85,
+) -> ImageReport:
+    source_bytes = os.path.getsize(image_path)
+    with Image.open(image_path) as img:
+        iw, ih = img.size
+        width, height = _placed_size(iw, ih, width, height)
+        target = _target_pixels(iw, ih, width, height, dpi)
+        stream, smask, passthrough = _image_payload(img, image_path, target, jpeg_quality)
+
+    embedded = len(stream._data)
+    if smask is not None:
+        stream[NameObject("/SMask")] = writer._add_object(smask)
+        embedded += len(smask._data)
+    report = ImageReport(source_bytes, embedded, passthrough, (iw, ih), (int(stream["/Width"]), int(stream["/Height"])))
+
+    ref = writer._add_object(stream)
+    n = 0
+    resources = page.get("/Resources")
+    xobjects = resources.get_object().get("/XObject") if resources is not None else None
+    while xobjects is not None and f"/PdfWriterImg{n}" in xobjects.get_object():
+        n += 1
+    name = NameObject(f"/PdfWriterImg{n}")
+    invoke = f"Q q {width:g} 0 0 {height:g} {x:g} {y:g} cm {name} Do Q\n".encode()
+    _attach_xobject(page, name, ref, [_raw_stream(writer, b"q\n")], [_raw_stream(writer, invoke)])
+    return report
+
+
+def _draw_image_direct(
+    page,
+    image_path: str,
+    x: float,
+    y: float,
+    width: Optional[float],
+    height: Optional[float],
+    dpi: Optional[float] = None,
+    jpeg_quality: int = 85,
+) -> ImageReport:
+    source_bytes = os.path.getsize(image_path)
+    source = {"filename": image_path}  # PyMuPDF embeds JPEG files as-is
+    with Image.open(image_path) as img:
+        iw, ih = img.size
+        width, height = _placed_size(iw, ih, width, height)
+        target = _target_pixels(iw, ih, width, height, dpi)
+        if target:
+            is_jpeg = img.format == "JPEG" and img.mode in _IMAGE_COLORSPACES
+            if is_jpeg:
+                img.draft(img.mode, target)
+            elif img.mode not in ("L", "LA", "RGB", "RGBA"):
+                img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+            buf = BytesIO()
+            if is_jpeg:
+                img.resize(target, Image.LANCZOS).save(buf, "JPEG", quality=jpeg_quality)
+            else:
+                img.resize(target, Image.LANCZOS).save(buf, "PNG")
+            source = {"stream": buf.getvalue()}
+
+    def draw(page_obj, m):
+        rect = fitz.Rect(x, y, x + width, y + height) * m
+        return page_obj.insert_image(rect, keep_proportion=False, **source)
+
+    xref = _draw_direct(page, draw)
+    doc = page.parent
+    embedded = len(doc.xref_stream_raw(xref))
+    kind, smask = doc.xref_get_key(xref, "SMask")
+    if kind == "xref":
+        embedded += len(doc.xref_stream_raw(int(smask.split()[0])))
+    passthrough = target is None and doc.xref_get_key(xref, "Filter")[1] in _PASSTHROUGH_FILTERS.values()
+    size = (int(doc.xref_get_key(xref, "Width")[1]), int(doc.xref_get_key(xref, "Height")[1]))
+    return ImageReport(source_bytes, embedded, passthrough, (iw, ih), size)
+
+
+def _page_writer(reader: PdfReader) -> PdfWriter:
     writer = PdfWriter()
-    _merge_overlay(reader, writer, {page_index: overlay})
-    with open(output_pdf, "wb") as f:
-        writer.write(f)
+    for page in reader.pages:
+        writer.add_page(page)
+    return writer
+
+
+def add_image(
+    input_pdf: str,
+    output_pdf: str,
+    image_path: str,
+    x: float,
+    y: float,
+    width: Optional[float] = None,
+    height: Optional[float] = None,
+    page: int = 1,
+    dpi: Optional[float] = None,
+    jpeg_quality: int = 85,
+    engine: str = "overlay",
+    linearize: bool = False,
+) -> ImageReport:
+    _check_engine(engine)
+    if engine == "direct":
+        doc = document_cache.take_document(input_pdf)
+        report = _draw_image_direct(doc[max(0, page - 1)], image_path, x, y, width, height, dpi, jpeg_quality)
+        _save_doc(doc, output_pdf, linearize, deflate=True)
+        doc.close()
+        return report
+    writer = _page_writer(document_cache.reader(input_pdf))
+    page_obj = writer.pages[max(0, page - 1)]
+    report = _draw_image(writer, page_obj, image_path, x, y, width, height, dpi, jpeg_quality)
+    _write_pdf(writer, output_pdf, linearize)
+    return report
 
 
 def sign_pdf(
@@ -114,124 +415,807 @@ def sign_pdf(
     margin_x: float = 36,
     margin_y: float = 36,
     width: float = 2.5 * inch,
-):
-    reader = PdfReader(input_pdf)
+    dpi: Optional[float] = None,
+    jpeg_quality: int = 85,
+    engine: str = "overlay",
+    linearize: bool = False,
+) -> ImageReport:
+    _check_engine(engine)
+    if engine == "direct":
+        doc = document_cache.take_document(input_pdf)
+        page_obj = doc[-1 if page == -1 else max(0, page - 1)]
+        x = page_obj.mediabox.width - margin_x - width
+        report = _draw_image_direct(page_obj, image_path, x, margin_y, width, None, dpi, jpeg_quality)
+        _save_doc(doc, output_pdf, linearize, deflate=True)
+        doc.close()
+        return report
+    writer = _page_writer(document_cache.reader(input_pdf))
     if page == -1:
-        page_index = len(reader.pages) - 1
+        page_index = len(writer.pages) - 1
     else:
         page_index = max(0, page - 1)
-    page_obj = reader.pages[page_index]
+    page_obj = writer.pages[page_index]
     w = float(page_obj.mediabox.width)
-    h = float(page_obj.mediabox.height)
 
-    img = Image.open(image_path)
-    iw, ih = img.size
-    height = (width / iw) * ih
     x = w - margin_x - width
     y = margin_y
+    report = _draw_image(writer, page_obj, image_path, x, y, width, None, dpi, jpeg_quality)
+    _write_pdf(writer, output_pdf, linearize)
+    return report
+
+
+_STAMP_POSITIONS = ("center", "top", "bottom", "top-left", "top-right", "bottom-left", "bottom-right")
+
+
+def _stamp_center(position: str, pw: float, ph: float, sw: float, sh: float, margin: float) -> Tuple[float, float]:
+    if position not in _STAMP_POSITIONS:
+        raise ValueError(f"Posição inválida: {position}")
+    cx, cy = pw / 2, ph / 2
+    if position.startswith("top"):
+        cy = ph - margin - sh / 2
+    elif position.startswith("bottom"):
+        cy = margin + sh / 2
+    if position.endswith("left"):
+        cx = margin + sw / 2
+    elif position.endswith("right"):
+        cx = pw - margin - sw / 2
+    return cx, cy
+
+
+def _overlay_as_form(overlay: BytesIO, writer: PdfWriter) -> IndirectObject:
+    # Turn the single page of a reportlab overlay into a Form XObject owned by writer.
+    overlay_page = PdfReader(overlay).pages[0]
+    form = DecodedStreamObject()
+    form.set_data(overlay_page.get_contents().get_data())
+    form.update({
+        NameObject("/Type"): NameObject("/XObject"),
+        NameObject("/Subtype"): NameObject("/Form"),
+        NameObject("/BBox"): ArrayObject(FloatObject(v) for v in overlay_page.mediabox),
+        NameObject("/Resources"): overlay_page["/Resources"].get_object().clone(writer),
+    })
+    return writer._add_object(form.flate_encode())
+
+
+def _raw_stream(writer: PdfWriter, data: bytes) -> IndirectObject:
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    return writer._add_object(stream)
+
+
+def _attach_xobject(page, name: NameObject, ref: IndirectObject, before: list, after: list):
+    # Register ref under name in the page resources and surround the existing
+    # content with the given (possibly shared) content streams.
+    if "/Resources" not in page:
+        page[NameObject("/Resources")] = DictionaryObject()
+    resources = page["/Resources"].get_object()
+    if "/XObject" not in resources:
+        resources[NameObject("/XObject")] = DictionaryObject()
+    resources["/XObject"].get_object()[name] = ref
+
+    contents = page.get("/Contents")
+    if contents is None:
+        existing = []
+    elif isinstance(contents.get_object(), ArrayObject):
+        existing = list(contents.get_object())
+    else:
+        existing = [contents]
+    page[NameObject("/Contents")] = ArrayObject(before + existing + after)
+
+
+def stamp_pdf(
+    input_pdf: str,
+    output_pdf: str,
+    text: Optional[str] = None,
+    image_path: Optional[str] = None,
+    pages: PageSpec = None,
+    position: str = "center",
+    x: Optional[float] = None,
+    y: Optional[float] = None,
+    margin: float = 36,
+    font_name: str = "Helvetica",
+    font_size: int = 48,
+    color: str = "gray",
+    image_width: Optional[float] = None,
+    opacity: float = 0.3,
+    rotation: float = 0,
+    under: bool = False,
+    linearize: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> int:
+    if (text is None) == (image_path is None):
+        raise ValueError("Informe exatamente um entre texto e imagem")
+
+    if text is not None:
+        use_font = _register_font(font_name)
+        sw = pdfmetrics.stringWidth(text, use_font, font_size)
+        sh = float(font_size)
+    else:
+        with Image.open(image_path) as img:
+            iw, ih = img.size
+        sw = image_width or 2 * inch
+        sh = (sw / iw) * ih
 
     def draw(c: canvas.Canvas, pw, ph):
-        c.drawImage(image_path, x, y, width=width, height=height, mask='auto')
+        if x is not None and y is not None:
+            cx, cy = x + sw / 2, y + sh / 2
+        else:
+            cx, cy = _stamp_center(position, pw, ph, sw, sh, margin)
+        c.translate(cx, cy)
+        c.rotate(rotation)
+        c.setFillAlpha(opacity)
+        c.setStrokeAlpha(opacity)
+        if text is not None:
+            c.setFillColor(getattr(colors, color, colors.black))
+            c.setFont(use_font, font_size)
+            # baseline so the cap height is roughly centred on the anchor
+            c.drawCentredString(0, -sh * 0.35, text)
+        else:
+            c.drawImage(image_path, -sw / 2, -sh / 2, width=sw, height=sh, mask="auto")
 
-    overlay = _make_overlay_for_page(w, h, draw)
+    reader = document_cache.reader(input_pdf)
     writer = PdfWriter()
-    _merge_overlay(reader, writer, {page_index: overlay})
-    with open(output_pdf, "wb") as f:
-        writer.write(f)
+    for page in reader.pages:
+        writer.add_page(page)
+    selected = list(PageSet.coerce(pages or None).indices(len(writer.pages), unique=True))
+    task = Tracker(progress, cancel, len(selected))
+
+    # One Form XObject per page size (and one invoking stream per media box,
+    # which moves it to the box origin); every selected page only gains
+    # references to them.
+    forms: Dict[Tuple[float, float], Tuple[NameObject, IndirectObject]] = {}
+    invokes: Dict[Tuple[float, float, float, float], Tuple[List[IndirectObject], List[IndirectObject]]] = {}
+    open_q = _raw_stream(writer, b"q\n")
+    # A form name is shared by many pages, so it must be free on all of them
+    # (an earlier stamp may already use /PdfWriterStamp0).
+    taken = set()
+    for i in selected:
+        resources = writer.pages[i].get("/Resources")
+        xobjects = resources.get_object().get("/XObject") if resources is not None else None
+        if xobjects is not None:
+            taken.update(xobjects.get_object().keys())
+    n = 0
+    for i in selected:
+        page = writer.pages[i]
+        x0, y0, x1, y1 = (float(v) for v in page.mediabox)
+        size = (x1 - x0, y1 - y0)
+        if size not in forms:
+            while f"/PdfWriterStamp{n}" in taken:
+                n += 1
+            name = NameObject(f"/PdfWriterStamp{n}")
+            taken.add(name)
+            forms[size] = (name, _overlay_as_form(_make_overlay_for_page(*size, draw), writer))
+        name, form = forms[size]
+        box = (x0, y0, x1, y1)
+        if box not in invokes:
+            invoke = f"q 1 0 0 1 {x0:g} {y0:g} cm {name} Do Q\n".encode()
+            if under:
+                invokes[box] = ([_raw_stream(writer, invoke)], [])
+            else:
+                invokes[box] = ([open_q], [_raw_stream(writer, b"Q\n" + invoke)])
+        before, after = invokes[box]
+
+        _attach_xobject(page, name, form, before, after)
+        task.step()
+
+    _write_pdf(writer, output_pdf, linearize, task)
+    return len(forms)
+
+
+def number_pages(
+    input_pdf: str,
+    output_pdf: str,
+    template: str = "{n}",
+    start: int = 1,
+    prefix: str = "",
+    digits: int = 0,
+    pages: PageSpec = None,
+    position: str = "bottom-right",
+    margin: float = 36,
+    font_name: str = "Helvetica",
+    font_size: int = 10,
+    color: str = "black",
+    linearize: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> int:
+    """Number pages in one pass; not windowed, so memory grows with the page count."""
+    # Template fields: {n} (prefix + zero-padded number), {page} and {total}.
+    # The overlay canvas and the PdfWriter both hold the whole document; split
+    # very large productions into volumes and number them with bates_number.
+    reader = document_cache.reader(input_pdf)
+    total = len(reader.pages)
+    use_font = _register_font(font_name)
+    labels: dict[int, str] = {}
+    number = start
+    for i in PageSet.coerce(pages or None).indices(total, unique=True):
+        labels[i] = template.format(n=f"{prefix}{number:0{digits}d}", page=i + 1, total=total)
+        number += 1
 
+    # All labels go into one multi-page reportlab canvas (one page per input
+    # page), which is then merged page-for-page in a single pass.
+    buf = BytesIO()
+    c = canvas.Canvas(buf)
+    for i, page in enumerate(reader.pages):
+        pw = float(page.mediabox.width)
+        ph = float(page.mediabox.height)
+        c.setPageSize((pw, ph))
+        if i in labels:
+            label = labels[i]
+            sw = pdfmetrics.stringWidth(label, use_font, font_size)
+            cx, cy = _stamp_center(position, pw, ph, sw, font_size, margin)
+            c.setFillColor(getattr(colors, color, colors.black))
+            c.setFont(use_font, font_size)
+            c.drawCentredString(cx, cy - font_size * 0.35, label)
+        c.showPage()
+    c.save()
+    buf.seek(0)
 
-def merge_pdfs(inputs: Sequence[str], output_pdf: str):
+    overlay_pages = PdfReader(buf).pages
     writer = PdfWriter()
+    task = Tracker(progress, cancel, total)
+    for i, page in enumerate(reader.pages):
+        page = writer.add_page(page)
+        if i in labels:
+            page.merge_translated_page(overlay_pages[i], float(page.mediabox.left), float(page.mediabox.bottom))
+        task.step()
+    _write_pdf(writer, output_pdf, linearize, task)
+    return number
+
+
+def bates_number(
+    input_pdfs: Sequence[str],
+    output_dir: str,
+    prefix: str = "",
+    start: int = 1,
+    digits: int = 6,
+    **options,
+) -> int:
+    # Numbering continues from one file to the next; returns the next free number.
+    # Outputs mirror the inputs' paths below their common directory (as batch
+    # does), so a/x.pdf and b/x.pdf cannot overwrite each other.
+    input_pdfs = list(input_pdfs)
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in input_pdfs]) if input_pdfs else output_dir
+    out_paths = [os.path.join(output_dir, os.path.relpath(os.path.abspath(p), root)) for p in input_pdfs]
+    repeated = sorted({p for p in out_paths if out_paths.count(p) > 1})
+    if repeated:
+        raise ValueError(f"Arquivos de entrada repetidos: {', '.join(repeated)}")
+    os.makedirs(output_dir, exist_ok=True)
+    number = start
+    for p, out_path in zip(input_pdfs, out_paths):
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        number = number_pages(p, out_path, start=number, prefix=prefix, digits=digits, **options)
+    return number
+
+
+@dataclass
+class MergeReport:
+    output: str
+    pages: int
+    pages_dropped: int
+    objects_shared: int
+    bytes_shared: int
+    output_bytes: int
+
+
+# idnum -> (digest, raw stream size); digest None means "never share"
+_DigestMemo = Dict[int, Tuple[Optional[bytes], int]]
+
+
+def _digest(obj, memo: _DigestMemo, active: set, reached: List[int]) -> Optional[bytes]:
+    # Structural hash of an object and everything it references. Streams are
+    # hashed on their raw (still encoded) bytes, so nothing gets decoded.
+    if isinstance(obj, IndirectObject):
+        idnum = obj.idnum
+        if idnum not in memo:
+            if idnum in active:
+                return None  # reference cycle
+            active.add(idnum)
+            target = obj.get_object()
+            digest = _digest(target, memo, active, reached)
+            active.discard(idnum)
+            size = len(target._data) if isinstance(target, StreamObject) else 0
+            memo[idnum] = (digest, size)
+        reached.append(idnum)
+        return memo[idnum][0]
+
+    h = hashlib.sha1()
+    if isinstance(obj, DictionaryObject):
+        # Page tree nodes and fields/annotations (/Parent) are document
+        # structure, not shareable content.
+        if obj.get("/Type") in ("/Page", "/Pages") or "/Parent" in obj:
+            return None
+        h.update(b"<<")
+        for key in sorted(obj.keys()):
+            if key == "/Length" and isinstance(obj, StreamObject):
+                continue
+            child = _digest(dict.__getitem__(obj, key), memo, active, reached)
+            if child is None:
+                return None
+            h.update(key.encode("utf-8", "surrogatepass"))
+            h.update(child)
+        if isinstance(obj, StreamObject):
+            h.update(b"stream")
+            h.update(obj._data)
+    elif isinstance(obj, ArrayObject):
+        h.update(b"[")
+        for item in list.__iter__(obj):
+            child = _digest(item, memo, active, reached)
+            if child is None:
+                return None
+            h.update(child)
+    else:
+        h.update(f"{type(obj).__name__}:{obj!r}".encode("utf-8", "surrogatepass"))
+    return h.digest()
+
+
+def _page_digest(page, memo: _DigestMemo, reached: List[int]) -> Optional[bytes]:
+    # Pages with annotations are never considered identical: their widgets
+    # and links point back at the page itself.
+    if "/Annots" in page:
+        for key in ("/Resources", "/Contents"):
+            if key in page:
+                _digest(dict.__getitem__(page, key), memo, set(), reached)
+        return None
+    h = hashlib.sha1(b"page")
+    for key in sorted(page.keys()):
+        if key in ("/Parent", "/StructParents"):
+            continue
+        child = _digest(dict.__getitem__(page, key), memo, set(), reached)
+        if child is None:
+            return None
+        h.update(key.encode("utf-8", "surrogatepass"))
+        h.update(child)
+    return h.digest()
+
+
+def merge_pdfs(
+    inputs: Sequence[str],
+    output_pdf: str,
+    dedupe: bool = False,
+    drop_duplicate_pages: bool = False,
+    linearize: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> MergeReport:
+    # total counts input files until each one is opened, then its pages
+    task = Tracker(progress, cancel, 0)
+    writer = PdfWriter()
+    report = MergeReport(output_pdf, 0, 0, 0, 0, 0)
+    dedupe = dedupe or drop_duplicate_pages
+    canonical: Dict[bytes, int] = {}  # digest -> object number in the writer
+    seen_pages: set = set()
     for p in inputs:
-        r = PdfReader(p)
+        r = document_cache.reader(p)
+        task.total += len(r.pages)
+        memo: _DigestMemo = {}
         for page in r.pages:
+            task.step()
+            if not dedupe:
+                writer.add_page(page)
+                continue
+            reached: List[int] = []
+            key = _page_digest(page, memo, reached)
+            if key is not None and key in seen_pages and drop_duplicate_pages:
+                report.pages_dropped += 1
+                continue
+            # Point pypdf's clone table at the copy already in the writer, so
+            # identical fonts/images/contents are never cloned a second time.
+            # _id_translated is private; requirements.txt pins pypdf for it.
+            translated = writer._id_translated.setdefault(id(r), {})
+            for idnum in reached:
+                digest, size = memo[idnum]
+                if digest is not None and digest in canonical and idnum not in translated:
+                    translated[idnum] = canonical[digest]
+                    report.objects_shared += 1
+                    report.bytes_shared += size
             writer.add_page(page)
-    with open(output_pdf, "wb") as f:
-        writer.write(f)
-
-
-def _parse_ranges(ranges: str) -> List[int]:
-    # pages returned 0-based
-    selected: List[int] = []
-    parts = [p.strip() for p in ranges.split(",") if p.strip()]
-    for part in parts:
-        if "-" in part:
-            a, b = part.split("-", 1)
-            start = int(a)
-            end = int(b)
-            for n in range(start, end + 1):
-                selected.append(n - 1)
-        else:
-            selected.append(int(part) - 1)
-    # unique and sorted
-    return sorted(set(selected))
+            for idnum in reached:
+                digest = memo[idnum][0]
+                if digest is not None and digest not in canonical and idnum in translated:
+                    canonical[digest] = translated[idnum]
+            if key is not None:
+                seen_pages.add(key)
+        writer.reset_translation(r)
+    report.output_bytes = _write_pdf(writer, output_pdf, linearize, task)
+    report.pages = len(writer.pages)
+    return report
 
 
-def split_pdf(input_pdf: str, ranges: str, output_dir: str):
-    import os
+_PRUNABLE_RESOURCES = ("/Font", "/XObject", "/ExtGState", "/ColorSpace", "/Pattern", "/Shading", "/Properties")
+_NAME_TOKEN = re.compile(rb"/([^\s/\[\]()<>{}%]*)")
+_NAME_ESCAPE = re.compile(rb"#([0-9A-Fa-f]{2})")
 
-    os.makedirs(output_dir, exist_ok=True)
-    reader = PdfReader(input_pdf)
-    idxs = _parse_ranges(ranges)
-    for i in idxs:
-        if i < 0 or i >= len(reader.pages):
+
+@dataclass
+class ResourceReport:
+    output: str
+    pages: int
+    resources_removed: int
+    bytes_removed: int
+    output_bytes: int
+
+
+def _content_names(contents) -> set:
+    # Every /Name token in the content streams; resources never named there
+    # cannot be referenced by the page.
+    if contents is None:
+        return set()
+    contents = contents.get_object()
+    streams = contents if isinstance(contents, ArrayObject) else [contents]
+    names = set()
+    for stream in streams:
+        data = stream.get_object().get_data()
+        for m in _NAME_TOKEN.finditer(data):
+            raw = _NAME_ESCAPE.sub(lambda e: bytes([int(e.group(1), 16)]), m.group(1))
+            names.add("/" + raw.decode("latin-1"))
+    return names
+
+
+def _stream_bytes(obj, seen: set) -> int:
+    # Sum of encoded stream lengths reachable from obj, skipping ids in seen.
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if isinstance(o, IndirectObject):
+            if o.idnum in seen:
+                continue
+            seen.add(o.idnum)
+            o = o.get_object()
+        if isinstance(o, StreamObject):
+            total += len(o._data or b"")
+        if isinstance(o, DictionaryObject):
+            stack.extend(v for k, v in o.items() if k != "/Parent")
+        elif isinstance(o, ArrayObject):
+            stack.extend(o)
+    return total
+
+
+def _prune_page_resources(page, kept_refs: list, dropped_refs: list) -> int:
+    # Replace the page /Resources by a private copy holding only what its
+    # content streams (and resource-less Form XObjects) name. The shared
+    # original is left untouched for the other pages of the reader, and
+    # _write_pruned restores the page entry once the copy is taken.
+    # Returns how many resource entries were removed.
+    resources = page.get("/Resources")
+    if resources is None:
+        return 0
+    resources = resources.get_object()
+    used = _content_names(page.get("/Contents"))
+
+    # Forms without their own /Resources inherit the page ones.
+    xobjects = resources.get("/XObject")
+    pending = [n for n in used if xobjects is not None and n in xobjects.get_object()]
+    visited = set()
+    while pending:
+        name = pending.pop()
+        if name in visited:
             continue
-        writer = PdfWriter()
-        writer.add_page(reader.pages[i])
-        out_path = os.path.join(output_dir, f"page_{i+1}.pdf")
-        with open(out_path, "wb") as f:
-            writer.write(f)
+        visited.add(name)
+        xobj = xobjects.get_object()[name].get_object()
+        if xobj.get("/Subtype") == "/Form" and "/Resources" not in xobj:
+            inner = _content_names(xobj)
+            used |= inner
+            pending.extend(n for n in inner if n in xobjects.get_object())
+
+    pruned = DictionaryObject()
+    removed = 0
+    for key, value in resources.items():
+        if key not in _PRUNABLE_RESOURCES:
+            pruned[NameObject(key)] = value
+            continue
+        category = DictionaryObject()
+        for name, ref in value.get_object().items():
+            if name in used:
+                category[NameObject(name)] = ref
+                kept_refs.append(ref)
+            else:
+                dropped_refs.append(ref)
+                removed += 1
+        if category:
+            pruned[NameObject(key)] = category
+    page[NameObject("/Resources")] = pruned
+    return removed
 
 
-def rotate_pages(input_pdf: str, output_pdf: str, degrees: int, pages: Optional[Iterable[int]] = None):
-    reader = PdfReader(input_pdf)
+def _write_pruned(
+    pages, output_pdf: str, prune: bool, linearize: bool = False, task: Optional[Tracker] = None
+) -> ResourceReport:
+    task = task or Tracker()
     writer = PdfWriter()
-    target = set([p - 1 for p in pages]) if pages else set(range(len(reader.pages)))
-    for i, page in enumerate(reader.pages):
-        if i in target:
-            page.rotate(degrees)
+    kept_refs: list = []
+    dropped_refs: list = []
+    removed = count = 0
+    for page in pages:
+        original = page.raw_get("/Resources") if prune and "/Resources" in page else None
+        if prune:
+            removed += _prune_page_resources(page, kept_refs, dropped_refs)
         writer.add_page(page)
-    with open(output_pdf, "wb") as f:
-        writer.write(f)
+        if original is not None:
+            # Only the copy is pruned; the reader may be shared through the document cache.
+            page[NameObject("/Resources")] = original
+        count += 1
+        task.step()
+    size = _write_pdf(writer, output_pdf, linearize, task)
 
+    # Only count streams that no kept resource still reaches.
+    saved = 0
+    if dropped_refs:
+        seen: set = set()
+        for ref in kept_refs:
+            _stream_bytes(ref, seen)
+        saved = sum(_stream_bytes(ref, seen) for ref in dropped_refs)
+    return ResourceReport(output_pdf, count, removed, saved, size)
 
-def extract_text(input_pdf: str, pages: Optional[Iterable[int]] = None) -> str:
-    reader = PdfReader(input_pdf)
-    target = set([p - 1 for p in pages]) if pages else set(range(len(reader.pages)))
-    chunks: List[str] = []
-    for i, page in enumerate(reader.pages):
-        if i in target:
-            chunks.append(page.extract_text() or "")
-    return "\n".join(chunks)
+
+def prune_resources(
+    input_pdf: str,
+    output_pdf: str,
+    linearize: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> ResourceReport:
+    reader = document_cache.reader(input_pdf)
+    return _write_pruned(reader.pages, output_pdf, True, linearize, Tracker(progress, cancel, len(reader.pages)))
+
+
+def split_pdf(
+    input_pdf: str,
+    ranges: Union[PageSet, str],
+    output_dir: str,
+    prune: bool = True,
+    linearize: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> List[ResourceReport]:
+    # Each file is written atomically; a cancelled split keeps the files
+    # already finished.
+    os.makedirs(output_dir, exist_ok=True)
+    reader = document_cache.reader(input_pdf)
+    reports: List[ResourceReport] = []
+    selected = list(PageSet.coerce(ranges).indices(len(reader.pages), unique=True))
+    task = Tracker(progress, cancel, len(selected))
+    for i in selected:
+        out_path = os.path.join(output_dir, f"page_{i+1}.pdf")
+        reports.append(_write_pruned([reader.pages[i]], out_path, prune, linearize, task))
+    return reports
 
 
-def fill_form(input_pdf: str, output_pdf: str, data: dict, flatten: bool = False):
-    reader = PdfReader(input_pdf)
+def rotate_pages(
+    input_pdf: str,
+    output_pdf: str,
+    degrees: int,
+    pages: PageSpec = None,
+    memory_limit_mb: Optional[float] = None,
+    linearize: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+):
+    if memory_limit_mb:
+        return write_windowed(
+            input_pdf, output_pdf, range, memory_limit_mb,
+            rotate=degrees, rotate_pages=PageSet.coerce(pages or None), linearize=linearize,
+            progress=progress, cancel=cancel,
+        )
+    reader = document_cache.reader(input_pdf)
     writer = PdfWriter()
-    if reader.get_fields():
-        writer.append(reader)
-        writer.update_page_form_field_values(writer.pages, data)
-        if flatten:
-            for page in writer.pages:
-                page.Annots = []
+    task = Tracker(progress, cancel, len(reader.pages))
+    for page in reader.pages:
+        writer.add_page(page)
+        task.step()
+    for i in PageSet.coerce(pages or None).indices(len(writer.pages), unique=True):
+        writer.pages[i].rotate(degrees)
+    _write_pdf(writer, output_pdf, linearize, task)
+
+
+def extract_text_pages(
+    input_pdf: str,
+    pages: PageSpec = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Iterator[str]:
+    # One string per selected page, produced as each page is extracted.
+    reader = document_cache.reader(input_pdf)
+    selected = list(PageSet.coerce(pages or None).indices(len(reader.pages), unique=True))
+    task = Tracker(progress, cancel, len(selected))
+    for i in selected:
+        task.check()
+        yield reader.pages[i].extract_text() or ""
+        task.step()
+
+
+def extract_text(
+    input_pdf: str,
+    pages: PageSpec = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> str:
+    return "\n".join(extract_text_pages(input_pdf, pages, progress, cancel))
+
+
+_WORD_FLOAT_COLUMNS = ("x0", "y0", "x1", "y1", "size")
+_WORD_INT_COLUMNS = ("page", "block", "line", "word")
+_WORD_STR_COLUMNS = ("text", "font")
+
+
+def _round_bbox(bbox) -> List[float]:
+    return [round(v, 2) for v in bbox]
+
+
+def _page_layout(page, page_num: int) -> dict:
+    # One TextPage feeds both the "dict" (blocks/lines/spans with fonts) and
+    # the "words" views, so the page text is only extracted once.
+    tp = page.get_textpage()
+    layout = page.get_text("dict", textpage=tp)
+    spans_by_line: dict = {}
+    blocks: List[dict] = []
+    lines: List[dict] = []
+    for b in layout["blocks"]:
+        if b.get("type", 0) != 0:
+            continue
+        blocks.append({"block": b["number"], "bbox": _round_bbox(b["bbox"])})
+        for ln, line in enumerate(b["lines"]):
+            spans = line["spans"]
+            spans_by_line[(b["number"], ln)] = spans
+            main = max(spans, key=lambda sp: len(sp["text"])) if spans else {"font": "", "size": 0.0}
+            lines.append({
+                "block": b["number"],
+                "line": ln,
+                "bbox": _round_bbox(line["bbox"]),
+                "text": "".join(sp["text"] for sp in spans),
+                "font": main["font"],
+                "size": round(main["size"], 2),
+            })
+
+    words: List[dict] = []
+    for x0, y0, x1, y1, text, bno, lno, wno in page.get_text("words", textpage=tp):
+        font, size = "", 0.0
+        cx = (x0 + x1) / 2
+        for sp in spans_by_line.get((bno, lno), ()):
+            font, size = sp["font"], sp["size"]
+            if sp["bbox"][0] <= cx <= sp["bbox"][2]:
+                break
+        words.append({
+            "block": bno,
+            "line": lno,
+            "word": wno,
+            "text": text,
+            "bbox": _round_bbox((x0, y0, x1, y1)),
+            "font": font,
+            "size": round(size, 2),
+        })
+    return {
+        "page": page_num,
+        "width": round(page.rect.width, 2),
+        "height": round(page.rect.height, 2),
+        "blocks": blocks,
+        "lines": lines,
+        "words": words,
+    }
+
+
+def extract_words(
+    input_pdf: str,
+    pages: PageSpec = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Iterator[dict]:
+    # Yields one layout record per page (blocks, lines and words with
+    # bounding boxes in points, origin at the top-left, plus font and size).
+    doc = document_cache.document(input_pdf)
+    selected = list(PageSet.coerce(pages or None).indices(doc.page_count, unique=True))
+    task = Tracker(progress, cancel, len(selected))
+    for i in selected:
+        task.check()
+        yield _page_layout(doc[i], i + 1)
+        task.step()
+
+
+def _empty_word_batch() -> dict:
+    batch: dict = {c: array("f") for c in _WORD_FLOAT_COLUMNS}
+    batch.update({c: array("i") for c in _WORD_INT_COLUMNS})
+    batch.update({c: [] for c in _WORD_STR_COLUMNS})
+    return batch
+
+
+def extract_word_columns(
+    input_pdf: str,
+    pages: PageSpec = None,
+    batch_size: int = 65536,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Iterator[dict]:
+    # Column batches of words: numeric columns are array.array buffers
+    # (numpy.frombuffer reads them without copying), text/font are lists.
+    batch = _empty_word_batch()
+    for layout in extract_words(input_pdf, pages, progress, cancel):
+        for w in layout["words"]:
+            x0, y0, x1, y1 = w["bbox"]
+            for col, value in (("x0", x0), ("y0", y0), ("x1", x1), ("y1", y1), ("size", w["size"])):
+                batch[col].append(value)
+            batch["page"].append(layout["page"])
+            for col in ("block", "line", "word", "text", "font"):
+                batch[col].append(w[col])
+            if len(batch["text"]) >= batch_size:
+                yield batch
+                batch = _empty_word_batch()
+    if batch["text"]:
+        yield batch
+
+
+_OFF_VALUES = (None, False, "", "Off", "/Off", "off", "false", "False", "0", 0)
+
+
+def _set_widget_value(widget, value):
+    if widget.field_type == fitz.PDF_WIDGET_TYPE_CHECKBOX:
+        widget.field_value = widget.on_state() if value not in _OFF_VALUES else "Off"
+    elif widget.field_type == fitz.PDF_WIDGET_TYPE_RADIOBUTTON:
+        # every kid of a radio group shares the name; only the matching one turns on
+        on = widget.on_state()
+        widget.field_value = on if value is True or str(value) == str(on) else "Off"
+    elif isinstance(value, (list, tuple)):
+        widget.field_value = [str(v) for v in value]
     else:
-        for page in reader.pages:
-            writer.add_page(page)
-    with open(output_pdf, "wb") as f:
-        writer.write(f)
+        widget.field_value = "" if value is None else str(value)
+    widget.update()  # regenerates the appearance stream
 
 
-def flatten_form(input_pdf: str, output_pdf: str):
-    reader = PdfReader(input_pdf)
-    writer = PdfWriter()
-    writer.append(reader)
-    for page in writer.pages:
-        try:
-            page.Annots = []
-        except Exception:
-            pass
-    with open(output_pdf, "wb") as f:
-        writer.write(f)
+def _fill_widgets(doc, data: dict, task: Optional[Tracker] = None) -> set:
+    # Single pass over every widget of the document, looking each field name
+    # up in data, instead of scanning all pages once per field.
+    task = task or Tracker()
+    filled = set()
+    for page in doc:
+        task.step()
+        for widget in page.widgets():
+            name = widget.field_name
+            if name in data:
+                _set_widget_value(widget, data[name])
+                filled.add(name)
+            elif doc.xref_get_key(widget.xref, "AP")[0] == "null":
+                widget.update()  # no appearance yet: build one from the stored value
+    return filled
+
+
+def fill_form(
+    input_pdf: str,
+    output_pdf: str,
+    data: dict,
+    flatten: bool = False,
+    linearize: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+):
+    doc = document_cache.take_document(input_pdf)
+    task = Tracker(progress, cancel, doc.page_count)
+    if doc.is_form_pdf:
+        filled = _fill_widgets(doc, data, task)
+        for name in data:
+            if name not in filled:
+                print(f"Aviso: Campo de formulário não encontrado: {name}. Ignorando.", file=sys.stderr)
+        if flatten:
+            # bake the appearance streams into the page content and drop the widgets
+            doc.bake(annots=False, widgets=True)
+    _save_doc(doc, output_pdf, linearize, task, garbage=1, deflate=True)
+    doc.close()
+
+
+def flatten_form(
+    input_pdf: str,
+    output_pdf: str,
+    memory_limit_mb: Optional[float] = None,
+    linearize: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+):
+    if memory_limit_mb:
+        # Windowed mode bakes the existing appearance streams only.
+        return write_windowed(
+            input_pdf, output_pdf, range, memory_limit_mb, flatten=True, linearize=linearize,
+            progress=progress, cancel=cancel,
+        )
+    fill_form(input_pdf, output_pdf, {}, flatten=True, linearize=linearize, progress=progress, cancel=cancel)
 
 
 def edit_text(
@@ -243,16 +1227,17 @@ def edit_text(
     font_name: Optional[str] = None,
     font_size: Optional[float] = None,
     color: Optional[str] = None,
+    linearize: bool = False,
 ):
-    doc = fitz.open(input_pdf)
+    doc = document_cache.take_document(input_pdf)
     page = doc[page_num - 1]  # PyMuPDF pages are 0-indexed
 
     # Search for the old_text and get its bounding box and properties
     text_instances = page.search_for(old_text)
 
     if not text_instances:
-        print(f"Texto '{old_text}' não encontrado na página {page_num}.")
-        doc.save(output_pdf)
+        print(f"Texto '{old_text}' não encontrado na página {page_num}.", file=sys.stderr)
+        _save_doc(doc, output_pdf, linearize)
         doc.close()
         return
 
@@ -290,43 +1275,213 @@ def edit_text(
                      fontsize=final_font_size,
                      color=text_color)
 
-    doc.save(output_pdf)
+    _save_doc(doc, output_pdf, linearize)
     doc.close()
 
-def delete_pages(
+
+
+@dataclass
+class RedactionMatch:
+    page: int
+    pattern: str
+    text: str
+    rects: List[Tuple[float, float, float, float]]
+
+
+@dataclass
+class RedactionReport:
+    output: str
+    pages_scanned: int
+    pages_redacted: int
+    matches: List[RedactionMatch]
+
+    def counts(self) -> dict:
+        totals: dict = {}
+        for m in self.matches:
+            totals[m.pattern] = totals.get(m.pattern, 0) + 1
+        return totals
+
+
+# Compiled once per worker process by _init_redaction_worker.
+_redaction_patterns: List[Tuple[str, "re.Pattern"]] = []
+
+
+def _compile_patterns(texts: Sequence[str], regexes: Sequence[str], ignore_case: bool) -> List[Tuple[str, "re.Pattern"]]:
+    flags = re.IGNORECASE if ignore_case else 0
+    compiled = [(t, re.compile(re.escape(t), flags)) for t in texts if t]
+    compiled += [(r, re.compile(r, flags)) for r in regexes if r]
+    return compiled
+
+
+def _init_redaction_worker(texts: Sequence[str], regexes: Sequence[str], ignore_case: bool):
+    global _redaction_patterns
+    _redaction_patterns = _compile_patterns(texts, regexes, ignore_case)
+
+
+def _page_chars(page) -> Tuple[str, list]:
+    # Page text with one bbox per character; lines are joined by "\n" (which
+    # has no box), so a match can be mapped back to rectangles line by line.
+    text: List[str] = []
+    boxes: list = []
+    layout = page.get_text("rawdict", flags=fitz.TEXTFLAGS_RAWDICT & ~fitz.TEXT_PRESERVE_IMAGES)
+    for block in layout["blocks"]:
+        for line in block.get("lines", ()):
+            for span in line["spans"]:
+                for ch in span["chars"]:
+                    text.append(ch["c"])
+                    boxes.append(ch["bbox"])
+            text.append("\n")
+            boxes.append(None)
+    return "".join(text), boxes
+
+
+def _match_rects(boxes: list, start: int, end: int) -> List[Tuple[float, float, float, float]]:
+    rects: List[Tuple[float, float, float, float]] = []
+    current = None
+    for box in boxes[start:end]:
+        if box is None:
+            if current:
+                rects.append(tuple(current))
+            current = None
+        elif current is None:
+            current = list(box)
+        else:
+            current = [min(current[0], box[0]), min(current[1], box[1]), max(current[2], box[2]), max(current[3], box[3])]
+    if current:
+        rects.append(tuple(current))
+    return rects
+
+
+def _page_matches(page, page_num: int, patterns: List[Tuple[str, "re.Pattern"]]) -> List[RedactionMatch]:
+    found: List[RedactionMatch] = []
+    text, boxes = _page_chars(page)
+    for label, pattern in patterns:
+        for m in pattern.finditer(text):
+            rects = _match_rects(boxes, m.start(), m.end())
+            if rects:
+                found.append(RedactionMatch(page_num, label, m.group(), rects))
+    return found
+
+
+def _find_matches(input_pdf: str, page_idxs: List[int]) -> List[RedactionMatch]:
+    # Runs inside a worker process; the patterns were compiled by the initializer.
+    # Later chunks handed to the same worker reuse the cached document.
+    doc = document_cache.document(input_pdf)
+    return [m for i in page_idxs for m in _page_matches(doc[i], i + 1, _redaction_patterns)]
+
+
+def redact_pdf(
     input_pdf: str,
     output_pdf: str,
-    pages_to_delete: List[int],
-):
-    reader = PdfReader(input_pdf)
-    writer = PdfWriter()
-    pages_to_delete_0_indexed = [p - 1 for p in pages_to_delete]
+    texts: Sequence[str] = (),
+    regexes: Sequence[str] = (),
+    pages: PageSpec = None,
+    ignore_case: bool = False,
+    fill: Tuple[float, float, float] = (0, 0, 0),
+    workers: Optional[int] = None,
+    linearize: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> RedactionReport:
+    # Matches are searched in parallel; only pages with matches are then
+    # rewritten. apply_redactions removes the covered text and image pixels
+    # from the content itself, and garbage collection drops the old streams.
+    patterns = _compile_patterns(texts, regexes, ignore_case)  # fail fast on bad regexes
+    if not patterns:
+        raise ValueError("Informe ao menos um texto ou expressão regular")
+    doc = document_cache.take_document(input_pdf)
+    try:
+        idxs = list(PageSet.coerce(pages or None).indices(doc.page_count, unique=True))
+        task = Tracker(progress, cancel, len(idxs))
+        n = min(workers or os.cpu_count() or 1, max(1, len(idxs) // 16))
+        matches: List[RedactionMatch] = []
+        if n <= 1:
+            for i in idxs:
+                task.check()
+                matches.extend(_page_matches(doc[i], i + 1, patterns))
+                task.step()
+        else:
+            chunks = _split_chunks(idxs, min(len(idxs), n * 8))
+            with ProcessPoolExecutor(
+                max_workers=n, initializer=_init_redaction_worker, initargs=(list(texts), list(regexes), ignore_case)
+            ) as pool:
+                futures = [pool.submit(_find_matches, input_pdf, chunk) for chunk in chunks]
+                try:
+                    for chunk, fut in zip(chunks, futures):
+                        matches.extend(fut.result())
+                        task.step(len(chunk))
+                except OperationCancelled:
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    raise
 
-    for i, page in enumerate(reader.pages):
-        if i not in pages_to_delete_0_indexed:
-            writer.add_page(page)
+        by_page: dict = {}
+        for m in matches:
+            by_page.setdefault(m.page, []).append(m)
+        for page_num in sorted(by_page):
+            task.check()
+            page = doc[page_num - 1]
+            for m in by_page[page_num]:
+                for rect in m.rects:
+                    page.add_redact_annot(fitz.Rect(rect), fill=fill)
+            page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_PIXELS)
+        _save_doc(doc, output_pdf, linearize, task, garbage=3, deflate=True)
+    finally:
+        doc.close()
+    return RedactionReport(output_pdf, len(idxs), len(by_page), matches)
 
-    with open(output_pdf, "wb") as f:
-        writer.write(f)
+
+def delete_pages(
+    input_pdf: str,
+    output_pdf: str,
+    pages_to_delete: PageSpec,
+    prune: bool = True,
+    memory_limit_mb: Optional[float] = None,
+    linearize: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Union[ResourceReport, WindowReport]:
+    to_delete = PageSet.coerce(pages_to_delete)
+    if memory_limit_mb:
+        def plan(n):
+            return (i for r in to_delete.complement(n) for i in r)
+
+        return write_windowed(
+            input_pdf, output_pdf, plan, memory_limit_mb, linearize=linearize, progress=progress, cancel=cancel
+        )
+    reader = document_cache.reader(input_pdf)
+    remaining = to_delete.complement(len(reader.pages))
+    kept = (reader.pages[i] for r in remaining for i in r)
+    task = Tracker(progress, cancel, sum(len(r) for r in remaining))
+    return _write_pruned(kept, output_pdf, prune, linearize, task)
 
 
 def reorder_pages(
     input_pdf: str,
     output_pdf: str,
-    new_order: List[int],
+    new_order: PageSpec,
+    memory_limit_mb: Optional[float] = None,
+    linearize: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
 ):
-    reader = PdfReader(input_pdf)
+    order = PageSet.coerce(new_order)
+    if memory_limit_mb:
+        return write_windowed(
+            input_pdf, output_pdf, order.indices, memory_limit_mb, linearize=linearize, progress=progress, cancel=cancel
+        )
+    reader = document_cache.reader(input_pdf)
     writer = PdfWriter()
-    
-    # new_order should be 1-indexed page numbers
-    for page_num in new_order:
-        if 1 <= page_num <= len(reader.pages):
-            writer.add_page(reader.pages[page_num - 1])
-        else:
-            print(f"Aviso: Número de página inválido na nova ordem: {page_num}. Ignorando.")
+    page_count = len(reader.pages)
+    task = Tracker(progress, cancel, order.count(page_count))
+
+    # new_order uses 1-indexed page numbers; repeated pages are kept
+    for page_num in order.out_of_range(page_count):
+        print(f"Aviso: Número de página inválido na nova ordem: {page_num}. Ignorando.", file=sys.stderr)
+    for i in order.indices(page_count):
+        writer.add_page(reader.pages[i])
+        task.step()
 
-    with open(output_pdf, "wb") as f:
-        writer.write(f)
+    _write_pdf(writer, output_pdf, linearize, task)
 
 def insert_blank_page(
     input_pdf: str,
@@ -334,22 +1489,649 @@ def insert_blank_page(
     page_num: int,
     width: float = letter[0],
     height: float = letter[1],
+    memory_limit_mb: Optional[float] = None,
+    linearize: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
 ):
-    reader = PdfReader(input_pdf)
+    if memory_limit_mb:
+        def plan(n):
+            return [*range(min(page_num - 1, n)), BLANK, *range(max(page_num - 1, 0), n)]
+
+        return write_windowed(
+            input_pdf, output_pdf, plan, memory_limit_mb, blank_size=(width, height), linearize=linearize,
+            progress=progress, cancel=cancel,
+        )
+    reader = document_cache.reader(input_pdf)
     writer = PdfWriter()
+    task = Tracker(progress, cancel, len(reader.pages) + 1)
 
     # Add pages before the insertion point
     for i in range(page_num - 1):
         if i < len(reader.pages):
             writer.add_page(reader.pages[i])
+            task.step()
 
     # Insert blank page
     writer.add_blank_page(width=width, height=height)
+    task.step()
     
     # Add pages after the insertion point
     for i in range(page_num - 1, len(reader.pages)):
         writer.add_page(reader.pages[i])
+        task.step()
+
+    _write_pdf(writer, output_pdf, linearize, task)
+
+
+# layout -> (columns, rows) per sheet
+_IMPOSE_LAYOUTS = {"2up": (2, 1), "4up": (2, 2), "booklet": (2, 1)}
 
-    with open(output_pdf, "wb") as f:
-        writer.write(f)
+_Matrix = Tuple[float, float, float, float, float, float]
+
+
+def _mat_mul(m1: _Matrix, m2: _Matrix) -> _Matrix:
+    # m1 applied first, then m2 (PDF row-vector convention)
+    a1, b1, c1, d1, e1, f1 = m1
+    a2, b2, c2, d2, e2, f2 = m2
+    return (
+        a1 * a2 + b1 * c2, a1 * b2 + b1 * d2,
+        c1 * a2 + d1 * c2, c1 * b2 + d1 * d2,
+        e1 * a2 + f1 * c2 + e2, e1 * b2 + f1 * d2 + f2,
+    )
+
+
+def _displayed_box(page) -> Tuple[_Matrix, float, float]:
+    # Matrix taking the crop box to an upright box at the origin, honouring
+    # /Rotate (clockwise), plus the displayed width and height.
+    x0, y0, x1, y1 = (float(v) for v in page.cropbox)
+    w, h = x1 - x0, y1 - y0
+    m: _Matrix = (1, 0, 0, 1, -x0, -y0)
+    rotate = page.get("/Rotate", 0) % 360
+    if rotate == 90:
+        return _mat_mul(m, (0, -1, 1, 0, 0, w)), h, w
+    if rotate == 180:
+        return _mat_mul(m, (-1, 0, 0, -1, w, h)), w, h
+    if rotate == 270:
+        return _mat_mul(m, (0, 1, -1, 0, h, 0)), h, w
+    return m, w, h
+
+
+def _page_as_form(page, writer: PdfWriter) -> IndirectObject:
+    # The page content becomes a Form XObject. A single content stream is
+    # reused as-is (still encoded); resources are cloned by reference, so
+    # fonts and images shared between pages stay shared.
+    form = StreamObject()
+    contents = page.get("/Contents")
+    contents = contents.get_object() if contents is not None else None
+    if isinstance(contents, StreamObject):
+        form._data = contents._data
+        for key in ("/Filter", "/DecodeParms"):
+            if key in contents:
+                form[NameObject(key)] = contents.raw_get(key).clone(writer)
+    elif contents is not None:
+        data = b"\n".join(part.get_object().get_data() for part in contents)
+        form._data = zlib.compress(data)
+        form[NameObject("/Filter")] = NameObject("/FlateDecode")
+    form[NameObject("/Type")] = NameObject("/XObject")
+    form[NameObject("/Subtype")] = NameObject("/Form")
+    form[NameObject("/BBox")] = ArrayObject(FloatObject(float(v)) for v in page.cropbox)
+    if "/Resources" in page:
+        form[NameObject("/Resources")] = page.raw_get("/Resources").clone(writer)
+    return writer._add_object(form)
+
+
+def _booklet_order(count: int) -> List[int]:
+    # Saddle-stitch order for 2-up sheets: front (last, first), back
+    # (second, second-to-last), ... Indices >= count are blank padding.
+    n = -(-count // 4) * 4
+    order: List[int] = []
+    for i in range(n // 4):
+        order += [n - 1 - 2 * i, 2 * i, 2 * i + 1, n - 2 - 2 * i]
+    return order
+
+
+def impose_pdf(
+    input_pdf: str,
+    output_pdf: str,
+    layout: str = "2up",
+    pages: PageSpec = None,
+    columns: Optional[int] = None,
+    rows: Optional[int] = None,
+    sheet_size: Optional[Tuple[float, float]] = None,
+    margin: float = 0,
+    linearize: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> int:
+    # n-up grid or saddle-stitch booklet: each page is one Form XObject placed
+    # with a cm transform. Returns the number of sheet sides written.
+    if layout not in _IMPOSE_LAYOUTS:
+        raise ValueError(f"Layout desconhecido: {layout}")
+    default_cols, default_rows = _IMPOSE_LAYOUTS[layout]
+    cols, nrows = columns or default_cols, rows or default_rows
+    if layout == "booklet" and (cols, nrows) != (2, 1):
+        raise ValueError("O livreto usa sempre 2 páginas lado a lado")
+
+    reader = document_cache.reader(input_pdf)
+    selected = list(PageSet.coerce(pages or None).indices(len(reader.pages)))
+    if not selected:
+        raise ValueError("Nenhuma página selecionada")
+    slots: List[Optional[int]]
+    if layout == "booklet":
+        slots = [selected[k] if k < len(selected) else None for k in _booklet_order(len(selected))]
+    else:
+        per_sheet = cols * nrows
+        slots = selected + [None] * (-len(selected) % per_sheet)
+
+    _, cw, ch = _displayed_box(reader.pages[selected[0]])
+    if sheet_size:
+        sw, sh = sheet_size
+        cw, ch = (sw - 2 * margin) / cols, (sh - 2 * margin) / nrows
+    else:
+        sw, sh = cols * cw + 2 * margin, nrows * ch + 2 * margin
+
+    writer = PdfWriter()
+    task = Tracker(progress, cancel, len(selected))
+    forms: Dict[int, IndirectObject] = {}
+    per_sheet = cols * nrows
+    for start in range(0, len(slots), per_sheet):
+        sheet = writer.add_blank_page(sw, sh)
+        xobjects = DictionaryObject()
+        ops: List[str] = []
+        for cell, src in enumerate(slots[start:start + per_sheet]):
+            if src is None:
+                continue
+            page = reader.pages[src]
+            if src not in forms:
+                forms[src] = _page_as_form(page, writer)
+            m, pw, ph = _displayed_box(page)
+            scale = min(cw / pw, ch / ph)
+            col, row = cell % cols, cell // cols
+            # centre in the cell; rows run top to bottom
+            ox = margin + col * cw + (cw - pw * scale) / 2
+            oy = sh - margin - (row + 1) * ch + (ch - ph * scale) / 2
+            a, b, c, d, e, f = _mat_mul(m, (scale, 0, 0, scale, ox, oy))
+            name = f"/P{cell}"
+            xobjects[NameObject(name)] = forms[src]
+            ops.append(f"q {a:.6g} {b:.6g} {c:.6g} {d:.6g} {e:.6g} {f:.6g} cm {name} Do Q\n")
+            task.step()
+        sheet[NameObject("/Resources")] = DictionaryObject({NameObject("/XObject"): xobjects})
+        if ops:
+            sheet[NameObject("/Contents")] = _raw_stream(writer, "".join(ops).encode())
+    _write_pdf(writer, output_pdf, linearize, task)
+    return len(writer.pages)
+
+
+_LINEARIZED_E = re.compile(rb"/Linearized\b.*?/E\s+(\d+)", re.S)
+
+
+def _input_bytes(input_pdf) -> bytes:
+    if is_stream(input_pdf):
+        input_pdf.seek(0)
+        return input_pdf.read()
+    with open(input_pdf, "rb") as f:
+        return f.read()
+
+
+def linearize_pdf(input_pdf: str, output_pdf: Output):
+    with output_file(output_pdf) as f:
+        _save_linearized(BytesIO(_input_bytes(input_pdf)), f)
+
+
+def check_linearization(input_pdf: str) -> bool:
+    import pikepdf
+
+    if is_stream(input_pdf):
+        input_pdf.seek(0)
+    stderr = sys.stderr
+    try:
+        with pikepdf.open(input_pdf) as pdf:
+            return pdf.is_linearized and pdf.check_linearization(stream=BytesIO())
+    finally:
+        sys.stderr = stderr  # pikepdf leaves sys.stderr pointing at the check's stream
+
+
+def first_page_bytes(input_pdf: str) -> int:
+    # Bytes a client must fetch, reading from the start, before page 1 can be
+    # drawn. Linearized files announce it in /E (end of the first-page
+    # section); otherwise the xref sits at the end and the whole file is needed.
+    if is_stream(input_pdf):
+        data = _input_bytes(input_pdf)
+        m = _LINEARIZED_E.search(data[:1024])
+        return int(m.group(1)) if m else len(data)
+    with open(input_pdf, "rb") as f:
+        head = f.read(1024)
+        m = _LINEARIZED_E.search(head)
+        if m:
+            return int(m.group(1))
+        return os.fstat(f.fileno()).st_size
+
+
+_RENDER_FORMATS = {"png": "png", "jpeg": "jpg", "jpg": "jpg", "webp": "webp"}
+_RENDER_COLORSPACES = {"rgb": fitz.csRGB, "gray": fitz.csGRAY, "cmyk": fitz.csCMYK}
+
+
+def _render_chunk(
+    input_pdf: str,
+    page_idxs: List[int],
+    output_dir: str,
+    dpi: int,
+    fmt: str,
+    colorspace: str,
+    alpha: bool,
+    quality: int,
+) -> List[str]:
+    # Runs inside a worker process: the document is opened once per worker
+    # (through the cache) and every image is written as soon as it is
+    # rasterized, so only one pixmap is alive.
+    ext = _RENDER_FORMATS[fmt]
+    written: List[str] = []
+    doc = document_cache.document(input_pdf)
+    for i in page_idxs:
+        pix = doc[i].get_pixmap(dpi=dpi, colorspace=_RENDER_COLORSPACES[colorspace], alpha=alpha)
+        out_path = os.path.join(output_dir, f"page_{i+1}.{ext}")
+        with atomic_output(out_path) as tmp:
+            if ext == "webp":
+                pix.pil_save(tmp, format="WEBP", quality=quality)
+            elif ext == "jpg":
+                pix.save(tmp, jpg_quality=quality)
+            else:
+                pix.save(tmp)
+        written.append(out_path)
+        pix = None
+    return written
+
+
+def _split_chunks(idxs: List[int], n: int) -> List[List[int]]:
+    # contiguous slices keep each worker reading neighbouring pages
+    size, extra = divmod(len(idxs), n)
+    chunks: List[List[int]] = []
+    start = 0
+    for k in range(n):
+        end = start + size + (1 if k < extra else 0)
+        if end > start:
+            chunks.append(idxs[start:end])
+        start = end
+    return chunks
+
+
+def render_pages(
+    input_pdf: str,
+    output_dir: str,
+    ranges: PageSpec = None,
+    dpi: int = 150,
+    fmt: str = "png",
+    colorspace: str = "rgb",
+    alpha: bool = False,
+    quality: int = 85,
+    workers: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> List[str]:
+    fmt = fmt.lower()
+    colorspace = colorspace.lower()
+    if fmt not in _RENDER_FORMATS:
+        raise ValueError(f"Formato de imagem não suportado: {fmt}")
+    if colorspace not in _RENDER_COLORSPACES:
+        raise ValueError(f"Espaço de cor não suportado: {colorspace}")
+    if colorspace == "cmyk" and _RENDER_FORMATS[fmt] != "jpg":
+        raise ValueError("CMYK só é suportado com saída JPEG")
+    if alpha and _RENDER_FORMATS[fmt] == "jpg":
+        raise ValueError("JPEG não suporta canal alfa")
+
+    os.makedirs(output_dir, exist_ok=True)
+    # Not cached: the workers must not inherit an open handle.
+    with _open_fitz(input_pdf) as probe:
+        page_count = probe.page_count
+    idxs = list(PageSet.coerce(ranges or None).indices(page_count, unique=True))
+    if not idxs:
+        return []
+
+    n = min(workers or os.cpu_count() or 1, len(idxs))
+    args = (output_dir, dpi, fmt, colorspace, alpha, quality)
+    task = Tracker(progress, cancel, len(idxs))
+    if n <= 1 and progress is None and cancel is None:
+        return _render_chunk(input_pdf, idxs, *args)
+
+    # With a callback or token, use smaller chunks so progress and
+    # cancellation are checked more often than once per worker.
+    chunks = _split_chunks(idxs, n if task.progress is None and task.cancel is None else min(len(idxs), n * 8))
+    written: List[str] = []
+    if n <= 1:
+        for chunk in chunks:
+            task.check()
+            written.extend(_render_chunk(input_pdf, chunk, *args))
+            task.step(len(chunk))
+        return written
+    with ProcessPoolExecutor(max_workers=n) as pool:
+        futures = [pool.submit(_render_chunk, input_pdf, chunk, *args) for chunk in chunks]
+        try:
+            for fut in futures:
+                written.extend(fut.result())
+                task.step(len(written) - task.done)
+        except OperationCancelled:
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+    return written
+
+
+@dataclass
+class ExtractedImage:
+    xref: int
+    pages: List[int]
+    path: str
+    width: int
+    height: int
+    encoding: str  # jpeg, jpx, jbig2, ccitt or the fallback format (png, ...)
+    passthrough: bool
+
+
+@dataclass
+class ImageExtractReport:
+    output_dir: str
+    pages_scanned: int
+    references: int  # image placements found on the pages
+    images: List[ExtractedImage]
+    files_written: int
+    bytes_written: int
+
+    @property
+    def duplicates(self) -> int:
+        # distinct image objects whose content matched an earlier one
+        return len(self.images) - len({img.path for img in self.images})
+
+
+# native filter -> (encoding, file extension)
+_NATIVE_IMAGE_FILTERS = {
+    "/DCTDecode": ("jpeg", "jpg"),
+    "/JPXDecode": ("jpx", "jp2"),
+    "/JBIG2Decode": ("jbig2", "jb2"),
+    "/CCITTFaxDecode": ("ccitt", "tif"),
+}
+_JBIG2_FILE_HEADER = b"\x97JBIG2\r\n\x1a\n\x01\x00\x00\x00\x01"  # sequential, one page
+
+
+def _xref_value(doc, xref: int, key: str) -> Optional[str]:
+    kind, value = doc.xref_get_key(xref, key)
+    return None if kind == "null" else value
+
+
+def _ccitt_tiff(data: bytes, width: int, height: int, k: int, black_is_1: bool, inverted: bool) -> bytes:
+    # Minimal single-strip TIFF around the untouched CCITT data.
+    compression = 4 if k < 0 else 3
+    # fax codes decode to white-is-zero; BlackIs1 and /Decode [1 0] each flip
+    # how the PDF shows them
+    photometric = 0 if black_is_1 == inverted else 1
+    tags = [
+        (256, 4, width),
+        (257, 4, height),
+        (258, 3, 1),
+        (259, 3, compression),
+        (262, 3, photometric),
+        (273, 4, 0),  # strip offset, patched below
+        (277, 3, 1),
+        (278, 4, height),
+        (279, 4, len(data)),
+    ]
+    if compression == 3:
+        tags.append((292, 4, 1 if k > 0 else 0))  # T4Options: 2-D coding
+    tags.sort()
+    ifd_size = 2 + 12 * len(tags) + 4
+    offset = 8 + ifd_size
+    ifd = bytearray(struct.pack("<H", len(tags)))
+    for tag, kind, value in tags:
+        value = offset if tag == 273 else value
+        packed = struct.pack("<HH", value, 0) if kind == 3 else struct.pack("<I", value)
+        ifd += struct.pack("<HHI", tag, kind, 1) + packed
+    ifd += struct.pack("<I", 0)
+    return b"II*\x00" + struct.pack("<I", 8) + bytes(ifd) + data
+
+
+def _native_image(doc, xref: int) -> Optional[Tuple[bytes, str, str]]:
+    # The stored bytes, when the image filter is a self-contained format.
+    filter_name = _xref_value(doc, xref, "Filter")
+    if filter_name not in _NATIVE_IMAGE_FILTERS:
+        return None  # no filter, Flate/LZW/RunLength, or a filter chain
+    encoding, ext = _NATIVE_IMAGE_FILTERS[filter_name]
+    data = doc.xref_stream_raw(xref)
+    if encoding == "jbig2":
+        globals_ref = _xref_value(doc, xref, "DecodeParms/JBIG2Globals")
+        shared = doc.xref_stream_raw(int(globals_ref.split()[0])) if globals_ref else b""
+        data = _JBIG2_FILE_HEADER + shared + data
+    elif encoding == "ccitt":
+        width = int(_xref_value(doc, xref, "Width"))
+        height = int(_xref_value(doc, xref, "Height"))
+        k = int(_xref_value(doc, xref, "DecodeParms/K") or 0)
+        black_is_1 = _xref_value(doc, xref, "DecodeParms/BlackIs1") == "true"
+        decode = (_xref_value(doc, xref, "Decode") or "").replace(" ", "")
+        data = _ccitt_tiff(data, width, height, k, black_is_1, decode.startswith("[1"))
+    return data, encoding, ext
+
+
+def _extract_image_chunk(input_pdf: str, output_dir: str, xrefs: List[int]) -> List[Tuple[int, str, int, int, str, bool, int]]:
+    # Runs inside a worker process. Files are named by content hash, so
+    # identical images found by different workers land on the same file.
+    doc = document_cache.document(input_pdf)
+    results = []
+    for xref in xrefs:
+        native = _native_image(doc, xref)
+        width = int(_xref_value(doc, xref, "Width") or 0)
+        height = int(_xref_value(doc, xref, "Height") or 0)
+        if native is not None:
+            data, encoding, ext = native
+        else:
+            info = doc.extract_image(xref)  # decodes; written losslessly (png)
+            data, encoding, ext = info["image"], info["ext"], info["ext"]
+        path = os.path.join(output_dir, f"{hashlib.sha1(data).hexdigest()[:20]}.{ext}")
+        written = 0
+        if not os.path.exists(path):
+            with atomic_output(path) as tmp, open(tmp, "wb") as f:
+                f.write(data)
+            written = len(data)
+        results.append((xref, path, width, height, encoding, native is not None, written))
+    return results
+
+
+def extract_images(
+    input_pdf: str,
+    output_dir: str,
+    pages: PageSpec = None,
+    workers: Optional[int] = None,
+    manifest: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> ImageExtractReport:
+    # JPEG, JPX, JBIG2 and CCITT (as TIFF) keep their stored bytes, the rest
+    # becomes PNG; identical contents share one file.
+    os.makedirs(output_dir, exist_ok=True)
+    doc = document_cache.document(input_pdf)
+    idxs = list(PageSet.coerce(pages or None).indices(doc.page_count, unique=True))
+    # get_images walks the page resources (including nested forms) without
+    # reading any image data; each object is kept once, in page order.
+    used_on: Dict[int, List[int]] = {}
+    references = 0
+    for i in idxs:
+        for info in doc[i].get_images(full=True):
+            references += 1
+            used_on.setdefault(info[0], [])
+            if not used_on[info[0]] or used_on[info[0]][-1] != i + 1:
+                used_on[info[0]].append(i + 1)
+    xrefs = list(used_on)
+    report = ImageExtractReport(output_dir, len(idxs), references, [], 0, 0)
+    task = Tracker(progress, cancel, len(xrefs))
+    if not xrefs:
+        return report
+
+    n = min(workers or os.cpu_count() or 1, max(1, len(xrefs) // 32))
+    chunks = _split_chunks(xrefs, min(len(xrefs), n * 8))
+    log = open(manifest, "w", encoding="utf-8") if manifest else None
+
+    def collect(results):
+        for xref, path, width, height, encoding, passthrough, written in results:
+            image = ExtractedImage(xref, used_on[xref], path, width, height, encoding, passthrough)
+            report.images.append(image)
+            report.files_written += written > 0
+            report.bytes_written += written
+            if log is not None:
+                log.write(json.dumps({**asdict(image), "path": os.path.relpath(path, output_dir)}) + "\n")
+        if log is not None:
+            log.flush()
+        task.step(len(results))
+
+    try:
+        if n <= 1:
+            for chunk in chunks:
+                task.check()
+                collect(_extract_image_chunk(input_pdf, output_dir, chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=n) as pool:
+                futures = [pool.submit(_extract_image_chunk, input_pdf, output_dir, chunk) for chunk in chunks]
+                try:
+                    for fut in futures:
+                        collect(fut.result())
+                except OperationCancelled:
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    raise
+    finally:
+        if log is not None:
+            log.close()
+    return report
+
+
+@dataclass
+class ImagesToPdfReport:
+    outputs: List[str]
+    pages: int
+    passthrough: int
+    bytes_written: int
+
+
+_EXIF_ORIENTATION = 0x0112
+_IMAGE_CHUNK = 8  # images per worker task
+
+
+def _image_dpi(img: Image.Image) -> Tuple[float, float]:
+    # PNG stores whole dots per metre, so 300 dpi comes back as 299.9994.
+    x, y = (round(float(v), 1) for v in img.info.get("dpi") or (0, 0))
+    return x if x > 1 else 72.0, y if y > 1 else 72.0
+
+
+def _oriented_placement(orientation: int, w: float, h: float) -> Tuple[_Matrix, float, float]:
+    # Image matrix and page size that show the image the way its EXIF
+    # orientation asks for, without touching the (maybe passthrough) data.
+    matrices = {
+        2: (-w, 0, 0, h, w, 0),
+        3: (-w, 0, 0, -h, w, h),
+        4: (w, 0, 0, -h, 0, h),
+        5: (0, -w, -h, 0, h, w),
+        6: (0, -w, h, 0, 0, w),
+        7: (0, w, h, 0, 0, 0),
+        8: (0, w, -h, 0, h, 0),
+    }
+    if orientation not in matrices:
+        return (w, 0, 0, h, 0, 0), w, h
+    if orientation >= 5:
+        return matrices[orientation], h, w
+    return matrices[orientation], w, h
+
+
+def _prepare_image_chunk(
+    paths: List[str], dpi: Optional[float]
+) -> List[Tuple[StreamObject, Optional[StreamObject], bool, _Matrix, float, float]]:
+    # Runs inside a worker process: decoding and compression happen here,
+    # the parent only writes the finished streams.
+    prepared = []
+    for path in paths:
+        with Image.open(path) as img:
+            xdpi, ydpi = (dpi, dpi) if dpi else _image_dpi(img)
+            orientation = img.getexif().get(_EXIF_ORIENTATION, 1)
+            w, h = img.width / xdpi * 72, img.height / ydpi * 72
+            stream, smask, passthrough = _image_payload(img, path, None, 85)
+        matrix, pw, ph = _oriented_placement(orientation, w, h)
+        prepared.append((stream, smask, passthrough, matrix, pw, ph))
+    return prepared
+
+
+def images_to_pdf(
+    images: Sequence[str],
+    output_pdf: Output,
+    dpi: Optional[float] = None,
+    pages_per_file: Optional[int] = None,
+    workers: Optional[int] = None,
+    linearize: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> ImagesToPdfReport:
+    # One page per image, sized from its resolution (72 dpi if none, or dpi);
+    # JPEGs are embedded as-is. pages_per_file splits into name-0001.pdf, ...
+    images = list(images)
+    if not images:
+        raise ValueError("Nenhuma imagem informada")
+    if pages_per_file is not None and pages_per_file < 1:
+        raise ValueError("pages_per_file deve ser maior que zero")
+    if pages_per_file and is_stream(output_pdf):
+        raise ValueError("pages_per_file requer um caminho de saída")
+    if dpi is not None and dpi <= 0:
+        raise ValueError("dpi deve ser maior que zero")
+
+    per_file = pages_per_file or len(images)
+    counts = [min(per_file, len(images) - start) for start in range(0, len(images), per_file)]
+    if pages_per_file:
+        base, ext = os.path.splitext(output_pdf)
+        outputs = [f"{base}-{k:04d}{ext or '.pdf'}" for k in range(1, len(counts) + 1)]
+    else:
+        outputs = [output_pdf]
+
+    chunks = [images[i:i + _IMAGE_CHUNK] for i in range(0, len(images), _IMAGE_CHUNK)]
+    n = min(workers or os.cpu_count() or 1, len(chunks))
+
+    def prepared():
+        if n <= 1:
+            for chunk in chunks:
+                yield from _prepare_image_chunk(chunk, dpi)
+            return
+        pool = ProcessPoolExecutor(max_workers=n)
+        try:
+            # Only 2 chunks per worker in flight: results are consumed in
+            # order and the queue never holds more than that.
+            futures = deque(pool.submit(_prepare_image_chunk, chunk, dpi) for chunk in chunks[:n * 2])
+            queued = len(futures)
+            while futures:
+                results = futures.popleft().result()
+                if queued < len(chunks):
+                    futures.append(pool.submit(_prepare_image_chunk, chunks[queued], dpi))
+                    queued += 1
+                yield from results
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
 
+    report = ImagesToPdfReport([], 0, 0, 0)
+    task = Tracker(progress, cancel, len(images))
+    source = prepared()
+    try:
+        for path, count in zip(outputs, counts):
+            with output_file(path) as raw, (tempfile.TemporaryFile() if linearize else nullcontext(raw)) as plain:
+                w = _StreamingWriter(None, task.file(plain), count)
+                for out_id in range(1, count + 1):
+                    stream, smask, passthrough, matrix, pw, ph = next(source)
+                    if smask is not None:
+                        stream[NameObject("/SMask")] = w.write_new(smask)
+                    resources = DictionaryObject({
+                        NameObject("/XObject"): DictionaryObject({NameObject("/Im0"): w.write_new(stream)}),
+                    })
+                    content = w._stream(("q %s cm /Im0 Do Q\n" % " ".join(f"{v:g}" for v in matrix)).encode())
+                    w.add_new_page(out_id, pw, ph, resources, content)
+                    report.pages += 1
+                    report.passthrough += passthrough
+                    task.step()
+                w.close(count)
+                if linearize:
+                    task.check()
+                    _save_linearized(plain, raw)
+                report.bytes_written += raw.tell()
+            report.outputs.append(path)
+    finally:
+        source.close()
+    task.finish()
+    return report
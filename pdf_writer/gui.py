@@ -24,6 +24,7 @@ from PySide6.QtWidgets import (
     QComboBox,
 )
 
+from .cache import document_cache
 from .editor import write_text, add_image, sign_pdf, rotate_pages, extract_text, merge_pdfs, split_pdf, fill_form, flatten_form
 
 
@@ -250,10 +251,10 @@ class PdfEditorWindow(QMainWindow):
             page_index = 0
         if page_index is None:
             return 72.0, 72.0
-        from pypdf import PdfReader
         if not self.current_pdf_path:
             return 72.0, 72.0
-        r = PdfReader(self.current_pdf_path)
+        # O leitor fica no cache: cliques seguidos no mesmo arquivo não o reinterpretam
+        r = document_cache.reader(self.current_pdf_path)
         page = r.pages[page_index]
         w = float(page.mediabox.width)
         h = float(page.mediabox.height)
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+# (start, stop, step) em numeração 1-based; start/stop podem ser negativos
+# (contados a partir do fim) ou None (início/fim do documento).
+Span = Tuple[Optional[int], Optional[int], int]
+
+
+class PageSet:
+    """Seleção compacta de páginas, guardada como intervalos.
+
+    Sintaxe aceita por ``PageSet.parse`` (itens separados por vírgula):
+    ``5`` página única, ``1-3`` intervalo, ``10-`` até o fim, ``-1`` última
+    página, ``-3--1`` três últimas, ``1-99:2`` intervalo com passo e ``9-1``
+    intervalo decrescente. A ordem escrita pelo usuário é preservada.
+    """
+
+    __slots__ = ("_spans",)
+
+    def __init__(self, spans: Iterable[Span] = ()):
+        self._spans: List[Span] = list(spans)
+
+    @classmethod
+    def all(cls) -> "PageSet":
+        return cls([(1, None, 1)])
+
+    @classmethod
+    def parse(cls, spec: str) -> "PageSet":
+        spans: List[Span] = []
+        for part in (p.strip() for p in spec.split(",")):
+            if not part:
+                continue
+            body, _, step_s = part.partition(":")
+            step = int(step_s) if step_s else 1
+            if step < 1:
+                raise ValueError(f"Passo inválido em '{part}'")
+            start_s, sep, stop_s = _split_range(body)
+            if not sep:
+                n = int(start_s)
+                if n == 0:
+                    raise ValueError(f"Página inválida em '{part}'")
+                spans.append((n, n, 1))
+                continue
+            start = int(start_s) if start_s else None
+            stop = int(stop_s) if stop_s else None
+            if start == 0 or stop == 0:
+                raise ValueError(f"Página inválida em '{part}'")
+            spans.append((start, stop, step))
+        return cls(spans)
+
+    @classmethod
+    def from_pages(cls, pages: Iterable[int]) -> "PageSet":
+        # Compacta sequências consecutivas (1-based) em um único intervalo.
+        spans: List[Span] = []
+        for p in pages:
+            p = int(p)
+            if spans:
+                start, stop, _ = spans[-1]
+                if stop is not None and start is not None and start > 0 and p == stop + 1:
+                    spans[-1] = (start, p, 1)
+                    continue
+            spans.append((p, p, 1))
+        return cls(spans)
+
+    @classmethod
+    def coerce(cls, pages: Union["PageSet", str, Iterable[int], None]) -> "PageSet":
+        if pages is None:
+            return cls.all()
+        if isinstance(pages, PageSet):
+            return pages
+        if isinstance(pages, str):
+            return cls.parse(pages)
+        return cls.from_pages(pages)
+
+    def __repr__(self) -> str:
+        return f"PageSet({self.spec()!r})"
+
+    def __bool__(self) -> bool:
+        return bool(self._spans)
+
+    def spec(self) -> str:
+        parts: List[str] = []
+        for start, stop, step in self._spans:
+            if start == stop:
+                parts.append(str(start))
+                continue
+            text = f"{'' if start is None else start}-{'' if stop is None else stop}"
+            parts.append(text if step == 1 else f"{text}:{step}")
+        return ",".join(parts)
+
+    def ranges(self, page_count: int) -> List[range]:
+        """Intervalos 0-based, na ordem do usuário, limitados ao documento."""
+        out: List[range] = []
+        for start, stop, step in self._spans:
+            a = _resolve(start, page_count, 1)
+            b = _resolve(stop, page_count, page_count)
+            if a <= b:
+                if a < 1:
+                    a += -(-(1 - a) // step) * step
+                r = range(a - 1, min(b, page_count), step)
+            else:
+                if a > page_count:
+                    a -= -(-(a - page_count) // step) * step
+                r = range(a - 1, max(b, 1) - 2, -step)
+            if r:
+                out.append(r)
+        return out
+
+    def indices(self, page_count: int, unique: bool = False) -> Iterator[int]:
+        if not unique:
+            for r in self.ranges(page_count):
+                yield from r
+            return
+        seen = bytearray(page_count)
+        for r in self.ranges(page_count):
+            for i in r:
+                if not seen[i]:
+                    seen[i] = 1
+                    yield i
+
+    def count(self, page_count: int) -> int:
+        return sum(len(r) for r in self.ranges(page_count))
+
+    def mask(self, page_count: int) -> bytearray:
+        # Bitset (um byte por página) para testes de pertinência em O(1).
+        bits = bytearray(page_count)
+        for r in self.ranges(page_count):
+            if r.step < 0:
+                r = r[::-1]
+            bits[r.start:r.stop:r.step] = b"\x01" * len(r)
+        return bits
+
+    def runs(self, page_count: int) -> List[range]:
+        """Intervalos 0-based ordenados e disjuntos (sem repetição)."""
+        rs = self.ranges(page_count)
+        if all(abs(r.step) == 1 for r in rs):
+            spans = sorted((min(r[0], r[-1]), max(r[0], r[-1]) + 1) for r in rs)
+            merged: List[List[int]] = []
+            for a, b in spans:
+                if merged and a <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], b)
+                else:
+                    merged.append([a, b])
+            return [range(a, b) for a, b in merged]
+        return _runs_of(self.mask(page_count), 1)
+
+    def complement(self, page_count: int) -> List[range]:
+        """Intervalos 0-based das páginas NÃO selecionadas, em ordem."""
+        out: List[range] = []
+        pos = 0
+        for r in self.runs(page_count):
+            if r.start > pos:
+                out.append(range(pos, r.start))
+            pos = r.stop
+        if pos < page_count:
+            out.append(range(pos, page_count))
+        return out
+
+    def out_of_range(self, page_count: int) -> List[int]:
+        # Páginas únicas explicitamente pedidas que não existem no documento.
+        bad: List[int] = []
+        for start, stop, _ in self._spans:
+            if start == stop and start is not None:
+                idx = _resolve(start, page_count, 1)
+                if idx < 1 or idx > page_count:
+                    bad.append(start)
+        return bad
+
+
+def _split_range(body: str) -> Tuple[str, str, str]:
+    # Um '-' inicial pertence ao número (página negativa), não ao separador.
+    i = body.find("-", 1)
+    if i == -1:
+        return body.strip(), "", ""
+    return body[:i].strip(), "-", body[i + 1:].strip()
+
+
+def _resolve(n: Optional[int], page_count: int, default: int) -> int:
+    if n is None:
+        return default
+    return page_count + n + 1 if n < 0 else n
+
+
+def _runs_of(bits: bytearray, value: int) -> List[range]:
+    on, off = bytes([value]), bytes([1 - value])
+    out: List[range] = []
+    pos = bits.find(on)
+    while pos != -1:
+        end = bits.find(off, pos)
+        if end == -1:
+            end = len(bits)
+        out.append(range(pos, end))
+        pos = bits.find(on, end)
+    return out
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import io
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Iterator, Optional, Union
+
+from .cache import document_cache
+
+# progress(páginas concluídas, total de páginas, bytes gravados)
+ProgressCallback = Callable[[int, int, int], None]
+
+# Destino de uma saída: caminho ou stream binário já aberto (ex.: stdout).
+Output = Union[str, "os.PathLike[str]", BinaryIO]
+
+# Bytes gravados entre duas chamadas de progresso (o pypdf grava token a token).
+_BYTES_STEP = 1 << 16
+
+
+class OperationCancelled(Exception):
+    """A operação foi interrompida por um CancelToken."""
+
+
+class CancelToken:
+    """Sinal de cancelamento cooperativo, com prazo opcional (segundos).
+
+    As operações verificam o token entre páginas e durante a gravação; um
+    job cancelado não deixa arquivo de saída parcial.
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self._event = threading.Event()
+        self._deadline = time.monotonic() + timeout if timeout is not None else None
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._event.is_set() and self._deadline is not None and time.monotonic() >= self._deadline:
+            self._event.set()
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise OperationCancelled("Operação cancelada")
+
+
+class Tracker:
+    # Junta callback e token de uma operação; sem eles, não faz nada.
+    def __init__(
+        self,
+        progress: Optional[ProgressCallback] = None,
+        cancel: Optional[CancelToken] = None,
+        total: int = 0,
+    ):
+        self.progress = progress
+        self.cancel = cancel
+        self.total = total
+        self.done = 0
+        self.bytes_written = 0
+        self._reported = 0
+
+    def check(self):
+        if self.cancel is not None:
+            self.cancel.raise_if_cancelled()
+
+    def _report(self):
+        if self.progress is not None:
+            self._reported = self.bytes_written
+            self.progress(self.done, self.total, self.bytes_written)
+
+    def step(self, n: int = 1):
+        self.check()
+        self.done += n
+        self._report()
+
+    def wrote(self, n: int):
+        self.bytes_written += n
+        if self.bytes_written - self._reported >= _BYTES_STEP:
+            self._report()
+
+    def finish(self):
+        if self.bytes_written != self._reported or self.done < self.total:
+            self.done = max(self.done, self.total)
+            self._report()
+
+    def file(self, f: BinaryIO) -> BinaryIO:
+        return f if self.progress is None and self.cancel is None else _TrackedFile(f, self)
+
+
+class _TrackedFile:
+    # Conta os bytes gravados e verifica o cancelamento a cada escrita.
+    def __init__(self, f: BinaryIO, tracker: Tracker):
+        self._f = f
+        self._tracker = tracker
+
+    def write(self, data) -> int:
+        self._tracker.check()
+        n = self._f.write(data)
+        self._tracker.wrote(len(data))
+        return n
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+@contextmanager
+def atomic_output(path: str) -> Iterator[str]:
+    """Entrega um caminho temporário no mesmo diretório e, se tudo correr
+    bem, o renomeia para ``path``; em caso de erro ou cancelamento, apaga-o."""
+    directory, name = os.path.split(os.path.abspath(path))
+    tmp = os.path.join(directory, f".{uuid.uuid4().hex[:8]}.{name}")  # mantém a extensão
+    try:
+        yield tmp
+        os.replace(tmp, path)
+        document_cache.invalidate(path)  # mtime pode não mudar em sistemas de arquivos de baixa resolução
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def is_stream(target) -> bool:
+    return not isinstance(target, (str, os.PathLike))
+
+
+class _PositionedOutput(io.RawIOBase):
+    # Gravação sequencial com tell(), para pipes (stdout) que não o têm:
+    # os escritores de PDF só precisam saber quantos bytes já saíram.
+    def __init__(self, f: BinaryIO):
+        super().__init__()
+        self._f = f
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._f.write(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self):
+        self._f.flush()
+
+
+@contextmanager
+def output_file(target: Output, buffering: int = 1 << 20) -> Iterator[BinaryIO]:
+    """Arquivo binário para gravar uma saída. Um caminho passa por
+    ``atomic_output``; um stream recebe os bytes diretamente, sem arquivo
+    temporário (o chamador o fecha)."""
+    if is_stream(target):
+        out = _PositionedOutput(target)
+        yield out
+        out.flush()
+        return
+    with atomic_output(target) as tmp, open(tmp, "wb", buffering=buffering) as f:
+        yield f
@@ -0,0 +1,51 @@
+import json
+import os
+import shutil
+import fitz
+from pdf_writer.batch import expand_inputs, run_batch
+
+# Create a tree of PDFs for testing
+shutil.rmtree("batch_test", ignore_errors=True)
+os.makedirs("batch_test/in/sub")
+for name, num_pages in [("a.pdf", 2), ("b.pdf", 3), ("sub/c.pdf", 1)]:
+    doc = fitz.open()
+    for i in range(num_pages):
+        doc.new_page().insert_text((50, 50), f"Page {i+1}")
+    doc.save(os.path.join("batch_test/in", name))
+    doc.close()
+
+inputs = expand_inputs(["batch_test/in/**/*.pdf"])
+assert len(inputs) == 3
+
+# Test the command runs on every file, mirroring the input tree
+result = run_batch("rotate", inputs, "batch_test/out", ["--degrees", "90"], jobs=2, show_progress=False)
+assert (result.ok, result.failed, result.skipped, result.pages) == (3, 0, 0, 6)
+doc = fitz.open("batch_test/out/sub/c.pdf")
+assert doc[0].rotation == 90
+doc.close()
+print("Batch run test passed!")
+
+# Test an interrupted run resumes from the journal
+journal = "batch_test/out/.pdf_writer_batch.jsonl"
+with open(journal, encoding="utf-8") as f:
+    entries = [json.loads(line) for line in f]
+with open(journal, "w", encoding="utf-8") as f:
+    f.write(json.dumps(entries[0]) + "\n")
+    f.write('{"input": "trunc')  # partial line left by a killed run
+result = run_batch("rotate", inputs, "batch_test/out", ["--degrees", "90"], jobs=2, show_progress=False)
+assert (result.ok, result.skipped) == (2, 1)
+
+# Different options are a different batch
+result = run_batch("rotate", inputs, "batch_test/out", ["--degrees", "180"], jobs=2, show_progress=False)
+assert (result.ok, result.skipped) == (3, 0)
+print("Batch resume test passed!")
+
+# Test commands with non-PDF output
+result = run_batch("extract-text", inputs, "batch_test/txt", jobs=1, show_progress=False)
+assert result.ok == 3
+with open("batch_test/txt/b.txt", encoding="utf-8") as f:
+    assert "Page 3" in f.read()
+print("Batch extract-text test passed!")
+
+shutil.rmtree("batch_test", ignore_errors=True)
+print("All batch tests passed!")
@@ -0,0 +1,103 @@
+import os
+import time
+from pypdf import PdfReader
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import letter
+from pdf_writer.cache import DocumentCache, document_cache
+from pdf_writer.editor import edit_text, extract_text, extract_words, number_pages, split_pdf, write_text
+
+# Create a sample PDF
+def create_test_pdf(filename="cache_test_input.pdf", num_pages=200, label="Page"):
+    c = canvas.Canvas(filename, pagesize=letter)
+    for i in range(num_pages):
+        c.drawString(100, 700, f"{label} {i+1}")
+        c.showPage()
+    c.save()
+    return filename
+
+input_pdf = create_test_pdf()
+
+# Hits, misses and LRU eviction by entry count
+cache = DocumentCache(max_entries=2)
+first = cache.reader(input_pdf)
+assert cache.reader(input_pdf) is first
+cache.document(input_pdf)  # PdfReader and fitz handles are separate entries
+stats = cache.stats()
+assert (stats.hits, stats.misses, stats.entries) == (1, 2, 2)
+assert stats.bytes == 2 * os.path.getsize(input_pdf)
+other = create_test_pdf("cache_test_other.pdf", 5)
+cache.reader(other)
+assert cache.stats().evictions == 1 and cache.stats().entries == 2
+assert cache.reader(input_pdf) is not first  # the oldest entry was evicted
+print("Cache hit/miss test passed!")
+
+# A changed file (mtime/size) is reopened; explicit invalidation drops entries
+reader = cache.reader(other)
+create_test_pdf("cache_test_other.pdf", 7)
+assert cache.reader(other) is not reader and len(cache.reader(other).pages) == 7
+cache.invalidate(other)
+assert all(key[1] != os.path.abspath(other) for key in cache._entries)
+cache.invalidate()
+assert cache.stats().entries == 0 and cache.stats().bytes == 0
+
+# Memory limit: files bigger than the budget are never kept
+small = DocumentCache(max_mb=0.001)
+small.reader(input_pdf)
+assert small.stats().entries == 0
+cache.configure(max_entries=0)
+cache.reader(input_pdf)
+assert cache.stats().entries == 0
+print("Cache invalidation test passed!")
+
+# Documents taken for editing are private handles; the cached one stays
+cache = DocumentCache()
+doc = cache.document(input_pdf)
+taken = cache.take_document(input_pdf)
+assert taken is not doc and cache.stats().entries == 1
+taken.close()
+assert not doc.is_closed and cache.document(input_pdf) is doc
+print("Cache take test passed!")
+
+# Editor operations share the process cache without modifying its handles
+document_cache.invalidate()
+write_text(input_pdf, "cache_test_text1.pdf", "Overlay", 100, 100)
+write_text(input_pdf, "cache_test_text2.pdf", "Other", 100, 100)
+text = PdfReader("cache_test_text2.pdf").pages[0].extract_text()
+assert "Other" in text and "Overlay" not in text
+number_pages(input_pdf, "cache_test_numbered.pdf")
+split_pdf(input_pdf, "1", "cache_test_split")
+shared = document_cache.reader(input_pdf)
+assert "Overlay" not in shared.pages[0].extract_text() and "/Font" in shared.pages[0]["/Resources"]
+assert extract_text(input_pdf, "1-2").split() == ["Page", "1", "Page", "2"]
+assert document_cache.stats().hits >= 4
+print("Shared reader test passed!")
+
+# A reader generator survives an edit of the same file in between
+document_cache.invalidate()
+words = extract_words(input_pdf)
+assert next(words)["page"] == 1
+edit_text(input_pdf, "cache_test_edited.pdf", 1, "Page", "Pg")
+assert [layout["page"] for layout in words] == list(range(2, 201))
+print("Reader during edit test passed!")
+
+# Outputs written by the editor are invalidated, even if mtime and size would match
+extract_text("cache_test_text1.pdf")
+write_text(input_pdf, "cache_test_text1.pdf", "Ovrlay2", 100, 100)
+assert "Ovrlay2" in extract_text("cache_test_text1.pdf", "1")
+
+# Repeated reads of a hot file skip parsing
+create_test_pdf("cache_test_big.pdf", 3000)
+document_cache.invalidate()
+start = time.perf_counter()
+next(extract_words("cache_test_big.pdf", "-1"))
+extract_text("cache_test_big.pdf", "-1")
+cold = time.perf_counter() - start
+before = document_cache.stats()
+start = time.perf_counter()
+for _ in range(5):
+    next(extract_words("cache_test_big.pdf", "-1"))
+    extract_text("cache_test_big.pdf", "-1")
+hot = (time.perf_counter() - start) / 5
+after = document_cache.stats()
+assert after.misses == before.misses and after.hits >= before.hits + 10
+print(f"Hot file test passed! (cold {cold * 1000:.0f} ms, hot {hot * 1000:.1f} ms)")
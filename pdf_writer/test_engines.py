@@ -0,0 +1,92 @@
+import os
+import time
+import fitz
+import reportlab
+from PIL import Image
+from pypdf import PdfWriter
+from pypdf.generic import RectangleObject
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import letter
+from pdf_writer.editor import add_image, sign_pdf, write_text
+
+# Create a PDF with a plain page, a rotated page and a page with an offset mediabox
+def create_test_pdf(filename="engines_test_input.pdf", num_pages=3):
+    c = canvas.Canvas(filename, pagesize=letter)
+    for i in range(num_pages):
+        c.drawString(100, 700, f"Page {i+1}")
+        c.showPage()
+    c.save()
+    writer = PdfWriter(clone_from=filename)
+    writer.pages[1].rotate(90)
+    writer.pages[2].mediabox = RectangleObject([10, 20, 622, 812])
+    writer.pages[2].rotate(270)
+    writer.write(filename)
+    return filename
+
+def render(path, index):
+    with fitz.open(path) as doc:
+        return doc[index].get_pixmap(dpi=36).samples
+
+def differing(a, b):
+    return sum(1 for p, q in zip(a, b) if abs(p - q) > 64)
+
+input_pdf = create_test_pdf()
+Image.new("RGB", (120, 60), (200, 30, 30)).save("engines_test.jpg", quality=90)
+Image.new("RGBA", (80, 80), (30, 30, 200, 128)).save("engines_test.png")
+
+# Both engines put the same marks at the same user-space coordinates, on every page
+for i in range(3):
+    write_text(input_pdf, f"engines_test_text_overlay{i}.pdf", "Engine check", 150, 300, page=i + 1, font_size=24, color="red")
+    write_text(input_pdf, f"engines_test_text_direct{i}.pdf", "Engine check", 150, 300, page=i + 1, font_size=24, color="red", engine="direct")
+    overlay = render(f"engines_test_text_overlay{i}.pdf", i)
+    direct = render(f"engines_test_text_direct{i}.pdf", i)
+    assert differing(overlay, direct) < 30, i
+    assert differing(overlay, render(input_pdf, i)) > 30
+    words = fitz.open(f"engines_test_text_direct{i}.pdf")[i].get_text()
+    assert "Engine check" in words and f"Page {i+1}" in words
+print("Direct text engine test passed!")
+
+for i in range(3):
+    for image in ("engines_test.jpg", "engines_test.png"):
+        a = add_image(input_pdf, "engines_test_img_overlay.pdf", image, 200, 100, width=150, page=i + 1)
+        b = add_image(input_pdf, "engines_test_img_direct.pdf", image, 200, 100, width=150, page=i + 1, engine="direct")
+        assert differing(render("engines_test_img_overlay.pdf", i), render("engines_test_img_direct.pdf", i)) < 30, (i, image)
+        assert a.passthrough == b.passthrough == image.endswith(".jpg")
+        assert b.source_size == b.embedded_size == a.embedded_size
+print("Direct image engine test passed!")
+
+# Downsampling and signatures work with the direct engine too
+report = add_image(input_pdf, "engines_test_dpi.pdf", "engines_test.jpg", 50, 50, width=36, dpi=72, engine="direct")
+assert report.embedded_size == (36, 18) and not report.passthrough
+sign_pdf(input_pdf, "engines_test_sign_overlay.pdf", "engines_test.png")
+sign_pdf(input_pdf, "engines_test_sign_direct.pdf", "engines_test.png", engine="direct")
+assert differing(render("engines_test_sign_overlay.pdf", 2), render("engines_test_sign_direct.pdf", 2)) < 30
+print("Direct signature test passed!")
+
+# TTF fonts are embedded by the direct engine
+vera = os.path.join(os.path.dirname(reportlab.__file__), "fonts", "Vera.ttf")
+write_text(input_pdf, "engines_test_ttf.pdf", "Vera text", 100, 100, font_name=vera, engine="direct")
+with fitz.open("engines_test_ttf.pdf") as doc:
+    assert "Vera text" in doc[0].get_text() and any("Vera" in f[3] for f in doc[0].get_fonts())
+print("Direct TTF test passed!")
+
+# Benchmark: one text overlay and one image on a long document
+c = canvas.Canvas("engines_test_big.pdf", pagesize=letter)
+for i in range(2000):
+    c.drawString(100, 700, f"Big page {i+1}")
+    c.showPage()
+c.save()
+timings = {}
+for engine in ("overlay", "direct"):
+    start = time.perf_counter()
+    for k in range(3):
+        write_text("engines_test_big.pdf", "engines_test_big_out.pdf", "Bench", 100, 100, page=k + 1, engine=engine)
+        add_image("engines_test_big.pdf", "engines_test_big_out.pdf", "engines_test.jpg", 100, 200, page=k + 1, engine=engine)
+    timings[engine] = time.perf_counter() - start
+print(f"Benchmark (2000 pages, 6 edits): overlay {timings['overlay']:.2f}s, direct {timings['direct']:.2f}s")
+
+try:
+    write_text(input_pdf, "engines_test_bad.pdf", "x", 0, 0, engine="fast")
+    assert False
+except ValueError:
+    print("Invalid engine test passed!")
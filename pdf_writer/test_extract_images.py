@@ -0,0 +1,125 @@
+import io
+import json
+import os
+import shutil
+import fitz
+from PIL import Image, ImageDraw, ImageOps
+from pypdf import PdfWriter
+from pypdf.generic import DictionaryObject, NameObject, NumberObject, StreamObject
+from pdf_writer.editor import extract_images
+
+# Images: a JPEG shared by every page, a distinct JPEG per page and a PNG
+def create_test_pdf(filename="extract_images_test_input.pdf", num_pages=40):
+    logo = io.BytesIO()
+    Image.new("RGB", (50, 20), (200, 30, 30)).save(logo, "JPEG")
+    art = io.BytesIO()
+    Image.new("RGBA", (30, 30), (0, 90, 200, 200)).save(art, "PNG")
+    doc = fitz.open()
+    logo_xref = 0
+    for i in range(num_pages):
+        page = doc.new_page()
+        if logo_xref:
+            page.insert_image(fitz.Rect(10, 10, 60, 30), xref=logo_xref)
+        else:
+            logo_xref = page.insert_image(fitz.Rect(10, 10, 60, 30), stream=logo.getvalue())
+        scan = io.BytesIO()
+        Image.new("L", (40 + i, 40), i * 5).save(scan, "JPEG", quality=90)
+        page.insert_image(fitz.Rect(100, 100, 300, 300), stream=scan.getvalue())
+        if i in (0, 1):
+            page.insert_image(fitz.Rect(300, 300, 330, 330), stream=art.getvalue())
+    doc.save(filename)
+    doc.close()
+    return filename, logo.getvalue()
+
+input_pdf, logo_bytes = create_test_pdf()
+# Existing files are never rewritten: start from empty output directories
+for out_dir in ("extract_images_out", "extract_images_par", "extract_images_sub", "extract_images_dup", "extract_images_ccitt", "extract_images_jbig2"):
+    shutil.rmtree(out_dir, ignore_errors=True)
+report = extract_images(input_pdf, "extract_images_out", workers=1, manifest="extract_images_manifest.jsonl")
+assert report.pages_scanned == 40 and report.references == 40 + 40 + 2
+assert len(report.images) == 1 + 40 + 1 and report.duplicates == 0 and report.files_written == 42
+files = os.listdir("extract_images_out")
+assert len(files) == 42 and sum(f.endswith(".jpg") for f in files) == 41
+
+# JPEGs are the stored bytes, untouched; the shared logo is listed once with all its pages
+logo = next(img for img in report.images if img.width == 50)
+assert logo.pages == list(range(1, 41)) and logo.encoding == "jpeg" and logo.passthrough
+with open(logo.path, "rb") as f:
+    assert f.read() == logo_bytes
+png = next(img for img in report.images if img.encoding == "png")
+assert png.pages == [1, 2] and not png.passthrough and Image.open(png.path).size == (30, 30)
+entries = [json.loads(line) for line in open("extract_images_manifest.jsonl")]
+assert len(entries) == 42 and entries[0]["path"] == os.path.basename(report.images[0].path)
+print("Extract images test passed!")
+
+# The process pool gives the same files; a page selection limits the scan
+parallel = extract_images(input_pdf, "extract_images_par", workers=2)
+assert sorted(os.listdir("extract_images_par")) == sorted(files)
+subset = extract_images(input_pdf, "extract_images_sub", pages="5-6")
+assert subset.pages_scanned == 2 and len(subset.images) == 3 and subset.images[0].pages == [5, 6]
+print("Parallel extraction test passed!")
+
+# Raw image objects: CCITT G4 and JBIG2 streams are written without decoding,
+# and separate objects with the same bytes share one file
+def raw_image_pdf(filename, data, filter_name, parms, width, height, bpc=1, copies=1):
+    writer = PdfWriter()
+    page = writer.add_blank_page(200, 200)
+    xobjects = DictionaryObject()
+    for n in range(copies):
+        img = StreamObject()
+        img._data = data
+        img.update({
+            NameObject("/Type"): NameObject("/XObject"),
+            NameObject("/Subtype"): NameObject("/Image"),
+            NameObject("/Width"): NumberObject(width),
+            NameObject("/Height"): NumberObject(height),
+            NameObject("/ColorSpace"): NameObject("/DeviceGray"),
+            NameObject("/BitsPerComponent"): NumberObject(bpc),
+            NameObject("/Filter"): NameObject(filter_name),
+            NameObject("/DecodeParms"): parms,
+        })
+        xobjects[NameObject(f"/Im{n}")] = writer._add_object(img)
+    content = StreamObject()
+    content._data = b"".join(b"q 200 0 0 100 0 %d cm /Im%d Do Q " % (n * 100, n) for n in range(copies))
+    page[NameObject("/Resources")] = DictionaryObject({NameObject("/XObject"): xobjects})
+    page[NameObject("/Contents")] = writer._add_object(content)
+    writer.write(filename)
+
+gray = io.BytesIO()
+Image.new("L", (20, 10), 90).save(gray, "JPEG")
+raw_image_pdf("extract_images_dup.pdf", gray.getvalue(), "/DCTDecode", DictionaryObject(), 20, 10, bpc=8, copies=2)
+dup = extract_images("extract_images_dup.pdf", "extract_images_dup")
+assert len(dup.images) == 2 and dup.images[0].xref != dup.images[1].xref
+assert dup.duplicates == 1 and dup.files_written == 1 and dup.bytes_written == len(gray.getvalue())
+
+bilevel = Image.new("1", (64, 32), 1)
+ImageDraw.Draw(bilevel).rectangle((10, 5, 40, 20), fill=0)
+tiff = io.BytesIO()
+# Pillow writes BlackIsZero fax data; invert so the PDF's white-is-zero default shows the drawing
+ImageOps.invert(bilevel.convert("L")).convert("1").save(tiff, "TIFF", compression="group4")
+strip = Image.open(io.BytesIO(tiff.getvalue()))
+offset, length = strip.tag_v2[273][0], strip.tag_v2[279][0]
+g4 = tiff.getvalue()[offset:offset + length]
+parms = DictionaryObject({
+    NameObject("/K"): NumberObject(-1),
+    NameObject("/Columns"): NumberObject(64),
+    NameObject("/Rows"): NumberObject(32),
+})
+raw_image_pdf("extract_images_ccitt.pdf", g4, "/CCITTFaxDecode", parms, 64, 32)
+ccitt = extract_images("extract_images_ccitt.pdf", "extract_images_ccitt")
+image = ccitt.images[0]
+assert image.encoding == "ccitt" and image.passthrough and image.path.endswith(".tif")
+extracted = Image.open(image.path)
+assert extracted.info.get("compression") == "group4"
+assert list(extracted.convert("L").getdata()) == list(bilevel.convert("L").getdata())
+# the PDF shows the same pixels as the extracted TIFF
+shown = fitz.open("extract_images_ccitt.pdf")[0].get_pixmap(clip=fitz.Rect(0, 100, 200, 200), dpi=72)
+assert shown.pixel(80, 40)[0] < 128 and shown.pixel(5, 5)[0] > 128
+print("CCITT and duplicate extraction test passed!")
+
+raw_image_pdf("extract_images_jbig2.pdf", b"\x00\x00\x00\x01page-segments", "/JBIG2Decode", DictionaryObject(), 64, 32)
+jbig2 = extract_images("extract_images_jbig2.pdf", "extract_images_jbig2")
+with open(jbig2.images[0].path, "rb") as f:
+    data = f.read()
+assert data.startswith(b"\x97JBIG2\r\n\x1a\n") and data.endswith(b"page-segments")
+print("JBIG2 extraction test passed!")
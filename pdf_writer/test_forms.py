@@ -0,0 +1,57 @@
+import fitz
+from pdf_writer.editor import fill_form, flatten_form
+
+# Create a form PDF with text, checkbox and combo box fields on each page
+def create_form_pdf(filename="form_test_input.pdf", num_pages=3):
+    doc = fitz.open()
+    for p in range(num_pages):
+        page = doc.new_page()
+        for name, kind, rect in [
+            (f"name{p}", fitz.PDF_WIDGET_TYPE_TEXT, (50, 50, 250, 70)),
+            (f"agree{p}", fitz.PDF_WIDGET_TYPE_CHECKBOX, (50, 80, 65, 95)),
+            (f"color{p}", fitz.PDF_WIDGET_TYPE_COMBOBOX, (50, 100, 200, 120)),
+        ]:
+            widget = fitz.Widget()
+            widget.field_name = name
+            widget.field_type = kind
+            widget.rect = fitz.Rect(rect)
+            if kind == fitz.PDF_WIDGET_TYPE_COMBOBOX:
+                widget.choice_values = ["Red", "Green", "Blue"]
+            page.add_widget(widget)
+    doc.save(filename)
+    doc.close()
+    return filename
+
+input_pdf = create_form_pdf()
+
+# Test fill keeps the widgets with the new values
+fill_form(input_pdf, "form_test_filled.pdf", {"name0": "Fulano", "agree1": True, "color2": "Blue"})
+doc = fitz.open("form_test_filled.pdf")
+values = {w.field_name: w.field_value for page in doc for w in page.widgets()}
+assert values["name0"] == "Fulano" and values["color2"] == "Blue"
+assert values["agree1"] not in ("Off", False) and values["agree0"] in ("Off", False)
+doc.close()
+fill_form("form_test_filled.pdf", "form_test_unchecked.pdf", {"agree1": "/Off"})
+with fitz.open("form_test_unchecked.pdf") as doc:
+    assert [w.field_value for w in doc[1].widgets() if w.field_name == "agree1"] in (["Off"], [False])
+print("Fill form test passed!")
+
+# Test flattening keeps the filled values as page content
+fill_form(input_pdf, "form_test_flat.pdf", {"name0": "Fulano", "name2": "Beltrano", "color2": "Blue"}, flatten=True)
+doc = fitz.open("form_test_flat.pdf")
+assert not doc.is_form_pdf
+assert all(not list(page.widgets()) for page in doc)
+assert "Fulano" in doc[0].get_text()
+assert "Beltrano" in doc[2].get_text() and "Blue" in doc[2].get_text()
+doc.close()
+print("Fill and flatten test passed!")
+
+# Test flatten_form on a previously filled form
+flatten_form("form_test_filled.pdf", "form_test_flattened.pdf")
+doc = fitz.open("form_test_flattened.pdf")
+assert not list(doc[0].widgets())
+assert "Fulano" in doc[0].get_text()
+doc.close()
+print("Flatten form test passed!")
+
+print("All form tests passed!")
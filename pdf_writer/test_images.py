@@ -0,0 +1,75 @@
+import os
+import fitz
+from PIL import Image
+from pdf_writer.editor import add_image, sign_pdf
+
+# Create a blank PDF and a few test images
+def create_test_pdf(filename="images_test_input.pdf", num_pages=2):
+    doc = fitz.open()
+    for i in range(num_pages):
+        page = doc.new_page()
+        page.insert_text((50, 50), f"Page {i+1}")
+    doc.save(filename)
+    doc.close()
+    return filename
+
+def embedded_images(path, page_index=0):
+    doc = fitz.open(path)
+    images = []
+    for xref, smask, w, h, *_ in doc[page_index].get_images(full=True):
+        images.append((doc.xref_stream_raw(xref), smask, w, h))
+    doc.close()
+    return images
+
+input_pdf = create_test_pdf()
+photo = Image.new("RGB", (2400, 1800))
+for i in range(0, 2400, 40):
+    photo.paste((i % 256, 80, 255 - i % 256), (i, 0, i + 20, 1800))
+photo.save("images_test_photo.jpg", quality=90)
+logo = Image.new("RGBA", (300, 100), (255, 0, 0, 0))
+logo.paste((0, 0, 255, 255), (50, 25, 250, 75))
+logo.save("images_test_logo.png")
+
+# JPEG is embedded byte-for-byte when no resampling is needed
+report = add_image(input_pdf, "images_test_passthrough.pdf", "images_test_photo.jpg", 50, 400, width=400)
+assert report.passthrough
+assert report.embedded_bytes == os.path.getsize("images_test_photo.jpg")
+with open("images_test_photo.jpg", "rb") as f:
+    original = f.read()
+(data, smask, w, h), = embedded_images("images_test_passthrough.pdf")
+assert data == original and (w, h) == (2400, 1800)
+assert os.path.getsize("images_test_passthrough.pdf") < len(original) + 4096
+doc = fitz.open("images_test_passthrough.pdf")
+rect = doc[0].get_image_rects(doc[0].get_images()[0][0])[0]
+assert abs(rect.width - 400) < 0.5 and abs(rect.height - 300) < 0.5
+doc.close()
+print("JPEG passthrough test passed!")
+
+# Target DPI downsamples to the placed size: 400pt at 72 dpi is 400 px
+report = add_image(input_pdf, "images_test_downsampled.pdf", "images_test_photo.jpg", 50, 400, width=400, dpi=72)
+assert not report.passthrough
+assert report.embedded_size == (400, 300)
+assert report.bytes_saved > 0
+(data, smask, w, h), = embedded_images("images_test_downsampled.pdf")
+assert (w, h) == (400, 300)
+assert os.path.getsize("images_test_downsampled.pdf") < os.path.getsize("images_test_passthrough.pdf") / 4
+print("Downsampling test passed!")
+
+# PNG with transparency keeps its alpha as a soft mask
+report = add_image(input_pdf, "images_test_logo.pdf", "images_test_logo.png", 100, 100, page=2)
+assert not report.passthrough and report.embedded_size == (300, 100)
+(data, smask, w, h), = embedded_images("images_test_logo.pdf", 1)
+assert smask != 0
+assert embedded_images("images_test_logo.pdf", 0) == []
+print("PNG alpha test passed!")
+
+# Signature on the last page, bottom-right corner
+report = sign_pdf(input_pdf, "images_test_signed.pdf", "images_test_photo.jpg", width=180)
+assert report.passthrough
+doc = fitz.open("images_test_signed.pdf")
+page = doc[-1]
+rect = page.get_image_rects(page.get_images()[0][0])[0]
+assert abs(rect.x1 - (page.rect.width - 36)) < 0.5 and abs(rect.y1 - (page.rect.height - 36)) < 0.5
+assert "Page 2" in page.get_text()
+doc.close()
+print("Sign test passed!")
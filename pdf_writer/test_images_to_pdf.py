@@ -0,0 +1,103 @@
+import os
+import time
+import fitz
+from PIL import Image, ImageOps
+from pypdf import PdfReader
+from pdf_writer.editor import images_to_pdf
+from pdf_writer.progress import CancelToken, OperationCancelled
+
+def render(path, index, dpi=72):
+    with fitz.open(path) as doc:
+        pix = doc[index].get_pixmap(dpi=dpi)
+        return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+def differing(a, b):
+    return sum(1 for p, q in zip(a.convert("L").getdata(), b.convert("L").getdata()) if abs(p - q) > 64)
+
+# A JPEG with a resolution, a JPEG without one and a PNG with transparency
+photo = Image.new("RGB", (600, 300), (200, 30, 30))
+photo.paste((30, 30, 200), (0, 0, 300, 150))
+photo.save("i2p_test_300dpi.jpg", quality=90, dpi=(300, 300))
+photo.save("i2p_test_nodpi.jpg", quality=90)
+Image.new("RGBA", (144, 72), (30, 200, 30, 128)).save("i2p_test_alpha.png", dpi=(144, 144))
+
+report = images_to_pdf(["i2p_test_300dpi.jpg", "i2p_test_nodpi.jpg", "i2p_test_alpha.png"], "i2p_test.pdf", workers=1)
+assert report.outputs == ["i2p_test.pdf"] and report.pages == 3 and report.passthrough == 2
+assert report.bytes_written == os.path.getsize("i2p_test.pdf")
+
+# Page size follows the image resolution; 72 dpi when the file has none
+doc = fitz.open("i2p_test.pdf")
+assert doc[0].rect == fitz.Rect(0, 0, 144, 72)
+assert doc[1].rect == fitz.Rect(0, 0, 600, 300)
+assert doc[2].rect == fitz.Rect(0, 0, 72, 36)
+print("Page size test passed!")
+
+# JPEGs are embedded byte for byte; the PNG keeps its alpha as an SMask
+with open("i2p_test_300dpi.jpg", "rb") as f:
+    assert doc.xref_stream_raw(doc[0].get_images()[0][0]) == f.read()
+assert doc.xref_get_key(doc[2].get_images()[0][0], "SMask")[0] == "xref"
+assert differing(render("i2p_test.pdf", 1), photo) < 100
+doc.close()
+print("JPEG passthrough test passed!")
+
+# An explicit dpi overrides the files
+report = images_to_pdf(["i2p_test_300dpi.jpg", "i2p_test_alpha.png"], "i2p_test_dpi.pdf", dpi=150, workers=1)
+assert [tuple(p.mediabox) for p in PdfReader("i2p_test_dpi.pdf").pages] == [(0, 0, 288, 144), (0, 0, 69.12, 34.56)]
+print("Explicit dpi test passed!")
+
+# EXIF orientation turns the page without re-encoding the JPEG
+for orientation in range(1, 9):
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    photo.save(f"i2p_test_exif{orientation}.jpg", quality=90, exif=exif)
+report = images_to_pdf([f"i2p_test_exif{o}.jpg" for o in range(1, 9)], "i2p_test_exif.pdf", workers=1)
+assert report.passthrough == 8
+for o in range(1, 9):
+    with Image.open(f"i2p_test_exif{o}.jpg") as img:
+        expected = ImageOps.exif_transpose(img)
+    page = render("i2p_test_exif.pdf", o - 1)
+    assert page.size == expected.size, o
+    assert differing(page, expected) < 100, o
+print("EXIF orientation test passed!")
+
+# Many images, prepared by worker processes and split into several files
+for i in range(10):
+    Image.new("L", (50 + i, 40), i * 20).save(f"i2p_test_many{i}.png")
+many = [f"i2p_test_many{i % 10}.png" for i in range(1000)]
+start = time.perf_counter()
+report = images_to_pdf(many, "i2p_test_many.pdf", pages_per_file=300, workers=4)
+elapsed = time.perf_counter() - start
+assert report.outputs == [f"i2p_test_many-{k:04d}.pdf" for k in range(1, 5)] and report.pages == 1000
+counts = [len(PdfReader(path).pages) for path in report.outputs]
+assert counts == [300, 300, 300, 100]
+last = PdfReader("i2p_test_many-0004.pdf").pages[-1]
+assert tuple(last.mediabox) == (0, 0, 59, 40)
+print(f"Split output test passed! ({elapsed:.2f}s for 1000 images)")
+
+# Linearized output, split into several files too
+report = images_to_pdf(many[:20], "i2p_test_linear.pdf", pages_per_file=15, workers=1, linearize=True)
+for path in report.outputs:
+    with open(path, "rb") as f:
+        assert b"/Linearized" in f.read(1024)
+assert [len(PdfReader(path).pages) for path in report.outputs] == [15, 5]
+assert report.bytes_written == sum(os.path.getsize(path) for path in report.outputs)
+print("Linearize test passed!")
+
+# Cancelling leaves no partial output behind
+token = CancelToken()
+def stop(done, total, written):
+    if done == 50:
+        token.cancel()
+try:
+    images_to_pdf(many, "i2p_test_cancel.pdf", workers=2, progress=stop, cancel=token)
+    assert False
+except OperationCancelled:
+    assert not os.path.exists("i2p_test_cancel.pdf")
+    assert not [f for f in os.listdir(".") if f.endswith("i2p_test_cancel.pdf")]
+    print("Cancel test passed!")
+
+try:
+    images_to_pdf([], "i2p_test_empty.pdf")
+    assert False
+except ValueError:
+    print("Empty input test passed!")
@@ -0,0 +1,96 @@
+import time
+import fitz
+from pypdf import PdfReader
+from pdf_writer.editor import impose_pdf
+
+# Create a PDF whose pages share one font and one image, with a rotated page
+def create_test_pdf(filename="impose_test_input.pdf", num_pages=10):
+    doc = fitz.open()
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 40, 40), False)
+    pix.set_rect(pix.irect, (255, 0, 0))
+    xref = 0
+    for i in range(num_pages):
+        page = doc.new_page(width=300, height=400)
+        page.insert_text((30, 50), f"Source page {i+1}")
+        if xref:
+            page.insert_image(fitz.Rect(30, 300, 70, 340), xref=xref)
+        else:
+            xref = page.insert_image(fitz.Rect(30, 300, 70, 340), pixmap=pix)
+    doc[2].set_rotation(90)
+    doc.save(filename)
+    doc.close()
+    return filename
+
+input_pdf = create_test_pdf()
+
+# 2-up: two pages side by side, padded with an empty cell at the end
+sheets = impose_pdf(input_pdf, "impose_test_2up.pdf")
+assert sheets == 5
+doc = fitz.open("impose_test_2up.pdf")
+assert doc[0].rect == fitz.Rect(0, 0, 600, 400)
+text = doc[0].get_text("words")
+left = next(w for w in text if w[4] == "1")
+right = next(w for w in text if w[4] == "2")
+assert left[0] < 300 < right[0] and abs(left[1] - right[1]) < 0.01
+assert doc[1].get_text().count("Source page") == 2 and "Source page 3" in doc[1].get_text()
+
+# Every placement reuses one shared image and font, and no page content is rasterized
+reader = PdfReader("impose_test_2up.pdf")
+images, fonts, forms = set(), set(), set()
+for sheet in reader.pages:
+    for ref in sheet["/Resources"]["/XObject"].values():
+        forms.add(ref.idnum)
+        form = ref.get_object()
+        images.update(r.idnum for r in form["/Resources"]["/XObject"].values())
+        fonts.update(r.idnum for r in form["/Resources"]["/Font"].values())
+assert len(forms) == 10 and len(images) == 1 and len(fonts) == 1
+print("2-up test passed!")
+
+# The rotated source page is shown upright-as-displayed, scaled into its cell
+rotated = doc[1].get_text("dict")["blocks"]
+line = next(l for b in rotated for l in b["lines"] if "Source page 3" in "".join(s["text"] for s in l["spans"]))
+assert line["dir"] != (1.0, 0.0)
+doc.close()
+
+# 4-up with margins on a fixed sheet; a page selection limits the input
+sheets = impose_pdf(input_pdf, "impose_test_4up.pdf", layout="4up", pages="1-5", sheet_size=(595, 842), margin=20)
+doc = fitz.open("impose_test_4up.pdf")
+assert sheets == 2 and doc[0].rect == fitz.Rect(0, 0, 595, 842)
+assert doc[1].get_text().split() == ["Source", "page", "5"]
+for word in doc[0].get_text("words"):
+    assert 20 <= word[0] and word[2] <= 575
+doc.close()
+print("4-up test passed!")
+
+# Booklet: 10 pages pad to 12 and fold as (12,1) (2,11) (10,3) ...
+sheets = impose_pdf(input_pdf, "impose_test_booklet.pdf", layout="booklet")
+doc = fitz.open("impose_test_booklet.pdf")
+assert sheets == 6
+order = []
+for page in doc:
+    cells = [None, None]
+    for w in page.get_text("words"):
+        if w[4].isdigit():
+            cells[0 if w[0] < 300 else 1] = int(w[4])
+    order.append(tuple(cells))
+assert order == [(None, 1), (2, None), (10, 3), (4, 9), (8, 5), (6, 7)]
+doc.close()
+print("Booklet test passed!")
+
+# Large runs stay fast: forms are built once per page, content is not re-encoded
+big = fitz.open()
+for i in range(5000):
+    big.new_page(width=300, height=400).insert_text((30, 50), f"Big page {i+1}")
+big.save("impose_test_big.pdf")
+big.close()
+start = time.perf_counter()
+assert impose_pdf("impose_test_big.pdf", "impose_test_big_out.pdf", layout="4up") == 1250
+elapsed = time.perf_counter() - start
+assert "Big page 5000" in fitz.open("impose_test_big_out.pdf")[-1].get_text()
+print(f"Large imposition test passed! ({elapsed:.2f}s)")
+
+try:
+    impose_pdf(input_pdf, "impose_test_bad.pdf", layout="9up")
+    assert False
+except ValueError:
+    print("Invalid layout test passed!")
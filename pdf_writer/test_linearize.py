@@ -0,0 +1,44 @@
+import os
+import fitz
+from pdf_writer.editor import (
+    linearize_pdf,
+    check_linearization,
+    first_page_bytes,
+    rotate_pages,
+    merge_pdfs,
+    fill_form,
+)
+
+# Create a multi-page PDF for testing
+def create_test_pdf(filename="linearize_test_input.pdf", num_pages=50):
+    doc = fitz.open()
+    for i in range(num_pages):
+        page = doc.new_page()
+        page.insert_text((50, 50), f"Page {i+1} " + "lorem ipsum " * 40, fontsize=8)
+    doc.save(filename)
+    doc.close()
+    return filename
+
+input_pdf = create_test_pdf()
+assert not check_linearization(input_pdf)
+assert first_page_bytes(input_pdf) == os.path.getsize(input_pdf)
+
+# Test standalone linearization
+linearize_pdf(input_pdf, "linearize_test_output.pdf")
+assert check_linearization("linearize_test_output.pdf")
+assert first_page_bytes("linearize_test_output.pdf") < os.path.getsize("linearize_test_output.pdf") / 10
+doc = fitz.open("linearize_test_output.pdf")
+assert doc.page_count == 50 and "Page 50" in doc[49].get_text()
+doc.close()
+print("Linearize test passed!")
+
+# Test the linearize option on pypdf and PyMuPDF write paths
+rotate_pages(input_pdf, "linearize_test_rotated.pdf", 90, "1", linearize=True)
+assert check_linearization("linearize_test_rotated.pdf")
+merge_pdfs([input_pdf, input_pdf], "linearize_test_merged.pdf", linearize=True)
+assert check_linearization("linearize_test_merged.pdf")
+fill_form(input_pdf, "linearize_test_filled.pdf", {}, linearize=True)
+assert check_linearization("linearize_test_filled.pdf")
+print("Linearize option test passed!")
+
+print("All linearization tests passed!")
@@ -0,0 +1,61 @@
+import os
+import fitz
+import reportlab
+from PIL import Image
+from pypdf import PdfReader
+from pdf_writer.editor import merge_pdfs
+
+FONT = os.path.join(os.path.dirname(reportlab.__file__), "fonts", "Vera.ttf")
+
+# Create documents from the same "template": embedded font, logo and a boilerplate last page
+logo = Image.new("RGB", (400, 200))
+for i in range(0, 400, 8):
+    logo.paste((i % 256, 120, 255 - i % 256), (i, 0, i + 4, 200))
+logo.save("merge_test_logo.png")
+
+def create_template_pdf(filename, n):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_font(fontname="vera", fontfile=FONT)
+    page.insert_image(fitz.Rect(50, 50, 250, 150), filename="merge_test_logo.png")
+    page.insert_text((50, 200), f"Invoice {n}", fontname="vera", fontfile=FONT)
+    terms = doc.new_page()
+    terms.insert_text((50, 50), "Terms and conditions " * 3, fontname="vera", fontfile=FONT)
+    doc.save(filename)
+    doc.close()
+    return filename
+
+inputs = [create_template_pdf(f"merge_test_input_{n}.pdf", n) for n in range(20)]
+single = os.path.getsize(inputs[0])
+
+# Plain merge carries one copy of the font and logo per input
+report = merge_pdfs(inputs, "merge_test_plain.pdf")
+assert report.pages == 40 and report.objects_shared == 0
+plain = os.path.getsize("merge_test_plain.pdf")
+assert plain > single * 15
+
+# Dedupe shares identical streams: size grows with unique content only
+report = merge_pdfs(inputs, "merge_test_dedupe.pdf", dedupe=True)
+assert report.pages == 40 and report.pages_dropped == 0
+assert report.objects_shared > 0 and report.bytes_shared > single * 15
+assert report.output_bytes == os.path.getsize("merge_test_dedupe.pdf")
+assert report.output_bytes < single * 3
+reader = PdfReader("merge_test_dedupe.pdf")
+assert len(reader.pages) == 40
+assert "Invoice 7" in reader.pages[14].extract_text()
+assert "Terms and conditions" in reader.pages[39].extract_text()
+images = {p["/Resources"]["/XObject"].raw_get(k).idnum for p in reader.pages[::2] for k in p["/Resources"]["/XObject"]}
+assert len(images) == 1
+doc = fitz.open("merge_test_dedupe.pdf")
+assert doc[38].get_pixmap(dpi=30).samples == fitz.open(inputs[19])[0].get_pixmap(dpi=30).samples
+doc.close()
+print("Merge dedupe test passed!")
+
+# Repeated identical pages can be dropped
+report = merge_pdfs(inputs, "merge_test_drop.pdf", drop_duplicate_pages=True)
+assert report.pages == 21 and report.pages_dropped == 19
+texts = [page.extract_text() for page in PdfReader("merge_test_drop.pdf").pages]
+assert "Terms and conditions" in texts[1]
+assert sum("Terms" in t for t in texts) == 1
+assert "Invoice 19" in texts[-1]
+print("Merge drop duplicate pages test passed!")
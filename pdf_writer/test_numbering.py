@@ -0,0 +1,52 @@
+import os
+import fitz
+from pdf_writer.editor import number_pages, bates_number
+
+# Create a multi-page PDF for testing
+def create_test_pdf(filename, num_pages):
+    doc = fitz.open()
+    for i in range(num_pages):
+        page = doc.new_page()
+        page.insert_text((50, 50), f"Page {i+1}", fontsize=12)
+    doc.save(filename)
+    doc.close()
+    return filename
+
+# Test template with page/total and selection
+input_pdf = create_test_pdf("numbering_test_input.pdf", 4)
+next_number = number_pages(input_pdf, "numbering_test_output.pdf", template="Página {page} de {total}", pages="2-")
+assert next_number == 4
+doc = fitz.open("numbering_test_output.pdf")
+assert "Página" not in doc[0].get_text()
+assert "Página 3 de 4" in doc[2].get_text()
+assert "Page 3" in doc[2].get_text()
+doc.close()
+print("Number pages test passed!")
+
+# Test Bates numbering continues across files
+part1 = create_test_pdf("bates_part1.pdf", 2)
+part2 = create_test_pdf("bates_part2.pdf", 3)
+next_number = bates_number([part1, part2], "bates_out", prefix="ABC", start=10, digits=6)
+assert next_number == 15
+doc = fitz.open(os.path.join("bates_out", "bates_part2.pdf"))
+assert [p.get_text("words")[-1][4] for p in doc] == ["ABC000012", "ABC000013", "ABC000014"]
+doc.close()
+print("Bates numbering test passed!")
+
+# Test inputs with the same name in different folders keep separate outputs
+for folder, pages in (("bates_a", 1), ("bates_b", 2)):
+    os.makedirs(folder, exist_ok=True)
+    create_test_pdf(os.path.join(folder, "x.pdf"), pages)
+next_number = bates_number(["bates_a/x.pdf", "bates_b/x.pdf"], "bates_same", prefix="ABC", digits=3)
+assert next_number == 4
+with fitz.open(os.path.join("bates_same", "bates_b", "x.pdf")) as doc:
+    assert [p.get_text("words")[-1][4] for p in doc] == ["ABC002", "ABC003"]
+assert os.path.exists(os.path.join("bates_same", "bates_a", "x.pdf"))
+try:
+    bates_number(["bates_a/x.pdf", "bates_a/x.pdf"], "bates_twice")
+    assert False
+except ValueError:
+    assert not os.path.exists("bates_twice")
+print("Bates same file name test passed!")
+
+print("All numbering tests passed!")
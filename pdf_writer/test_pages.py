@@ -0,0 +1,59 @@
+import fitz
+from pdf_writer.pages import PageSet
+from pdf_writer.editor import delete_pages, reorder_pages, rotate_pages, extract_text
+
+# Test parsing and resolution against a 10-page document
+assert list(PageSet.parse("1-3,5").indices(10)) == [0, 1, 2, 4]
+assert list(PageSet.parse("5,1-2").indices(10)) == [4, 0, 1]
+assert list(PageSet.parse("8-").indices(10)) == [7, 8, 9]
+assert list(PageSet.parse("-1").indices(10)) == [9]
+assert list(PageSet.parse("-3--1").indices(10)) == [7, 8, 9]
+assert list(PageSet.parse("1-9:4").indices(10)) == [0, 4, 8]
+assert list(PageSet.parse("4-1").indices(10)) == [3, 2, 1, 0]
+assert list(PageSet.parse("9-20").indices(10)) == [8, 9]
+assert list(PageSet.parse("2,2,1-3").indices(10, unique=True)) == [1, 0, 2]
+assert PageSet.parse("1-3,5").spec() == "1-3,5"
+assert PageSet.from_pages([1, 2, 3, 7]).spec() == "1-3,7"
+assert PageSet.parse("3,12").out_of_range(10) == [12]
+assert PageSet.parse("4-6,1-2").complement(10) == [range(2, 3), range(6, 10)]
+assert PageSet.parse("1-10:3").complement(10) == [range(1, 3), range(4, 6), range(7, 9)]
+assert PageSet.parse("2,4").mask(5) == bytearray([0, 1, 0, 1, 0])
+assert PageSet.all().count(1_000_000) == 1_000_000
+print("PageSet parsing test passed!")
+
+# Create a multi-page PDF for testing
+def create_test_pdf(filename="pages_test_input.pdf", num_pages=6):
+    doc = fitz.open()
+    for i in range(num_pages):
+        page = doc.new_page()
+        page.insert_text((50, 50), f"Page {i+1}", fontsize=24)
+    doc.save(filename)
+    doc.close()
+    return filename
+
+input_pdf = create_test_pdf()
+
+delete_pages(input_pdf, "pages_test_deleted.pdf", "2-3,-1")
+doc = fitz.open("pages_test_deleted.pdf")
+assert [p.get_text().strip() for p in doc] == ["Page 1", "Page 4", "Page 5"]
+doc.close()
+print("Delete with PageSet test passed!")
+
+reorder_pages(input_pdf, "pages_test_reordered.pdf", PageSet.parse("6-4,1"))
+doc = fitz.open("pages_test_reordered.pdf")
+assert [p.get_text().strip() for p in doc] == ["Page 6", "Page 5", "Page 4", "Page 1"]
+doc.close()
+print("Reorder with PageSet test passed!")
+
+rotate_pages(input_pdf, "pages_test_rotated.pdf", 90, "4-")
+doc = fitz.open("pages_test_rotated.pdf")
+assert [p.rotation for p in doc] == [0, 0, 0, 90, 90, 90]
+doc.close()
+print("Rotate with PageSet test passed!")
+
+text = extract_text(input_pdf, "3,1")
+assert text.index("Page 3") < text.index("Page 1")
+assert "Page 2" not in text
+print("Extract text with PageSet test passed!")
+
+print("All PageSet tests passed!")
@@ -0,0 +1,104 @@
+import os
+import re
+import shutil
+import fitz
+from pdf_writer.editor import (
+    merge_pdfs, rotate_pages, extract_text, extract_words, extract_word_columns, split_pdf, render_pages, flatten_form,
+)
+from pdf_writer.progress import CancelToken, OperationCancelled
+
+# Create a multi-page PDF for testing
+def create_test_pdf(filename="progress_test_input.pdf", num_pages=40):
+    doc = fitz.open()
+    for i in range(num_pages):
+        page = doc.new_page()
+        page.insert_text((50, 50), f"Page {i+1} " + "lorem ipsum " * 40, fontsize=8)
+    doc.save(filename)
+    doc.close()
+    return filename
+
+def leftovers():
+    # Only the ".xxxxxxxx.<name>" temp files atomic_output creates
+    return [f for f in os.listdir(".") if re.match(r"\.[0-9a-f]{8}\.progress_test", f)]
+
+input_pdf = create_test_pdf()
+# Outputs of an earlier run would hide a cancelled write
+for name in ("progress_test_flat.pdf", "progress_test_windowed.pdf"):
+    if os.path.exists(name):
+        os.remove(name)
+shutil.rmtree("progress_test_split", ignore_errors=True)
+
+# Progress reports pages and bytes, ending at the full total
+events = []
+rotate_pages(input_pdf, "progress_test_rotated.pdf", 90, progress=lambda *e: events.append(e))
+assert [e[0] for e in events[:40]] == list(range(1, 41))
+assert all(e[1] == 40 for e in events)
+assert events[-1] == (40, 40, os.path.getsize("progress_test_rotated.pdf"))
+assert [e[2] for e in events] == sorted(e[2] for e in events)
+
+events = []
+merge_pdfs([input_pdf, input_pdf], "progress_test_merged.pdf", progress=lambda *e: events.append(e))
+assert events[-1][:2] == (80, 80)
+
+events = []
+text = extract_text(input_pdf, "1-10", progress=lambda *e: events.append(e))
+assert "Page 10" in text and events[-1][:2] == (10, 10)
+
+events = []
+assert len(list(extract_word_columns(input_pdf, "1-10", progress=lambda *e: events.append(e)))) == 1
+assert events[-1][:2] == (10, 10)
+print("Progress callback test passed!")
+
+# Cancelling between pages leaves no output and no temp file behind
+token = CancelToken()
+def cancel_at_five(done, total, written):
+    if done == 5:
+        token.cancel()
+try:
+    merge_pdfs([input_pdf, input_pdf], "progress_test_cancelled.pdf", progress=cancel_at_five, cancel=token)
+    raise AssertionError("merge should have been cancelled")
+except OperationCancelled:
+    pass
+assert not os.path.exists("progress_test_cancelled.pdf") and leftovers() == []
+
+# Cancelling while the file is being written keeps the previous output intact
+before = open("progress_test_merged.pdf", "rb").read()
+token = CancelToken()
+def cancel_while_writing(done, total, written):
+    if written:
+        token.cancel()
+try:
+    merge_pdfs([input_pdf] * 4, "progress_test_merged.pdf", progress=cancel_while_writing, cancel=token)
+    raise AssertionError("merge should have been cancelled")
+except OperationCancelled:
+    pass
+assert open("progress_test_merged.pdf", "rb").read() == before and leftovers() == []
+
+# Deadlines: an expired token stops every operation before it writes anything
+for run in (
+    lambda t: extract_text(input_pdf, cancel=t),
+    lambda t: list(extract_words(input_pdf, cancel=t)),
+    lambda t: split_pdf(input_pdf, "1-3", "progress_test_split", cancel=t),
+    lambda t: flatten_form(input_pdf, "progress_test_flat.pdf", cancel=t),
+    lambda t: rotate_pages(input_pdf, "progress_test_windowed.pdf", 90, memory_limit_mb=64, cancel=t),
+    lambda t: render_pages(input_pdf, "progress_test_render", "1-20", dpi=30, workers=2, cancel=t),
+):
+    try:
+        run(CancelToken(timeout=0))
+        raise AssertionError("operation should have been cancelled")
+    except OperationCancelled:
+        pass
+assert not os.path.exists("progress_test_flat.pdf") and not os.path.exists("progress_test_windowed.pdf")
+assert os.listdir("progress_test_split") == []
+assert leftovers() == []
+print("Cancellation test passed!")
+
+# Windowed mode and parallel rendering report progress too
+events = []
+report = rotate_pages(input_pdf, "progress_test_windowed.pdf", 90, memory_limit_mb=64, progress=lambda *e: events.append(e))
+assert events[-1] == (40, 40, os.path.getsize("progress_test_windowed.pdf"))
+events = []
+written = render_pages(input_pdf, "progress_test_render", "1-20", dpi=30, workers=2, progress=lambda *e: events.append(e))
+assert len(written) == 20 and events[-1][:2] == (20, 20)
+assert not [f for f in os.listdir("progress_test_render") if f.startswith(".")]
+print("Windowed/render progress test passed!")
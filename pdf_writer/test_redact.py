@@ -0,0 +1,67 @@
+import re
+import fitz
+from pypdf import PdfReader
+from pdf_writer.editor import redact_pdf
+
+# Create a PDF with sensitive data on some pages and an image under one match
+def create_test_pdf(filename="redact_test_input.pdf", num_pages=60):
+    doc = fitz.open()
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 100, 20), False)
+    pix.set_rect(pix.irect, (0, 0, 255))
+    for i in range(num_pages):
+        page = doc.new_page()
+        page.insert_text((50, 50), f"Page {i+1} public information")
+        if i % 3 == 0:
+            page.insert_text((50, 100), f"Customer SSN 123-45-{6000 + i:04d} on file")
+            page.insert_text((50, 150), "Contact: ALICE Example")
+        if i == 0:
+            page.insert_image(fitz.Rect(40, 140, 240, 160), pixmap=pix, overlay=False)
+    doc.save(filename)
+    doc.close()
+    return filename
+
+input_pdf = create_test_pdf()
+
+report = redact_pdf(input_pdf, "redact_test_output.pdf", texts=["alice"], regexes=[r"\d{3}-\d{2}-\d{4}"], ignore_case=True, workers=2)
+assert report.pages_scanned == 60 and report.pages_redacted == 20
+assert report.counts() == {"alice": 20, r"\d{3}-\d{2}-\d{4}": 20}
+ssn = [m for m in report.matches if m.pattern != "alice"]
+assert sorted(m.page for m in ssn) == list(range(1, 61, 3))
+assert ssn[0].text.startswith("123-45-") and len(ssn[0].rects) == 1
+
+# The text is really gone, not just covered
+doc = fitz.open("redact_test_output.pdf")
+for i, page in enumerate(doc):
+    text = page.get_text()
+    assert not re.search(r"\d{3}-\d{2}-\d{4}", text) and "ALICE" not in text
+    assert f"Page {i+1} public information" in text
+    if i % 3 == 0:
+        assert "Customer SSN" in text and "Contact:" in text
+    for xref in page.get_contents():
+        assert b"123-45" not in doc.xref_stream(xref)
+pypdf_text = "".join(p.extract_text() for p in PdfReader("redact_test_output.pdf").pages)
+assert "123-45" not in pypdf_text and "ALICE" not in pypdf_text
+
+# Image pixels under the match are blanked, the rest of the image is kept
+alice = next(m for m in report.matches if m.page == 1 and m.pattern == "alice")
+x0, _, x1, _ = alice.rects[0]
+xref = doc[0].get_images()[0][0]
+img = fitz.Pixmap(doc, xref)
+assert img.pixel(0, 10) == (0, 0, 255) and img.pixel(img.width - 1, 10) == (0, 0, 255)
+assert img.pixel(int(((x0 + x1) / 2 - 40) / 2), 10) != (0, 0, 255)
+doc.close()
+print("Redaction test passed!")
+
+# In-process search gives the same result; a page selection limits the scan
+single = redact_pdf(input_pdf, "redact_test_single.pdf", regexes=[r"\d{3}-\d{2}-\d{4}"], workers=1)
+assert [(m.page, m.text) for m in single.matches] == [(m.page, m.text) for m in ssn]
+subset = redact_pdf(input_pdf, "redact_test_subset.pdf", texts=["ALICE"], pages="1-10")
+assert subset.pages_scanned == 10 and [m.page for m in subset.matches] == [1, 4, 7, 10]
+assert "ALICE" in fitz.open("redact_test_subset.pdf")[12].get_text()
+
+try:
+    redact_pdf(input_pdf, "redact_test_bad.pdf", regexes=["(unclosed"])
+    raise AssertionError("invalid regex should fail")
+except re.error:
+    pass
+print("Redaction options test passed!")
@@ -0,0 +1,63 @@
+import os
+import shutil
+import fitz
+from PIL import Image
+from pdf_writer.cache import document_cache
+from pdf_writer.editor import render_pages
+
+# Create a multi-page PDF for testing
+def create_test_pdf(filename="render_test_input.pdf", num_pages=4):
+    doc = fitz.open()
+    for i in range(num_pages):
+        page = doc.new_page(width=200, height=100)
+        page.insert_text((20, 50), f"Page {i+1}", fontsize=20)
+    doc.save(filename)
+    doc.close()
+    return filename
+
+input_pdf = create_test_pdf()
+shutil.rmtree("render_out", ignore_errors=True)
+
+# Test selected pages, serial
+written = render_pages(input_pdf, "render_out", ranges="2-3", dpi=72)
+assert sorted(os.path.basename(p) for p in written) == ["page_2.png", "page_3.png"]
+with Image.open(written[0]) as img:
+    assert img.size == (200, 100)
+    assert img.mode == "RGB"
+print("Render selected pages test passed!")
+
+# Test process pool, grayscale JPEG at double resolution
+written = render_pages(input_pdf, "render_out", dpi=144, fmt="jpeg", colorspace="gray", workers=2)
+assert len(written) == 4
+for p in written:
+    assert os.path.exists(p)
+with Image.open(os.path.join("render_out", "page_4.jpg")) as img:
+    assert img.size == (400, 200)
+    assert img.mode == "L"
+print("Render parallel test passed!")
+
+# Test WebP output
+written = render_pages(input_pdf, "render_out", ranges="1", dpi=72, fmt="webp")
+with Image.open(written[0]) as img:
+    assert img.format == "WEBP"
+print("Render webp test passed!")
+
+
+# Parallel rendering of a document already hot in the cache matches a serial run
+big = create_test_pdf("render_test_big.pdf", 300)
+document_cache.document(big)
+for attempt in range(3):
+    shutil.rmtree("render_par", ignore_errors=True)
+    shutil.rmtree("render_ser", ignore_errors=True)
+    parallel = render_pages(big, "render_par", dpi=36, workers=8)
+    serial = render_pages(big, "render_ser", dpi=36, workers=1)
+    assert len(parallel) == len(serial) == 300
+    for p, s in zip(sorted(parallel), sorted(serial)):
+        with open(p, "rb") as a, open(s, "rb") as b:
+            assert a.read() == b.read(), p
+print("Render parallel with hot cache test passed!")
+
+shutil.rmtree("render_out", ignore_errors=True)
+shutil.rmtree("render_par", ignore_errors=True)
+shutil.rmtree("render_ser", ignore_errors=True)
+print("All render tests passed!")
@@ -0,0 +1,65 @@
+import os
+import fitz
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+from pdf_writer.editor import split_pdf, delete_pages, prune_resources
+
+# Create a PDF whose pages share one /Resources dictionary holding every image
+def create_shared_resources_pdf(filename="resources_test_input.pdf", num_pages=3):
+    doc = fitz.open()
+    for i in range(num_pages):
+        page = doc.new_page()
+        pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 64, 64), False)
+        pix.set_rect(pix.irect, (i * 80, 0, 0))
+        page.insert_image(fitz.Rect(0, 0, 100, 100), pixmap=pix)
+        page.insert_text((50, 300), f"Page {i+1}")
+    doc.save("resources_tmp.pdf")
+    doc.close()
+
+    writer = PdfWriter()
+    writer.append(PdfReader("resources_tmp.pdf"))
+    xobjects = DictionaryObject()
+    fonts = DictionaryObject()
+    for i, page in enumerate(writer.pages):
+        res = page["/Resources"].get_object()
+        (name, ref), = res["/XObject"].items()
+        xobjects[NameObject(f"/Im{i}")] = ref
+        fonts.update(res.get("/Font", {}))
+        content = DecodedStreamObject()
+        content.set_data(page.get_contents().get_data().replace(name.encode(), f"/Im{i}".encode()))
+        page[NameObject("/Contents")] = writer._add_object(content)
+    shared = writer._add_object(DictionaryObject({NameObject("/XObject"): xobjects, NameObject("/Font"): fonts}))
+    for page in writer.pages:
+        page[NameObject("/Resources")] = shared
+    writer.write(filename)
+    os.remove("resources_tmp.pdf")
+    return filename
+
+input_pdf = create_shared_resources_pdf()
+
+# Test split keeps only the image the page draws
+reports = split_pdf(input_pdf, "2", "resources_split")
+assert len(reports) == 1 and reports[0].resources_removed == 2
+assert reports[0].bytes_removed > 0
+doc = fitz.open(os.path.join("resources_split", "page_2.pdf"))
+assert [img[7] for img in doc[0].get_images()] == ["Im1"]
+assert "Page 2" in doc[0].get_text()
+doc.close()
+unpruned = split_pdf(input_pdf, "2", "resources_split_full", prune=False)
+assert unpruned[0].output_bytes > reports[0].output_bytes
+print("Split resource pruning test passed!")
+
+# Test delete only reports streams no kept page still uses
+report = delete_pages(input_pdf, "resources_deleted.pdf", [2])
+assert report.pages == 2 and report.resources_removed == 4
+doc = fitz.open("resources_deleted.pdf")
+assert sorted(img[7] for p in doc for img in p.get_images()) == ["Im0", "Im2"]
+doc.close()
+print("Delete resource pruning test passed!")
+
+report = prune_resources(input_pdf, "resources_pruned.pdf")
+assert report.pages == 3 and report.bytes_removed == 0
+assert report.output_bytes <= os.path.getsize(input_pdf)
+print("Prune resources test passed!")
+
+print("All resource pruning tests passed!")
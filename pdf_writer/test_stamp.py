@@ -0,0 +1,70 @@
+import fitz
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import RectangleObject
+from pdf_writer.editor import stamp_pdf
+
+# Create a multi-page PDF for testing, with one page of a different size
+def create_test_pdf(filename="stamp_test_input.pdf", num_pages=20):
+    doc = fitz.open()
+    for i in range(num_pages):
+        page = doc.new_page()
+        page.insert_text((50, 50), f"Page {i+1}", fontsize=12)
+    doc.new_page(width=300, height=300)
+    doc.save(filename)
+    doc.close()
+    return filename
+
+input_pdf = create_test_pdf()
+
+# Test one shared Form XObject per page size
+forms = stamp_pdf(input_pdf, "stamp_test_output.pdf", text="CONFIDENCIAL", rotation=45, opacity=0.2)
+assert forms == 2
+reader = PdfReader("stamp_test_output.pdf")
+refs = set()
+for page in reader.pages:
+    xobjects = page["/Resources"]["/XObject"]
+    refs.add(xobjects.raw_get("/PdfWriterStamp0" if page.mediabox.width > 300 else "/PdfWriterStamp1").idnum)
+assert len(refs) == 2
+doc = fitz.open("stamp_test_output.pdf")
+for page in doc:
+    assert "CONFIDENCIAL" in page.get_text()
+assert "Page 7" in doc[6].get_text()
+doc.close()
+print("Stamp shared form test passed!")
+
+# Test page selection and layering under the content
+stamp_pdf(input_pdf, "stamp_test_under.pdf", text="RASCUNHO", pages="2-3", under=True, position="bottom-left")
+doc = fitz.open("stamp_test_under.pdf")
+assert "RASCUNHO" not in doc[0].get_text()
+words = doc[1].get_text("words")
+assert words[0][4] == "RASCUNHO"
+assert words[0][1] > doc[1].rect.height / 2  # fitz y grows downwards
+doc.close()
+print("Stamp under/selection test passed!")
+
+# Stamping a stamped file keeps both stamps
+stamp_pdf(input_pdf, "stamp_test_first.pdf", text="FIRSTSTAMP")
+stamp_pdf("stamp_test_first.pdf", "stamp_test_second.pdf", text="SECONDSTAMP")
+doc = fitz.open("stamp_test_second.pdf")
+for page in doc.pages(0, 20):  # the long text does not fit the small page
+    text = page.get_text()
+    assert "FIRSTSTAMP" in text and "SECONDSTAMP" in text
+doc.close()
+xobjects = PdfReader("stamp_test_second.pdf").pages[20]["/Resources"]["/XObject"]
+assert sorted(xobjects) == ["/PdfWriterStamp1", "/PdfWriterStamp3"]
+print("Re-stamp test passed!")
+
+# Pages of the same size share one form even when their origins differ
+writer = PdfWriter()
+writer.append(input_pdf, pages=(0, 2))
+writer.pages[1].mediabox = RectangleObject([100, 100, 695, 942])
+writer.write("stamp_test_shifted_input.pdf")
+assert stamp_pdf("stamp_test_shifted_input.pdf", "stamp_test_shifted.pdf", text="SHIFT", position="bottom-left") == 1
+reader = PdfReader("stamp_test_shifted.pdf")
+assert len({page["/Resources"]["/XObject"].raw_get("/PdfWriterStamp0").idnum for page in reader.pages}) == 1
+with fitz.open("stamp_test_shifted.pdf") as doc:
+    first, second = (next(w for w in page.get_text("words") if w[4] == "SHIFT") for page in doc)
+assert abs(first[0] - second[0]) < 0.01 and abs(first[1] - second[1]) < 0.01  # same place inside each box
+print("Stamp shifted media box test passed!")
+
+print("All stamp tests passed!")
@@ -0,0 +1,82 @@
+import io
+import json
+import os
+import subprocess
+import sys
+from pypdf import PdfReader
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import letter
+from pdf_writer.editor import extract_text, extract_text_pages, merge_pdfs, rotate_pages, write_text
+
+# Create a sample PDF
+def create_test_pdf(filename="stdio_test_input.pdf", num_pages=5):
+    c = canvas.Canvas(filename, pagesize=letter)
+    for i in range(num_pages):
+        c.drawString(100, 700, f"Page {i+1}")
+        c.showPage()
+    c.save()
+    return filename
+
+def run(*args, stdin=b""):
+    # The real entry point, with pipes on both ends
+    proc = subprocess.run([sys.executable, "-m", "pdf_writer", *args], input=stdin, capture_output=True)
+    assert proc.returncode == 0, proc.stderr.decode()
+    return proc.stdout, proc.stderr.decode()
+
+input_pdf = create_test_pdf()
+with open(input_pdf, "rb") as f:
+    source = f.read()
+
+# API: streams in and out, no files involved
+out = io.BytesIO()
+write_text(io.BytesIO(source), out, "Streamed", 100, 100)
+assert "Streamed" in PdfReader(io.BytesIO(out.getvalue())).pages[0].extract_text()
+rotated = io.BytesIO()
+rotate_pages(io.BytesIO(out.getvalue()), rotated, 90, memory_limit_mb=512)
+assert PdfReader(io.BytesIO(rotated.getvalue())).pages[0].rotation == 90
+report = merge_pdfs([io.BytesIO(source), input_pdf], io.BytesIO())
+assert report.pages == 10 and report.output_bytes > 0
+assert list(extract_text_pages(io.BytesIO(source), "2-3")) == [extract_text(input_pdf, "2"), extract_text(input_pdf, "3")]
+print("Stream API test passed!")
+
+# CLI: a pipeline without temp files, status messages on stderr
+rotated, messages = run("rotate", "--input", "-", "--output", "-", "--degrees", "90", stdin=source)
+assert rotated.startswith(b"%PDF-") and "PDF salvo em" in messages
+stamped, _ = run("write-text-cmd", "--input", "-", "--output", "-", "--text", "Piped", "--x", "100", "--y", "100", stdin=rotated)
+merged, _ = run("merge", "-", input_pdf, "--output", "-", stdin=stamped)
+reader = PdfReader(io.BytesIO(merged))
+assert len(reader.pages) == 10 and reader.pages[0].rotation == 90 and reader.pages[5].rotation == 0
+assert "Piped" in reader.pages[0].extract_text()
+print("CLI pipeline test passed!")
+
+# The direct engine, windowed mode and linearization also write to stdout
+direct, _ = run("write-text-cmd", "--input", "-", "--output", "-", "--text", "Direct", "--x", "100", "--y", "100", "--engine", "direct", stdin=source)
+assert "Direct" in PdfReader(io.BytesIO(direct)).pages[0].extract_text()
+reordered, _ = run("reorder-pages-cmd", "--input", "-", "--output", "-", "5-1", "--memory-limit", "256", "--linearize", stdin=source)
+assert PdfReader(io.BytesIO(reordered)).pages[0].extract_text().strip() == "Page 5"
+linear, messages = run("linearize", "--input", "-", "--output", "-", stdin=source)
+assert b"/Linearized" in linear[:1024] and "linearizado e validado" in messages
+print("CLI stdout writers test passed!")
+
+# Library warnings go to stderr and never in front of the PDF bytes
+reordered, messages = run("reorder-pages-cmd", "--input", "-", "--output", "-", "2", "1", "9", stdin=source)
+assert reordered.startswith(b"%PDF-") and "9" in messages and "Aviso" in messages
+edited, messages = run("edit-text-cmd", "--input", "-", "--output", "-", "--page-num", "1", "--old-text", "zzz", "--new-text", "x", stdin=source)
+assert edited.startswith(b"%PDF-") and "zzz" in messages
+print("CLI warnings on stderr test passed!")
+
+# extract-text streams to stdout; files still work next to stdin
+text, _ = run("extract-text", "--input", "-", "2", "4", stdin=merged)
+assert text.decode().split() == ["Page", "2", "Page", "4"]
+text, _ = run("extract-text", "--input", "-", "--", "-1", stdin=source)  # as the help text suggests
+assert text.decode().split() == ["Page", "5"]
+_, messages = run("extract-text", "--input", "-", "--output", "stdio_test.txt", stdin=source)
+with open("stdio_test.txt", encoding="utf-8") as f:
+    assert f.read() == extract_text(input_pdf)
+run("extract-words", "--input", "-", "--output", "stdio_test.jsonl", "1", stdin=source)
+with open("stdio_test.jsonl", encoding="utf-8") as f:
+    assert [json.loads(line)["page"] for line in f] == [1]
+assert not [f for f in os.listdir(".") if f.startswith(".") and f.endswith(("stdio_test.txt", "stdio_test.jsonl"))]
+run("split", "--input", "-", "--ranges", "1-2", "--output-dir", "stdio_test_split", stdin=source)
+assert sorted(os.listdir("stdio_test_split")) == ["page_1.pdf", "page_2.pdf"]
+print("CLI extract-text test passed!")
@@ -0,0 +1,89 @@
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+import fitz
+from pdf_writer.watch import HotFolder
+
+# Prepare a hot folder with two copies of the same PDF and one broken file
+shutil.rmtree("watch_test", ignore_errors=True)
+os.makedirs("watch_test/in")
+doc = fitz.open()
+for i in range(2):
+    doc.new_page().insert_text((50, 50), f"Page {i+1}")
+doc.save("watch_test/in/scan.pdf")
+doc.close()
+shutil.copyfile("watch_test/in/scan.pdf", "watch_test/in/scan_copy.pdf")
+shutil.copyfile("watch_test/in/scan.pdf", "watch_test/original.pdf")
+with open("watch_test/in/broken.pdf", "wb") as f:
+    f.write(b"not a pdf")
+
+folder = HotFolder(
+    "watch_test/in",
+    "watch_test/out",
+    "watch_test/err",
+    steps=[{"op": "stamp_pdf", "text": "RECEBIDO"}, {"op": "rotate_pages", "degrees": 90}],
+    workers=2,
+    interval=0.05,
+    stats_file="watch_test/stats.json",
+)
+stats = folder.run(once=True)
+assert stats.processed == 1 and stats.failed == 1 and stats.duplicates == 1
+assert stats.queue_depth == 0 and stats.in_flight == 0
+assert os.listdir("watch_test/in") == []
+assert os.path.exists("watch_test/err/broken.pdf.error.txt")
+(output,) = [f for f in os.listdir("watch_test/out") if f.endswith(".pdf")]
+doc = fitz.open(os.path.join("watch_test/out", output))
+assert doc[1].rotation == 90 and "RECEBIDO" in doc[1].get_text()
+doc.close()
+print("Hot folder processing test passed!")
+
+# Test content already processed is recognised after a restart
+shutil.copyfile("watch_test/original.pdf", "watch_test/in/scan_again.pdf")
+doc = fitz.open()
+doc.new_page()
+doc.save("watch_test/in/new.pdf")
+doc.close()
+restarted = HotFolder("watch_test/in", "watch_test/out", "watch_test/err", workers=1, interval=0.05)
+stats = restarted.run(once=True)
+assert stats.processed == 1 and stats.duplicates == 1
+assert os.path.exists("watch_test/out/new.pdf")
+print("Hot folder restart test passed!")
+
+# Test a file removed between the scan and the hash is skipped
+shutil.copyfile("watch_test/original.pdf", "watch_test/in/gone.pdf")
+restarted._scan()
+assert restarted._scan() == ["watch_test/in/gone.pdf"]
+os.remove("watch_test/in/gone.pdf")
+restarted._enqueue("watch_test/in/gone.pdf")
+assert restarted.stats.vanished == 1 and not restarted._queue
+assert restarted.stats.as_dict()["vanished"] == 1
+print("Hot folder vanished file test passed!")
+
+# Test an input deleted while its (slow) job is running
+doc = fitz.open()
+for i in range(300):
+    doc.new_page().insert_text((50, 50), f"Slow {i+1}")
+doc.save("watch_test/in/slow.pdf")
+doc.close()
+slow = HotFolder(
+    "watch_test/in", "watch_test/out", "watch_test/err",
+    steps=[{"op": "stamp_pdf", "text": "LENTO"}, {"op": "rotate_pages", "degrees": 90}], workers=1, interval=0.05,
+)
+slow._scan()  # the next scan sees the same size and mtime
+slow._pool = ProcessPoolExecutor(max_workers=1)
+try:
+    slow.poll_once()
+    assert slow.stats.in_flight == 1
+    os.remove("watch_test/in/slow.pdf")
+    while slow._running:
+        time.sleep(0.05)
+        slow.poll_once()
+finally:
+    slow._pool.shutdown(wait=True)
+assert slow.stats.vanished == 1 and slow.stats.processed + slow.stats.failed == 1
+assert not slow._claimed and slow.stats.total_latency > 0
+print("Hot folder input deleted mid-job test passed!")
+
+shutil.rmtree("watch_test", ignore_errors=True)
+print("All hot folder tests passed!")
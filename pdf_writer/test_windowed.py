@@ -0,0 +1,88 @@
+import os
+import fitz
+import pikepdf
+from pypdf import PdfReader
+from pdf_writer.editor import rotate_pages, delete_pages, reorder_pages, insert_blank_page, flatten_form, fill_form
+
+# Create a long PDF whose pages share one image and one font
+def create_test_pdf(filename="windowed_test_input.pdf", num_pages=300):
+    doc = fitz.open()
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 64, 64), False)
+    pix.clear_with(200)
+    xref = 0
+    for i in range(num_pages):
+        page = doc.new_page()
+        page.insert_text((50, 50), f"Page {i+1}")
+        xref = page.insert_image(fitz.Rect(50, 100, 150, 200), pixmap=pix, xref=xref)
+    doc[2].insert_link({"kind": fitz.LINK_GOTO, "from": fitz.Rect(50, 40, 150, 60), "page": 1})
+    doc.save(filename)
+    doc.close()
+    return filename
+
+def page_texts(path):
+    return [page.extract_text().strip() for page in PdfReader(path).pages]
+
+def check_structure(path):
+    with pikepdf.open(path) as pdf:
+        assert pdf.check_pdf_syntax() == []
+
+input_pdf = create_test_pdf()
+texts = page_texts(input_pdf)
+
+# Rotate selected pages in small windows
+report = rotate_pages(input_pdf, "windowed_test_rotated.pdf", 90, "1-10,-1", memory_limit_mb=1)
+assert report.pages == 300 and report.windows > 1 and report.peak_rss_mb > 0
+check_structure("windowed_test_rotated.pdf")
+reader = PdfReader("windowed_test_rotated.pdf")
+assert [p.rotation for p in reader.pages[:11]] == [90] * 10 + [0]
+assert reader.pages[-1].rotation == 90
+assert page_texts("windowed_test_rotated.pdf") == texts
+# the shared image is written once
+assert os.path.getsize("windowed_test_rotated.pdf") < os.path.getsize(input_pdf) * 1.5
+doc = fitz.open("windowed_test_rotated.pdf")
+assert len({doc[i].get_images()[0][0] for i in range(0, 300, 50)}) == 1
+assert doc[2].get_links()[0]["page"] == 1
+doc.close()
+print("Windowed rotate test passed!")
+
+# Delete: links to removed pages become null, the rest match the in-memory path
+report = delete_pages(input_pdf, "windowed_test_deleted.pdf", "2,100-199", memory_limit_mb=64)
+check_structure("windowed_test_deleted.pdf")
+assert report.pages == 199
+assert page_texts("windowed_test_deleted.pdf") == texts[:1] + texts[2:99] + texts[199:]
+delete_pages(input_pdf, "windowed_test_deleted_mem.pdf", "2,100-199")
+assert page_texts("windowed_test_deleted.pdf") == page_texts("windowed_test_deleted_mem.pdf")
+print("Windowed delete test passed!")
+
+# Reorder (with repeats) and blank page insertion
+report = reorder_pages(input_pdf, "windowed_test_reordered.pdf", "300-1,5", memory_limit_mb=64)
+check_structure("windowed_test_reordered.pdf")
+assert page_texts("windowed_test_reordered.pdf") == texts[::-1] + [texts[4]]
+report = insert_blank_page(input_pdf, "windowed_test_blank.pdf", 3, 300, 400, memory_limit_mb=64)
+check_structure("windowed_test_blank.pdf")
+reader = PdfReader("windowed_test_blank.pdf")
+assert len(reader.pages) == 301 and reader.pages[2].extract_text() == ""
+assert float(reader.pages[2].mediabox.width) == 300 and float(reader.pages[2].mediabox.height) == 400
+assert reader.pages[3].extract_text().strip() == "Page 3"
+print("Windowed reorder/insert test passed!")
+
+# Flatten: existing appearance streams become page content
+doc = fitz.open()
+for i in range(3):
+    page = doc.new_page()
+    w = fitz.Widget()
+    w.field_name = f"name{i}"
+    w.field_type = fitz.PDF_WIDGET_TYPE_TEXT
+    w.rect = fitz.Rect(50, 50, 300, 80)
+    page.add_widget(w)
+doc.save("windowed_test_form.pdf")
+doc.close()
+fill_form("windowed_test_form.pdf", "windowed_test_filled.pdf", {"name0": "Alice", "name2": "Carol"})
+report = flatten_form("windowed_test_filled.pdf", "windowed_test_flat.pdf", memory_limit_mb=64)
+check_structure("windowed_test_flat.pdf")
+doc = fitz.open("windowed_test_flat.pdf")
+assert not doc.is_form_pdf
+assert "Alice" in doc[0].get_text() and "Carol" in doc[2].get_text()
+assert all(not list(page.widgets()) for page in doc)
+doc.close()
+print("Windowed flatten test passed!")
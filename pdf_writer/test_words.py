@@ -0,0 +1,35 @@
+import fitz
+from pdf_writer.editor import extract_words, extract_word_columns
+
+# Create a PDF with two fonts for testing
+doc = fitz.open()
+page = doc.new_page()
+page.insert_text((50, 50), "Hello big world", fontsize=12)
+page.insert_text((50, 80), "mono line", fontname="cour", fontsize=9)
+doc.new_page().insert_text((50, 50), "Second page", fontsize=20)
+doc.save("words_test_input.pdf")
+doc.close()
+
+# Test per-page layout records
+layouts = list(extract_words("words_test_input.pdf"))
+assert [l["page"] for l in layouts] == [1, 2]
+first = layouts[0]
+assert [w["text"] for w in first["words"]] == ["Hello", "big", "world", "mono", "line"]
+assert first["words"][0]["font"] == "Helvetica" and first["words"][0]["size"] == 12
+assert first["words"][3]["font"] == "Courier" and first["words"][3]["size"] == 9
+assert [l["text"] for l in first["lines"]] == ["Hello big world", "mono line"]
+x0, y0, x1, y1 = first["words"][1]["bbox"]
+assert first["words"][0]["bbox"][2] < x0 < x1 and y0 < 50 < y1
+assert len(first["blocks"]) == 2
+assert [l["page"] for l in extract_words("words_test_input.pdf", "2")] == [2]
+print("Extract words test passed!")
+
+# Test columnar batches
+batches = list(extract_word_columns("words_test_input.pdf", batch_size=4))
+assert [len(b["text"]) for b in batches] == [4, 3]
+assert batches[1]["page"].tolist() == [1, 2, 2]
+assert batches[0]["x0"].typecode == "f" and batches[0]["x0"][0] == 50.0
+assert batches[1]["font"][-1] == "Helvetica"
+print("Extract word columns test passed!")
+
+print("All word extraction tests passed!")
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from . import editor
+
+# Operações aceitas nos passos do arquivo de configuração. Todas recebem
+# (input_pdf, output_pdf, **opções), então podem ser encadeadas.
+OPERATIONS = {
+    name: getattr(editor, name)
+    for name in (
+        "write_text",
+        "add_image",
+        "sign_pdf",
+        "rotate_pages",
+        "fill_form",
+        "flatten_form",
+        "edit_text",
+        "delete_pages",
+        "reorder_pages",
+        "insert_blank_page",
+        "stamp_pdf",
+        "number_pages",
+        "prune_resources",
+    )
+}
+
+
+def load_steps(config_path: Optional[str]) -> List[dict]:
+    # Config: lista JSON de passos, ex: [{"op": "rotate_pages", "degrees": 90}]
+    if not config_path:
+        return []
+    with open(config_path, encoding="utf-8") as f:
+        steps = json.load(f)
+    if isinstance(steps, dict):
+        steps = steps.get("steps", [])
+    for step in steps:
+        if step.get("op") not in OPERATIONS:
+            raise ValueError(f"Operação desconhecida na configuração: {step.get('op')}")
+    return steps
+
+
+def _file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _process_file(src: str, dest: str, steps: List[dict]) -> str:
+    # Executa no processo de trabalho: aplica os passos em arquivos temporários
+    # no diretório de destino e publica o resultado com um rename atômico.
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(dest) or ".") as tmp:
+        work = src
+        for n, step in enumerate(steps):
+            options = dict(step)
+            op = OPERATIONS[options.pop("op")]
+            out = os.path.join(tmp, f"step{n}.pdf")
+            op(work, out, **options)
+            work = out
+        if work == src:
+            work = os.path.join(tmp, "copy.pdf")
+            shutil.copyfile(src, work)
+        os.replace(work, dest)
+    return dest
+
+
+@dataclass
+class _Job:
+    path: str
+    digest: str
+    queued_at: float
+
+
+@dataclass
+class WatchStats:
+    processed: int = 0
+    failed: int = 0
+    duplicates: int = 0
+    vanished: int = 0
+    queue_depth: int = 0
+    in_flight: int = 0
+    last_latency: float = 0.0
+    max_latency: float = 0.0
+    total_latency: float = 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        done = self.processed + self.failed
+        return self.total_latency / done if done else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "duplicates": self.duplicates,
+            "vanished": self.vanished,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "last_latency": round(self.last_latency, 4),
+            "avg_latency": round(self.avg_latency, 4),
+            "max_latency": round(self.max_latency, 4),
+        }
+
+
+@dataclass
+class HotFolder:
+    input_dir: str
+    output_dir: str
+    error_dir: str
+    steps: List[dict] = field(default_factory=list)
+    workers: int = 2
+    interval: float = 2.0
+    archive_dir: Optional[str] = None
+    stats_file: Optional[str] = None
+
+    def __post_init__(self):
+        for d in (self.input_dir, self.output_dir, self.error_dir, self.archive_dir):
+            if d:
+                os.makedirs(d, exist_ok=True)
+        self.stats = WatchStats()
+        self._queue: Deque[_Job] = deque()
+        self._running: Dict[Future, _Job] = {}
+        self._claimed: set = set()  # caminhos na fila ou em processamento
+        self._sizes: Dict[str, Tuple[int, float]] = {}
+        self._seen_path = os.path.join(self.output_dir, ".pdf_writer_seen")
+        self._seen: set = set()
+        if os.path.exists(self._seen_path):
+            with open(self._seen_path, encoding="utf-8") as f:
+                self._seen = {line.strip() for line in f if line.strip()}
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _scan(self) -> List[str]:
+        # Um arquivo só está pronto quando tamanho e mtime não mudam entre duas
+        # varreduras (o scanner pode ainda estar gravando).
+        ready: List[str] = []
+        current: Dict[str, Tuple[int, float]] = {}
+        with os.scandir(self.input_dir) as it:
+            for entry in it:
+                if not entry.is_file() or not entry.name.lower().endswith(".pdf"):
+                    continue
+                if entry.path in self._claimed:
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue  # removido durante a varredura
+                sig = (st.st_size, st.st_mtime)
+                current[entry.path] = sig
+                if self._sizes.get(entry.path) == sig:
+                    ready.append(entry.path)
+        self._sizes = current
+        return sorted(ready)
+
+    def _enqueue(self, path: str):
+        try:
+            digest = _file_hash(path)
+        except OSError:
+            # Removido ou renomeado entre a varredura e a leitura; se voltar
+            # com outro nome, uma próxima varredura o encontra.
+            self.stats.vanished += 1
+            self._sizes.pop(path, None)
+            return
+        pending = {job.digest for job in self._queue} | {job.digest for job in self._running.values()}
+        if digest in self._seen or digest in pending:
+            self.stats.duplicates += 1
+            self._retire(path)
+            return
+        self._claimed.add(path)
+        self._queue.append(_Job(path, digest, time.monotonic()))
+
+    def _retire(self, path: str):
+        try:
+            if self.archive_dir:
+                shutil.move(path, os.path.join(self.archive_dir, os.path.basename(path)))
+            else:
+                os.remove(path)
+        except FileNotFoundError:
+            self.stats.vanished += 1  # apagado ou renomeado enquanto era processado
+        self._sizes.pop(path, None)
+
+    def _destination(self, job: _Job) -> str:
+        dest = os.path.join(self.output_dir, os.path.basename(job.path))
+        if os.path.exists(dest):
+            root, ext = os.path.splitext(dest)
+            dest = f"{root}_{job.digest[:8]}{ext}"
+        return dest
+
+    def _submit(self):
+        # Fila limitada: no máximo um arquivo por processo em andamento.
+        while self._queue and len(self._running) < self.workers:
+            job = self._queue.popleft()
+            fut = self._pool.submit(_process_file, job.path, self._destination(job), self.steps)
+            self._running[fut] = job
+
+    def _collect(self):
+        for fut in [f for f in self._running if f.done()]:
+            job = self._running.pop(fut)
+            latency = time.monotonic() - job.queued_at
+            error = fut.exception()
+            if error is None:
+                self.stats.processed += 1
+                self._seen.add(job.digest)
+                with open(self._seen_path, "a", encoding="utf-8") as f:
+                    f.write(job.digest + "\n")
+                self._retire(job.path)
+            else:
+                self.stats.failed += 1
+                target = os.path.join(self.error_dir, os.path.basename(job.path))
+                try:
+                    shutil.move(job.path, target)
+                except FileNotFoundError:
+                    self.stats.vanished += 1  # o relatório do erro fica mesmo assim
+                with open(target + ".error.txt", "w", encoding="utf-8") as f:
+                    f.write("".join(traceback.format_exception(type(error), error, error.__traceback__)))
+                self._sizes.pop(job.path, None)
+            self._claimed.discard(job.path)
+            self.stats.last_latency = latency
+            self.stats.max_latency = max(self.stats.max_latency, latency)
+            self.stats.total_latency += latency
+
+    def _publish_stats(self):
+        self.stats.queue_depth = len(self._queue)
+        self.stats.in_flight = len(self._running)
+        if self.stats_file:
+            tmp = self.stats_file + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.stats.as_dict(), f)
+            os.replace(tmp, self.stats_file)
+
+    def poll_once(self):
+        self._collect()
+        for path in self._scan():
+            self._enqueue(path)
+        self._submit()
+        self._publish_stats()
+
+    @property
+    def idle(self) -> bool:
+        return not self._queue and not self._running and not self._sizes
+
+    def run(self, once: bool = False, on_poll=None):
+        # once=True processa o que já está na pasta e retorna (útil em cron).
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            while True:
+                self.poll_once()
+                if on_poll:
+                    on_poll(self.stats)
+                if once and self.idle:
+                    return self.stats
+                time.sleep(self.interval if not once else min(self.interval, 0.2))
+        finally:
+            self._pool.shutdown(wait=True)
+            self._collect()
+            self._publish_stats()
+            self._pool = None
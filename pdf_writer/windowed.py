@@ -0,0 +1,400 @@
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from array import array
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Iterable, List, Optional, Tuple
+
+from pypdf import PdfReader
+from pypdf.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    FloatObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+    StreamObject,
+)
+
+from .pages import PageSet
+from .progress import CancelToken, Output, ProgressCallback, Tracker, is_stream, output_file
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BLANK = -1  # entrada do plano que representa uma página em branco
+
+# Atributos que a página pode herdar dos nós /Pages acima dela.
+_INHERITABLE = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+_MIN_WINDOW, _MAX_WINDOW = 1, 4096
+
+
+@dataclass
+class WindowReport:
+    output: str
+    pages: int
+    windows: int
+    peak_rss_mb: float
+
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024  # bytes no macOS, KiB no Linux
+
+
+def _rss_mb() -> float:
+    # RSS atual (Linux); nos demais sistemas, o pico informado pelo SO.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_mb()
+
+
+def _page_refs(reader: PdfReader) -> Tuple[array, array, array, List[dict]]:
+    # Percorre a árvore de páginas guardando só (número, geração) de cada
+    # página, sem montar a lista de PageObject que o pypdf mantém em memória.
+    # Os atributos herdados dos nós /Pages são resolvidos aqui, uma vez por
+    # nó: depois o cache do leitor pode ser descartado sem reler a árvore.
+    ids, gens, owners = array("I"), array("H"), array("I")
+    inherited: List[dict] = [{}]
+    stack = [(reader.trailer["/Root"].raw_get("/Pages"), 0)]
+    while stack:
+        ref, owner = stack.pop()
+        node = ref.get_object()
+        if "/Kids" not in node:
+            ids.append(ref.idnum)
+            gens.append(ref.generation)
+            owners.append(owner)
+            reader.resolved_objects.pop((ref.generation, ref.idnum), None)
+            continue
+        attrs = {k: node.raw_get(k) for k in _INHERITABLE if k in node}
+        if attrs:
+            inherited.append({**inherited[owner], **attrs})
+            owner = len(inherited) - 1
+        stack.extend((kid, owner) for kid in reversed(list(node["/Kids"])))
+    return ids, gens, owners, inherited
+
+
+class _StreamingWriter:
+    """Grava cada objeto no arquivo assim que ele é copiado.
+
+    Guarda apenas a tabela origem -> saída e os offsets do xref (arrays de
+    inteiros); objetos compartilhados entre páginas (fontes, imagens) são
+    gravados uma única vez.
+    """
+
+    def __init__(self, reader: Optional[PdfReader], f: BinaryIO, page_count: int):
+        # Sem leitor, só grava objetos novos (páginas montadas do zero).
+        self.reader = reader
+        self.f = f
+        size = max(int(reader.trailer.get("/Size", 0)), 1) if reader is not None else 1
+        self._map = array("I", bytes(4 * size))  # objeto de origem -> objeto de saída
+        self._is_page = bytearray(size)
+        # 1..page_count: páginas; depois a raiz /Pages e o catálogo
+        self._offsets = array("Q", bytes(8 * (page_count + 3)))
+        self.pages_id = page_count + 1
+        self.catalog_id = page_count + 2
+        self._pending: List[IndirectObject] = []
+        self._q_ref: Optional[IndirectObject] = None
+        header = reader.pdf_header if reader is not None else "%PDF-1.7"
+        f.write(header.encode() + b"\n%\xe2\xe3\xcf\xd3\n")
+
+    def _grow(self, idnum: int):
+        if idnum >= len(self._map):
+            extra = idnum + 1 - len(self._map)
+            self._map.extend(array("I", bytes(4 * extra)))
+            self._is_page.extend(bytes(extra))
+
+    def _alloc(self) -> int:
+        self._offsets.append(0)
+        return len(self._offsets) - 1
+
+    def mark_page(self, idnum: int, out_id: Optional[int] = None):
+        self._grow(idnum)
+        self._is_page[idnum] = 1
+        if out_id and not self._map[idnum]:
+            self._map[idnum] = out_id
+
+    def _ref(self, ind: IndirectObject):
+        if ind.pdf is None:
+            return ind  # objeto novo, já gravado
+        self._grow(ind.idnum)
+        out = self._map[ind.idnum]
+        if not out:
+            if self._is_page[ind.idnum]:
+                return NullObject()  # página que não vai para a saída
+            out = self._map[ind.idnum] = self._alloc()
+            self._pending.append(ind)
+        return IndirectObject(out, 0, None)
+
+    def _remap(self, obj):
+        if isinstance(obj, IndirectObject):
+            return self._ref(obj)
+        if isinstance(obj, StreamObject):
+            out = StreamObject()
+            out._data = obj._data  # bytes ainda codificados: nada é descomprimido
+            for key, value in obj.items():
+                if key != "/Length":
+                    out[key] = self._remap(value)
+            return out
+        if isinstance(obj, DictionaryObject):
+            out = DictionaryObject()
+            for key, value in obj.items():
+                out[key] = self._remap(value)
+            return out
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._remap(v) for v in obj)
+        return obj
+
+    def _write(self, out_id: int, obj):
+        self._offsets[out_id] = self.f.tell()
+        self.f.write(b"%d 0 obj\n" % out_id)
+        obj.write_to_stream(self.f)
+        self.f.write(b"\nendobj\n")
+
+    def _drain(self):
+        while self._pending:
+            ind = self._pending.pop()
+            obj = ind.get_object()
+            self._write(self._map[ind.idnum], self._remap(NullObject() if obj is None else obj))
+
+    def write_new(self, obj) -> IndirectObject:
+        out_id = self._alloc()
+        self._write(out_id, self._remap(obj))
+        return IndirectObject(out_id, 0, None)
+
+    def _stream(self, data: bytes) -> IndirectObject:
+        stream = DecodedStreamObject()
+        stream.set_data(data)
+        return self.write_new(stream)
+
+    def add_page(self, out_id: int, idnum: int, gen: int, inherited: dict, rotate: int = 0, flatten: bool = False):
+        page = IndirectObject(idnum, gen, self.reader).get_object()
+        out = DictionaryObject()
+        for key, value in page.items():
+            if key not in ("/Parent", "/StructParents"):
+                out[key] = value
+        for key, value in inherited.items():
+            if key not in out:
+                out[NameObject(key)] = value
+        if rotate:
+            current = int(out["/Rotate"]) if "/Rotate" in out else 0
+            out[NameObject("/Rotate")] = NumberObject((current + rotate) % 360)
+        if flatten and "/Annots" in out:
+            self._flatten_widgets(out)
+        out[NameObject("/Parent")] = IndirectObject(self.pages_id, 0, None)
+        self._write(out_id, self._remap(out))
+        self._drain()
+
+    def add_new_page(
+        self,
+        out_id: int,
+        width: float,
+        height: float,
+        resources: Optional[DictionaryObject] = None,
+        contents: Optional[IndirectObject] = None,
+    ):
+        page = DictionaryObject({
+            NameObject("/Type"): NameObject("/Page"),
+            NameObject("/Parent"): IndirectObject(self.pages_id, 0, None),
+            NameObject("/MediaBox"): ArrayObject([NumberObject(0), NumberObject(0), FloatObject(width), FloatObject(height)]),
+            NameObject("/Resources"): resources if resources is not None else DictionaryObject(),
+        })
+        if contents is not None:
+            page[NameObject("/Contents")] = contents
+        self._write(out_id, page)
+
+    def add_blank_page(self, out_id: int, width: float, height: float):
+        self.add_new_page(out_id, width, height)
+
+    def _flatten_widgets(self, page: DictionaryObject):
+        # Desenha a aparência (/AP /N) de cada widget como Form XObject no
+        # conteúdo da página. Widgets sem aparência continuam como anotação.
+        kept = ArrayObject()
+        xobjects = {}
+        calls = []
+        for ref in page["/Annots"]:
+            annot = ref.get_object()
+            if "/Subtype" not in annot or annot["/Subtype"] != "/Widget":
+                kept.append(ref)
+                continue
+            if "/F" in annot and int(annot["/F"]) & 2:
+                continue  # oculto: some no achatamento
+            ap = _normal_appearance(annot)
+            if ap is None:
+                kept.append(ref)
+                continue
+            name = NameObject(f"/PdfWriterFlat{len(xobjects)}")
+            xobjects[name] = ap
+            a, b, c, d, e, f = _appearance_matrix(ap.get_object(), annot["/Rect"])
+            calls.append(f"q {a:g} {b:g} {c:g} {d:g} {e:g} {f:g} cm {name} Do Q\n")
+        if not xobjects:
+            return
+        if kept:
+            page[NameObject("/Annots")] = kept
+        else:
+            del page["/Annots"]
+
+        # Cópia própria dos recursos: o dicionário original pode ser
+        # compartilhado com outras páginas.
+        resources = DictionaryObject()
+        if "/Resources" in page:
+            resources.update(page["/Resources"].items())
+        xobject = DictionaryObject()
+        if "/XObject" in resources:
+            xobject.update(resources["/XObject"].items())
+        xobject.update(xobjects)
+        resources[NameObject("/XObject")] = xobject
+        page[NameObject("/Resources")] = resources
+
+        contents = page.raw_get("/Contents") if "/Contents" in page else None
+        resolved = contents.get_object() if contents is not None else None
+        existing = list(resolved) if isinstance(resolved, ArrayObject) else ([contents] if contents is not None else [])
+        if self._q_ref is None:
+            self._q_ref = self._stream(b"q\n")
+        after = self._stream(("Q\n" + "".join(calls)).encode())
+        page[NameObject("/Contents")] = ArrayObject([self._q_ref] + existing + [after])
+
+    def close(self, page_count: int):
+        f = self.f
+        self._offsets[self.pages_id] = f.tell()
+        f.write(b"%d 0 obj\n<< /Type /Pages /Count %d /Kids [" % (self.pages_id, page_count))
+        for start in range(1, page_count + 1, 4096):
+            f.write(b"".join(b" %d 0 R" % i for i in range(start, min(start + 4096, page_count + 1))))
+        f.write(b" ] >>\nendobj\n")
+        self._offsets[self.catalog_id] = f.tell()
+        f.write(b"%d 0 obj\n<< /Type /Catalog /Pages %d 0 R >>\nendobj\n" % (self.catalog_id, self.pages_id))
+
+        startxref = f.tell()
+        size = len(self._offsets)
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        for start in range(1, size, 4096):
+            f.write(b"".join(b"%010d 00000 n \n" % off for off in self._offsets[start:start + 4096]))
+        f.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, self.catalog_id, startxref))
+
+
+def _normal_appearance(annot) -> Optional[IndirectObject]:
+    if "/AP" not in annot or "/N" not in annot["/AP"]:
+        return None
+    ap = annot["/AP"].raw_get("/N")
+    if not isinstance(ap.get_object(), StreamObject):
+        # dicionário de estados (caixas de seleção): usa o estado atual /AS
+        states = ap.get_object()
+        state = annot["/AS"] if "/AS" in annot else None
+        if state is None or state not in states:
+            return None
+        ap = states.raw_get(state)
+    return ap if isinstance(ap, IndirectObject) else None
+
+
+def _appearance_matrix(form, rect) -> Tuple[float, ...]:
+    # Algoritmo 8.1 da especificação: leva a /BBox transformada pela /Matrix
+    # do formulário até o /Rect da anotação.
+    x0, y0, x1, y1 = (float(v) for v in form["/BBox"])
+    m = [float(v) for v in form["/Matrix"]] if "/Matrix" in form else [1, 0, 0, 1, 0, 0]
+    corners = [(x * m[0] + y * m[2] + m[4], x * m[1] + y * m[3] + m[5]) for x in (x0, x1) for y in (y0, y1)]
+    bx0, bx1 = min(p[0] for p in corners), max(p[0] for p in corners)
+    by0, by1 = min(p[1] for p in corners), max(p[1] for p in corners)
+    r = [float(v) for v in rect]
+    rx0, ry0, rx1, ry1 = min(r[0], r[2]), min(r[1], r[3]), max(r[0], r[2]), max(r[1], r[3])
+    sx = (rx1 - rx0) / (bx1 - bx0) if bx1 > bx0 else 1.0
+    sy = (ry1 - ry0) / (by1 - by0) if by1 > by0 else 1.0
+    return sx, 0.0, 0.0, sy, rx0 - bx0 * sx, ry0 - by0 * sy
+
+
+def write_windowed(
+    input_pdf: str,
+    output_pdf: Output,
+    plan: Callable[[int], Iterable[int]],
+    memory_limit_mb: float,
+    rotate: int = 0,
+    rotate_pages: Optional[PageSet] = None,
+    flatten: bool = False,
+    blank_size: Tuple[float, float] = (612, 792),
+    linearize: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> WindowReport:
+    """Copia páginas em janelas, gravando os objetos à medida que avança.
+
+    ``plan(page_count)`` devolve os índices 0-based das páginas de saída, em
+    ordem (``BLANK`` para página em branco). Depois de cada janela o cache do
+    leitor é descartado e o tamanho da janela se ajusta ao limite de memória.
+    """
+    # Arquivo aberto em vez do caminho: o pypdf leria o PDF inteiro para a memória.
+    task = Tracker(progress, cancel)
+    source = nullcontext(input_pdf) if is_stream(input_pdf) else open(input_pdf, "rb")
+    args = (plan, memory_limit_mb, rotate, rotate_pages, flatten, blank_size, task)
+    with source as f, output_file(output_pdf) as out:
+        reader = PdfReader(f)
+        if not linearize:
+            report = _write_windowed(reader, task.file(out), *args)
+        else:
+            import pikepdf  # o qpdf lê os streams do arquivo sob demanda
+
+            # A versão não linearizada fica num temporário anônimo, apagado
+            # pelo sistema mesmo se o processo morrer.
+            with tempfile.TemporaryFile() as plain:
+                report = _write_windowed(reader, task.file(plain), *args)
+                task.check()
+                plain.seek(0)
+                with pikepdf.open(plain) as pdf:
+                    pdf.save(out, linearize=True)
+    task.finish()
+    report.output = output_pdf
+    return report
+
+
+def _write_windowed(
+    reader: PdfReader,
+    f: BinaryIO,
+    plan: Callable[[int], Iterable[int]],
+    memory_limit_mb: float,
+    rotate: int,
+    rotate_pages: Optional[PageSet],
+    flatten: bool,
+    blank_size: Tuple[float, float],
+    task: Tracker,
+) -> WindowReport:
+    ids, gens, owners, inherited = _page_refs(reader)
+    order = array("i", plan(len(ids)))
+    task.total = len(order)
+    rotate_mask = rotate_pages.mask(len(ids)) if rotate and rotate_pages is not None else None
+
+    w = _StreamingWriter(reader, f, len(order))
+    for idnum in ids:
+        w.mark_page(idnum)
+    for out_id, src in enumerate(order, 1):
+        if src != BLANK:
+            w.mark_page(ids[src], out_id)  # destinos/links apontam para a 1ª ocorrência
+
+    window, windows, pos = 64, 0, 0
+    while pos < len(order):
+        for out_id in range(pos + 1, min(pos + window, len(order)) + 1):
+            src = order[out_id - 1]
+            if src == BLANK:
+                w.add_blank_page(out_id, *blank_size)
+            else:
+                turn = rotate if rotate_mask is None or rotate_mask[src] else 0
+                w.add_page(out_id, ids[src], gens[src], inherited[owners[src]], turn, flatten)
+            task.step()
+        pos += window
+        windows += 1
+        reader.resolved_objects.clear()
+        rss = _rss_mb()
+        if rss > memory_limit_mb:
+            window = max(_MIN_WINDOW, window // 2)
+        elif rss < memory_limit_mb / 2:
+            window = min(_MAX_WINDOW, window * 2)
+    w.close(len(order))
+    return WindowReport("", len(order), windows, peak_rss_mb())